@@ -0,0 +1,80 @@
+"""
+A burst of model calls against a provider quota, with and without admission control.
+
+    python -m benchmarks.bench_admission --quota-rps 30 --in-progress 300 --new 100 --burst-sec 4
+
+The fake provider allows --quota-rps calls per second (plus one second of
+burst) and fails anything above that, the way a quota error turns into a
+fallback question. Without admission every call goes straight through;
+with it, calls pass admission.AdmissionController first (global rate set
+to the quota), so in-progress interviews wait their turn, new sessions are
+told to retry, and the provider never sees more than its quota. Alongside
+the interview requests, --background calls that no route admits
+(evaluation jobs, batch re-grades, prefetches) take their tokens per call
+the way llm_runtime does, behind the interviews.
+"""
+import time
+import random
+import asyncio
+import argparse
+from src import admission
+from src.admission import AdmissionController, AdmissionRejected, IN_PROGRESS, NEW_SESSION, BACKGROUND, TokenBucket
+from benchmarks.load_test import percentile
+
+
+async def run(controller, quota_rps: float, calls: list, burst_sec: float, model_ms: float, timeout_sec: float) -> dict:
+    quota = TokenBucket(quota_rps, quota_rps)
+    results = {name: {"served": 0, "quota_error": 0, "rejected": 0, "waits": []} for name in admission.PRIORITY_NAMES.values()}
+
+    async def one(index: int, priority: int):
+        await asyncio.sleep(random.uniform(0, burst_sec))
+        stats = results[admission.PRIORITY_NAMES[priority]]
+        start = time.perf_counter()
+        if controller is not None:
+            try:
+                if priority == BACKGROUND:
+                    admission.background()
+                else:
+                    await controller.admit(f"session:{index}", priority)
+                await asyncio.wait_for(controller.acquire(), timeout=timeout_sec)   # what llm_runtime does per call
+            except (AdmissionRejected, asyncio.TimeoutError):
+                stats["rejected"] += 1
+                return
+        stats["waits"].append(time.perf_counter() - start)
+        if not quota.take(time.monotonic()):
+            stats["quota_error"] += 1
+            return
+        await asyncio.sleep(model_ms / 1000)
+        stats["served"] += 1
+
+    await asyncio.gather(*(one(i, p) for i, p in enumerate(calls)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota-rps", type=float, default=30)
+    parser.add_argument("--in-progress", type=int, default=300)
+    parser.add_argument("--new", type=int, default=100)
+    parser.add_argument("--background", type=int, default=100)
+    parser.add_argument("--timeout-sec", type=float, default=30, help="LLM_TIMEOUT_SEC: how long a background call may wait")
+    parser.add_argument("--burst-sec", type=float, default=4)
+    parser.add_argument("--model-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    random.seed(7)
+    calls = [IN_PROGRESS] * args.in_progress + [NEW_SESSION] * args.new + [BACKGROUND] * args.background
+    random.shuffle(calls)
+
+    for name, make in (("no admission", lambda: None),
+                       ("admission", lambda: AdmissionController(args.quota_rps, args.quota_rps))):
+        random.seed(11)
+        results = asyncio.run(run(make(), args.quota_rps, calls, args.burst_sec, args.model_ms, args.timeout_sec))
+        for kind, stats in results.items():
+            waits = stats["waits"] or [0.0]
+            print(f"{name:<13} {kind:<12} served {stats['served']:4d} | quota errors {stats['quota_error']:4d} | "
+                  f"429/timeout {stats['rejected']:4d} | wait p50 {percentile(waits, 50) * 1000:6.0f} ms | p99 {percentile(waits, 99) * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Decode + feature extraction time for a synthetic 2-minute answer.
+
+    python -m benchmarks.bench_audio_features --seconds 120
+
+Builds a speech-like signal (voiced bursts separated by pauses), encodes it as
+16 kHz WAV and, when PyAV is installed, as webm/opus, then times measure_audio.
+"""
+import io
+import time
+import wave
+import argparse
+import numpy as np
+from src import audio_features
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_answer(seconds: float, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    t = 0.0
+    while t < seconds:
+        burst = rng.uniform(0.5, 2.5)
+        start, end = int(t * SAMPLE_RATE), int(min(t + burst, seconds) * SAMPLE_RATE)
+        phase = np.arange(end - start) / SAMPLE_RATE
+        samples[start:end] = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 250) * phase) * rng.uniform(0.5, 1.0)
+        t += burst + rng.uniform(0.1, 1.2)
+    samples += rng.normal(0, 0.002, len(samples)).astype(np.float32)
+    return samples
+
+
+def to_wav(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def to_webm(samples: np.ndarray) -> bytes:
+    av = audio_features.av
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray((samples * 32767).astype(np.int16).reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = SAMPLE_RATE
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=48000)
+        for resampled in resampler.resample(frame):
+            for packet in stream.encode(resampled):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = synthetic_answer(args.seconds)
+    encodings = {"audio/wav": to_wav(samples)}
+    if audio_features.av is not None:
+        encodings["audio/webm"] = to_webm(samples)
+
+    signal_only = best_of(lambda: audio_features.measure_signal(samples, SAMPLE_RATE), args.repeats)
+    print(f"measure_signal (already decoded) {signal_only * 1000:7.1f} ms")
+    for mime_type, payload in encodings.items():
+        elapsed = best_of(lambda: audio_features.measure_audio(payload, mime_type), args.repeats)
+        result = audio_features.measure_audio(payload, mime_type)
+        print(f"{mime_type:<11} decode+measure {elapsed * 1000:7.1f} ms | "
+              f"duration {result['durationSec']:.1f}s, voiced {result['voicedSec']:.1f}s, pauses {result['pauseCount']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Batch re-grading throughput: one session at a time vs. batch_eval at several concurrency levels.
+
+    python -m benchmarks.bench_batch_eval --sessions 100 --concurrency 1 8 32
+
+Concurrency above batch_eval.BATCH_EVAL_MAX_CALLS is capped to it (the
+printed level is the one that ran).
+
+Seeds --sessions completed sessions in benchmarks.fake_firestore (through
+the real FirestoreBackend) and grades them through llm.py and the real SDK
+against benchmarks.fake_gemini (--model-ms per call).
+  one at a time  what a hand-written script does: get each session, grade
+                 it, update it (two Firestore round trips per session)
+  batch_eval     paged stream, --concurrency evaluations in flight, bulk writes
+It then interrupts a run halfway and resumes it from its checkpoint. The
+resume check passes when every session ends up re-graded and only the
+evaluations cut off by the interrupt were repeated.
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+
+os.environ["LLM_PROVIDERS"] = "gemini"   # only the fake is reachable; read when llm builds its router
+from src import llm, batch_eval  # noqa: E402
+from src.session_store import FirestoreBackend, Turn  # noqa: E402
+from benchmarks.fake_firestore import FakeFirestore  # noqa: E402
+from benchmarks.load_test import _spawn  # noqa: E402
+from benchmarks.bench_connection_pool import wait_listening  # noqa: E402
+from benchmarks.bench_context_window import ANSWER  # noqa: E402
+
+PORT = 8774
+TURNS = 8
+
+
+async def seeded_backend(sessions: int, firestore_ms: float) -> FirestoreBackend:
+    db = FakeFirestore(latency_ms=0, jitter_ms=0)
+    backend = FirestoreBackend(db)
+    for index in range(sessions):
+        session_id = f"session-{index:06d}"
+        history = [Turn(turn, f"Question {turn + 1} about data pipelines?", ANSWER) for turn in range(TURNS)]
+        await backend.create(session_id, {'user_id': "guest", 'role': "Data Engineer", 'history': history,
+                                          'status': 'in_progress', 'difficulty': "Hard"})
+        await backend.save_report(session_id, {'technical_score': 50, 'final_verdict': "No Hire"})
+    db.latency_ms, db.jitter_ms, db.calls = firestore_ms, firestore_ms / 4, 0
+    return backend
+
+
+def regraded(backend: FirestoreBackend) -> int:
+    return sum(1 for document in backend.db.documents.values() if 'regraded_at' in document)
+
+
+async def one_at_a_time(backend: FirestoreBackend, session_ids) -> None:
+    for session_id in session_ids:
+        session = await backend.load(session_id)
+        data = await llm.get_final_evaluation_json(session['role'], session['history'], session['difficulty'], "")
+        await backend.db.collection(backend.collection).document(session_id).update(
+            {'final_report': data, 'regraded_at': backend.firestore.SERVER_TIMESTAMP})
+
+
+async def interrupted_and_resumed(sessions: int, firestore_ms: float, concurrency: int) -> dict:
+    backend = await seeded_backend(sessions, firestore_ms)
+    started = finished = 0
+    grade = llm.get_final_evaluation_json
+
+    async def counting(role, history, difficulty, job_description):
+        nonlocal started, finished
+        started += 1
+        data = await grade(role, history, difficulty, job_description)
+        finished += 1
+        return data
+
+    llm.get_final_evaluation_json = counting
+    path = os.path.join(tempfile.mkdtemp(prefix="batch-eval-"), "checkpoint.json")
+    try:
+        first = batch_eval.BatchEvaluation(backend, batch_eval.Checkpoint(path), concurrency=concurrency,
+                                           page_size=25, write_batch=10)
+        task = asyncio.create_task(first.run())
+        while first.processed < sessions // 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        interrupted_at = batch_eval.Checkpoint(path).cursor
+        second = batch_eval.BatchEvaluation(backend, batch_eval.Checkpoint(path), concurrency=concurrency,
+                                            page_size=25, write_batch=10)
+        await second.run()
+    finally:
+        llm.get_final_evaluation_json = grade
+    return {"interrupted_at": interrupted_at, "started": started, "finished": finished, "regraded": regraded(backend),
+            "checkpoint": batch_eval.Checkpoint(path).to_dict()}
+
+
+async def measure(sessions: int, firestore_ms: float, levels) -> None:
+    await wait_listening(PORT)
+    backend = await seeded_backend(sessions, firestore_ms)
+    start = time.perf_counter()
+    await one_at_a_time(backend, [f"session-{index:06d}" for index in range(sessions)])
+    elapsed = time.perf_counter() - start
+    print(f"one at a time    | {sessions / elapsed * 60:8.1f} sessions/min | Firestore round trips {backend.db.calls:5d}")
+
+    for concurrency in levels:
+        backend = await seeded_backend(sessions, firestore_ms)
+        run = batch_eval.BatchEvaluation(backend, batch_eval.Checkpoint(), concurrency=concurrency)
+        result = await run.run()
+        assert regraded(backend) == sessions, "every session should carry a new report"
+        print(f"batch_eval x{run.concurrency:<4} | {result['sessions_per_minute']:8.1f} sessions/min | "
+              f"Firestore round trips {backend.db.calls:5d}")
+
+    resume = await interrupted_and_resumed(sessions, firestore_ms, max(levels))
+    ok = resume["finished"] == sessions and resume["regraded"] == sessions
+    print(f"resume           | interrupted at cursor {resume['interrupted_at']} | {resume['finished']} evaluations completed "
+          f"for {sessions} sessions ({resume['started'] - resume['finished']} cut off in flight), "
+          f"{resume['regraded']} re-graded | {'ok' if ok else 'FAILED'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--model-ms", type=float, default=300)
+    parser.add_argument("--firestore-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    env = {**os.environ, "FAKE_GEMINI_LATENCY_MS": str(args.model_ms), "FAKE_GEMINI_JITTER_MS": str(args.model_ms / 4)}
+    fake = _spawn(["benchmarks.fake_gemini:app", "--port", str(PORT)], env)
+    try:
+        os.environ.update({"GEMINI_API_KEY": "bench", "GEMINI_BASE_URL": f"http://127.0.0.1:{PORT}"})
+        asyncio.run(measure(args.sessions, args.firestore_ms, args.concurrency))
+    finally:
+        fake.terminate()
+        fake.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Face-detection throughput of the confidence pipeline on recorded video.
+
+    python -m benchmarks.bench_confidence interview.mp4 --workers 1 2 4
+    python -m benchmarks.bench_confidence               # synthetic 720p clip
+
+Frames are JPEG-encoded first, as a browser would send them, then pushed
+through the worker pool at full resolution (the old webcam loop) and at the
+decode scale the service picks for CONFIDENCE_MAX_WIDTH. Reports frames/sec
+overall and per worker process.
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+from src import confidence
+
+
+def synthetic_clip(frames: int, width: int = 1280, height: int = 720, seed: int = 3) -> list:
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 8)
+    clip = []
+    for index in range(frames):
+        frame = background.copy()
+        cx = int(width / 2 + 40 * np.sin(index / 15))
+        cv2.ellipse(frame, (cx, height // 2), (110, 150), 0, 0, 360, (150, 180, 220), -1)
+        clip.append(frame)
+    return clip
+
+
+def read_clip(path: str, limit: int) -> list:
+    capture = cv2.VideoCapture(path)
+    clip = []
+    while len(clip) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        clip.append(frame)
+    capture.release()
+    return clip
+
+
+def encode(clip: list) -> list:
+    return [cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes() for frame in clip]
+
+
+def throughput(jpegs: list, reduce: int, workers: int) -> dict:
+    with ProcessPoolExecutor(max_workers=workers, initializer=confidence._init_worker) as pool:
+        list(pool.map(confidence.detect_face, jpegs[:workers], [reduce] * workers))  # warm up workers
+        start = time.perf_counter()
+        faces = sum(face is not None for _, face in pool.map(confidence.detect_face, jpegs, [reduce] * len(jpegs), chunksize=4))
+        elapsed = time.perf_counter() - start
+    fps = len(jpegs) / elapsed
+    return {"fps": fps, "fps_per_worker": fps / workers, "faces": faces}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="*")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per video.")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    sources = [(path, read_clip(path, args.frames)) for path in args.videos] or [("synthetic 720p", synthetic_clip(args.frames))]
+    for name, clip in sources:
+        if not clip:
+            print(f"{name}: no frames read")
+            continue
+        width = clip[0].shape[1]
+        reduce = next((r for r in confidence._REDUCTIONS if width / r <= confidence.CONFIDENCE_MAX_WIDTH), 8)
+        jpegs = encode(clip)
+        print(f"{name}: {len(clip)} frames at {width}x{clip[0].shape[0]}, {np.mean([len(j) for j in jpegs]) / 1024:.0f} KB/frame")
+        for workers in args.workers:
+            for label, r in (("full resolution", 1), (f"decode 1/{reduce}", reduce)):
+                result = throughput(jpegs, r, workers)
+                print(f"  {workers} worker(s), {label:<15}: {result['fps']:7.1f} frames/s "
+                      f"({result['fps_per_worker']:.1f} per worker), faces in {result['faces']} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Offline video analysis: vectorized motion math and end-to-end speed vs. real time.
+
+    python -m benchmarks.bench_confidence_batch                     # synthetic 60 s 720p clip
+    python -m benchmarks.bench_confidence_batch interview.mp4 --fps 10
+
+The motion part compares the per-frame tracker (the live/webcam loop) with the
+array version over a 30-minute, 30 fps timeline. The end-to-end part reports
+processing time as a fraction of the video's duration.
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import cv2
+from src import confidence, confidence_batch
+from benchmarks.bench_confidence import synthetic_clip
+
+
+def motion_timeline(frames: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / 30.0
+    cx = 640 + np.cumsum(rng.normal(0, 3, frames))
+    cy = 360 + np.cumsum(rng.normal(0, 3, frames))
+    score = rng.uniform(0.6, 1.0, frames)
+    score[rng.random(frames) < 0.05] = np.nan
+    return t, cx, cy, score
+
+
+def bench_motion(frames: int):
+    t, cx, cy, score = motion_timeline(frames)
+
+    start = time.perf_counter()
+    tracker = confidence.HeadMotionTracker()
+    for i in range(frames):
+        tracker.update(t[i], None if np.isnan(score[i]) else (cx[i], cy[i], score[i]))
+    loop_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    speeds = confidence_batch.head_speeds(t, cx, cy, score)
+    vector_sec = time.perf_counter() - start
+
+    print(f"motion math, {frames} frames: per-frame loop {loop_sec * 1000:.0f} ms | "
+          f"vectorized {vector_sec * 1000:.1f} ms ({loop_sec / vector_sec:.0f}x) | "
+          f"mean speed {tracker.summary()['meanHeadSpeed']:.3f} vs {speeds[~np.isnan(score)].mean():.3f}")
+
+
+def write_clip(path: str, seconds: float):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (1280, 720))
+    clip = synthetic_clip(90)
+    for index in range(int(seconds * 30)):
+        writer.write(clip[index % len(clip)])
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic clip.")
+    parser.add_argument("--fps", type=float, default=confidence.CONFIDENCE_TARGET_FPS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    bench_motion(30 * 60 * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.video
+        if path is None:
+            path = os.path.join(tmp, "clip.mp4")
+            write_clip(path, args.seconds)
+        start = time.perf_counter()
+        frames, summary = confidence_batch.analyze_video(path, target_fps=args.fps, workers=args.workers)
+        elapsed = time.perf_counter() - start
+
+    duration = summary["durationSec"] + 1 / args.fps
+    print(f"end to end: {duration:.0f} s of video, {len(frames)} frames analysed with {args.workers} worker(s) "
+          f"in {elapsed:.1f} s = {elapsed / duration:.1%} of real time "
+          f"(30-minute recording ~ {elapsed / duration * 1800:.0f} s); "
+          f"metrics array {frames.nbytes / len(frames):.0f} bytes/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Outbound Gemini calls over TLS: a connection per call vs. the shared keep-alive pool.
+
+    python -m benchmarks.bench_connection_pool --calls 200 --concurrency 20
+
+Starts the fake Gemini server with a throwaway self-signed certificate and
+sends question calls through the real SDK, built by clients.ClientRegistry
+either with keep-alive disabled (every call pays TCP + TLS setup, like an
+idle pool after httpx's default 5 s expiry) or with the default pooled
+settings. Reports call latency and connections opened vs. reused.
+"""
+import os
+import time
+import asyncio
+import datetime
+import argparse
+import tempfile
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from google.genai import types
+from src import clients
+from src.clients import ClientRegistry
+from benchmarks.load_test import percentile, _spawn
+
+PORT = 8770
+
+
+def write_self_signed(directory: str) -> tuple:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    key_path, cert_path = os.path.join(directory, "key.pem"), os.path.join(directory, "cert.pem")
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return key_path, cert_path
+
+
+async def wait_listening(port: int, timeout: float = 20.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Fake Gemini did not start on port {port}.")
+
+
+async def run(registry: ClientRegistry, calls: int, concurrency: int) -> list:
+    client = registry.gemini()
+    config = types.GenerateContentConfig(system_instruction="You are an interviewer.", max_output_tokens=150)
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            await client.aio.models.generate_content(model="gemini-2.0-flash", contents=["Next question."], config=config)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    await registry.aclose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        key_path, cert_path = write_self_signed(tmp)
+        env = {**os.environ, "FAKE_GEMINI_LATENCY_MS": "0", "FAKE_GEMINI_JITTER_MS": "0"}
+        fake = _spawn(["benchmarks.fake_gemini:app", "--port", str(PORT),
+                       "--ssl-keyfile", key_path, "--ssl-certfile", cert_path], env)
+        try:
+            os.environ["GEMINI_API_KEY"] = "bench"
+            os.environ["GEMINI_BASE_URL"] = f"https://localhost:{PORT}"
+            asyncio.run(wait_listening(PORT))
+            for name, registry in (("connection per call", ClientRegistry(max_keepalive=0, verify=cert_path)),
+                                   ("shared pool", ClientRegistry(verify=cert_path))):
+                before = dict(clients.CONNECTIONS._values)
+                latencies = asyncio.run(run(registry, args.calls, args.concurrency))
+                counts = {labels[1]: value - before.get(labels, 0) for labels, value in clients.CONNECTIONS._values.items()}
+                print(f"{name:<20} p50 {percentile(latencies, 50) * 1000:6.2f} ms | p99 {percentile(latencies, 99) * 1000:6.2f} ms | "
+                      f"connections opened {counts.get('opened', 0):.0f}, reused {counts.get('reused', 0):.0f}")
+        finally:
+            fake.terminate()
+            fake.wait()
+
+
+if __name__ == "__main__":
+    main()
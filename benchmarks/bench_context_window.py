@@ -0,0 +1,70 @@
+"""
+Prompt size and per-turn latency for 5/20/50-turn sessions, full transcript vs. bounded context.
+
+    python -m benchmarks.bench_context_window --turns 5 20 50
+
+Latency is modeled as --base-ms plus --ms-per-1k-tokens of prompt, which is how
+input length shows up in provider latency. Prompt assembly time is measured directly.
+"""
+import time
+import argparse
+from src import llm
+from src.context_window import HistoryContext, estimate_tokens
+
+ANSWER = ("I would start by profiling the slow query, check the execution plan for sequential scans, "
+          "then add a composite index on the filter columns and verify the improvement with EXPLAIN ANALYZE. "
+          "If writes are heavy I would weigh the index maintenance cost against the read gains.")
+
+
+def legacy_transcript(history):
+    text = ""
+    for turn in history:
+        text += f"Interviewer: {turn.get('Q', '')}\nCandidate: {turn.get('A', '')}\n"
+    return text
+
+
+def simulate(turns: int, bounded: bool, base_ms: float, ms_per_1k: float) -> dict:
+    history = []
+    context = HistoryContext()
+    prompt_tokens, build_sec, modeled_ms = [], 0.0, 0.0
+    for index in range(turns):
+        question = f"Question {index + 1}: how would you optimise query number {index + 1} on a large orders table?"
+        history.append({'Q': question, 'A': ''})
+        history.append({'Q': question, 'A': ANSWER})
+
+        start = time.perf_counter()
+        system_instruction, _ = llm.build_question_prompt("Data Analyst", history[:1], "Hard", "SQL")
+        conversation = context.render(history) if bounded else legacy_transcript(history)
+        user_prompt = f"INTERVIEW HISTORY:\n{conversation}\n\nGenerate the next question."
+        build_sec += time.perf_counter() - start
+
+        tokens = estimate_tokens(system_instruction) + estimate_tokens(user_prompt)
+        prompt_tokens.append(tokens)
+        modeled_ms += base_ms + ms_per_1k * tokens / 1000
+
+    return {
+        "last_turn_tokens": prompt_tokens[-1],
+        "session_tokens": sum(prompt_tokens),
+        "build_us_per_turn": build_sec / turns * 1e6,
+        "modeled_ms_per_turn": modeled_ms / turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--base-ms", type=float, default=350)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=60)
+    args = parser.parse_args()
+
+    for turns in args.turns:
+        for bounded in (False, True):
+            r = simulate(turns, bounded, args.base_ms, args.ms_per_1k_tokens)
+            label = "bounded" if bounded else "full"
+            print(f"{turns:3d} turns {label:<8} | last prompt {r['last_turn_tokens']:6d} tok | "
+                  f"session total {r['session_tokens']:7d} tok | build {r['build_us_per_turn']:7.1f} us/turn | "
+                  f"modeled {r['modeled_ms_per_turn']:6.0f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Evaluation response handling: old strip/parse/construct path vs. validate-and-repair.
+
+    python -m benchmarks.bench_evaluation_parse --repeats 2000
+
+Runs a corpus of grader outputs with the slips models actually make (markdown
+fences, float or out-of-range scores, a list sent as a string, a missing list,
+verdict casing) through both paths and reports how many would have failed the
+evaluation and the per-response cost.
+"""
+import json
+import time
+import argparse
+from src import llm
+from src.models import EvaluationReport
+
+VALID = {
+    "technical_score": 72, "clarity_score": 80, "fluency_score": 75,
+    "detailed_feedback": "Solid fundamentals with minor gaps.",
+    "technical_strengths": ["Indexing"], "technical_weaknesses": ["Query planning"],
+    "improvement_plan": ["Practice EXPLAIN output"], "learning_resources": ["Use The Index, Luke"],
+    "final_verdict": "Hire",
+}
+
+CORPUS = {
+    "valid": json.dumps(VALID),
+    "markdown fence": "```json\n" + json.dumps(VALID) + "\n```",
+    "score over 100": json.dumps({**VALID, "technical_score": 105}),
+    "float scores": json.dumps({**VALID, "clarity_score": 79.5, "fluency_score": "75"}),
+    "list as string": json.dumps({**VALID, "learning_resources": "Use The Index, Luke"}),
+    "missing list": json.dumps({k: v for k, v in VALID.items() if k != "improvement_plan"}),
+    "verdict casing": json.dumps({**VALID, "final_verdict": "strong hire"}),
+    "truncated": json.dumps(VALID)[:120],
+}
+
+
+def legacy(text: str) -> dict:
+    data = json.loads(llm.clean_json_text(text))
+    return EvaluationReport(**data).model_dump()
+
+
+def current(text: str) -> dict:
+    return llm.validate_evaluation(text)[0]
+
+
+def outcome(fn, text: str) -> str:
+    try:
+        fn(text)
+        return "ok"
+    except Exception:
+        return "FAIL"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'response':<16} {'legacy':>7} {'repair':>7}")
+    for name, text in CORPUS.items():
+        print(f"{name:<16} {outcome(legacy, text):>7} {outcome(current, text):>7}")
+
+    failures = {fn.__name__: sum(outcome(fn, t) != "ok" for t in CORPUS.values()) for fn in (legacy, current)}
+    print(f"failed evaluations: legacy {failures['legacy']}/{len(CORPUS)} | repair {failures['current']}/{len(CORPUS)}")
+
+    text = CORPUS["valid"]
+    for fn in (legacy, current):
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            fn(text)
+        print(f"{fn.__name__:<7} valid response: {(time.perf_counter() - start) / args.repeats * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Tail latency of LLM calls with and without hedging, and failover behaviour.
+
+    python -m benchmarks.bench_hedging --calls 1000 --median-ms 300 --slow-rate 0.03 --slow-ms 3000
+
+Fake providers answer in a log-normal time around --median-ms, except that a
+--slow-rate share of calls stalls for --slow-ms (the occasional slow Gemini
+response). Scenarios run the same call mix through llm_router.LLMRouter:
+no hedging, hedging to the same provider, hedging to a second provider, and
+a second provider with a failing primary (circuit breaker).
+"""
+import time
+import random
+import asyncio
+import argparse
+from src import llm_router
+from src.llm_router import LLMRequest, LLMRouter
+from benchmarks.load_test import percentile
+
+
+class FakeProvider:
+    def __init__(self, name: str, median_ms: float, slow_rate: float, slow_ms: float, error_rate: float = 0.0, seed: int = 1):
+        self.name = name
+        self.median_ms = median_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.rng = random.Random(seed)
+
+    def available(self) -> bool:
+        return True
+
+    async def complete(self, request, timeout):
+        self.calls += 1
+        if self.rng.random() < self.error_rate:
+            await asyncio.sleep(0.02)
+            raise RuntimeError("503 UNAVAILABLE")
+        if self.rng.random() < self.slow_rate:
+            delay = self.slow_ms
+        else:
+            delay = self.median_ms * self.rng.lognormvariate(0, 0.25)
+        await asyncio.sleep(delay / 1000)
+        return "What is a covering index?"
+
+
+async def run(router: LLMRouter, calls: int, concurrency: int) -> list:
+    request = LLMRequest("question", "You are an interviewer.", "Next question.", temperature=0.7)
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            await router.complete(request)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--median-ms", type=float, default=300)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    args = parser.parse_args()
+    llm_router.LLM_HEDGE_DEFAULT_MS = args.median_ms * 3   # before the latency window fills
+
+    def provider(name, seed, error_rate=0.0):
+        return FakeProvider(name, args.median_ms, args.slow_rate, args.slow_ms, error_rate, seed)
+
+    scenarios = {
+        "no hedging": lambda: LLMRouter([provider("gemini", 1)], hedge=False),
+        "hedge, same provider": lambda: LLMRouter([provider("gemini", 1)]),
+        "hedge, second provider": lambda: LLMRouter([provider("gemini", 1), provider("openai", 2)]),
+        "primary failing 100%": lambda: LLMRouter([provider("gemini", 1, error_rate=1.0), provider("openai", 2)]),
+    }
+    for name, make in scenarios.items():
+        router = make()
+        latencies = asyncio.run(run(router, args.calls, args.concurrency))
+        sent = {p.name: p.calls for p in router.providers}
+        extra = sum(sent.values()) / args.calls - 1
+        print(f"{name:<24} p50 {percentile(latencies, 50) * 1000:5.0f} ms | p95 {percentile(latencies, 95) * 1000:5.0f} ms | "
+              f"p99 {percentile(latencies, 99) * 1000:5.0f} ms | extra calls {extra:+.1%} | per provider {sent}")
+    print(f"hedges: {dict(llm_router.HEDGES._values)} | breaker trips: {dict(llm_router.BREAKER_TRIPS._values)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Duplicate turn submissions: model calls and recorded history when a client retries a turn.
+
+    python -m benchmarks.bench_idempotency --duplicates 50 --model-ms 300
+
+Runs the API in process (httpx ASGI transport, memory session backend) with
+the question model replaced by a counter that takes --model-ms. For each
+case one session is started, then the same answer is sent --duplicates
+times:
+  concurrent         all at once, no key (retries while the first is in flight)
+  concurrent, turn   all at once, with `turn` set
+  staggered, turn    half at once, the rest after the first response (cached result)
+  after expiry       with `turn`, after the cached result has expired (read back from history)
+  header             all at once, with one Idempotency-Key header
+  stream             all at once on /generate_question/stream
+Each case passes when the model was called exactly once for the answer,
+every response carries the same question, and the history holds the turn
+once. Two more cases check that a real next turn is never mistaken for a
+retry:
+  repeated answer    the same answer given to two questions in a row, with
+                     and without `turn`: two model calls, both recorded
+  resume             a call without an answer right after a turn: the open
+                     question comes back, not the first one
+The script exits with status 1 when any case fails.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+os.environ["SESSION_BACKEND"] = "memory"
+os.environ["LLM_PROVIDERS"] = "gemini"   # nothing is called; llm only builds its router
+import httpx  # noqa: E402
+from src import llm, idempotency  # noqa: E402
+from src.main import app  # noqa: E402
+from src.database import get_db_manager  # noqa: E402
+
+ROLE = "Backend Engineer"
+ANSWER = "I would add a covering index on the filter columns and check the plan with EXPLAIN ANALYZE."
+
+
+class CountingModel:
+    def __init__(self, latency_sec: float):
+        self.latency_sec = latency_sec
+        self.calls = 0
+
+    async def generate(self, role, history, difficulty, job_description, session_id=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency_sec)
+        return f"Question {len(history) + 1} (call {self.calls}): what would you measure first?"
+
+    async def stream(self, role, history, difficulty, job_description, session_id=None):
+        question = await self.generate(role, history, difficulty, job_description, session_id)
+        for word in question.split(" "):
+            yield word + " "
+
+
+def streamed_question(body: str) -> str:
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        if event == "event: done":
+            return json.loads(data[len("data: "):])["ai_question"]
+    raise AssertionError(f"no done event in {body!r}")
+
+
+async def submit(client: httpx.AsyncClient, session_id: str, turn=None, key=None, stream=False) -> str:
+    body = {"session_id": session_id, "role": ROLE, "user_answer": ANSWER}
+    if turn is not None:
+        body["turn"] = turn
+    headers = {"Idempotency-Key": key} if key else {}
+    if stream:
+        response = await client.post("/interview/generate_question/stream", json=body, headers=headers)
+        response.raise_for_status()
+        return streamed_question(response.text)
+    response = await client.post("/interview/generate_question", json=body, headers=headers)
+    response.raise_for_status()
+    return response.json()["ai_question"]
+
+
+async def case(client, model: CountingModel, name: str, duplicates: int, turn=False, key=None, stream=False,
+               staggered=False, expire=False) -> bool:
+    session_id = f"bench-{name.replace(' ', '-').replace(',', '')}"
+    opened = await client.post("/interview/generate_question", json={"session_id": session_id, "role": ROLE})
+    opened.raise_for_status()
+    first_turn = opened.json()["turn"] if turn else None
+    calls_before = model.calls
+
+    start = time.perf_counter()
+    requests = [submit(client, session_id, first_turn, key, stream) for _ in range(duplicates)]
+    if staggered or expire:
+        questions = await asyncio.gather(*requests[:duplicates // 2])
+        if expire:
+            idempotency.turn_coalescer.ttl_sec = 0
+        questions += await asyncio.gather(*requests[duplicates // 2:])
+        idempotency.turn_coalescer.ttl_sec = idempotency.IDEMPOTENCY_TTL_SEC
+    else:
+        questions = await asyncio.gather(*requests)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    history = await get_db_manager().get_history(session_id)
+    calls = model.calls - calls_before
+    answered = sum(1 for entry in history if entry.get('A') == ANSWER)
+    ok = calls == 1 and len(set(questions)) == 1 and answered == 1 and len(history) == 2
+    print(f"{name:<18} | {duplicates} requests | model calls {calls:3d} | distinct questions {len(set(questions)):3d} | "
+          f"history {len(history)} turns, answer recorded {answered}x | {elapsed_ms:7.1f} ms | {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def repeated_answer(client, model: CountingModel, name: str, turn: bool) -> bool:
+    """Two questions answered with the same words, one after the other."""
+    session_id = f"bench-{name.replace(' ', '-').replace(',', '')}"
+    opened = await client.post("/interview/generate_question", json={"session_id": session_id, "role": ROLE})
+    opened.raise_for_status()
+    calls_before = model.calls
+    first = await client.post("/interview/generate_question", json={
+        "session_id": session_id, "role": ROLE, "user_answer": "I don't know", **({"turn": 0} if turn else {})})
+    second = await client.post("/interview/generate_question", json={
+        "session_id": session_id, "role": ROLE, "user_answer": "I don't know", **({"turn": 1} if turn else {})})
+    first.raise_for_status()
+    second.raise_for_status()
+    history = await get_db_manager().get_history(session_id)
+    calls = model.calls - calls_before
+    answered = sum(1 for entry in history if entry.get('A') == "I don't know")
+    ok = (calls == 2 and first.json()["ai_question"] != second.json()["ai_question"] and second.json()["turn"] == 2
+          and len(history) == 3 and answered == 2)
+    print(f"{name:<18} | 2 requests  | model calls {calls:3d} | turns returned {first.json()['turn']}, {second.json()['turn']} | "
+          f"history {len(history)} turns, answer recorded {answered}x | {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def resume(client, model: CountingModel) -> bool:
+    """A call without an answer just after a turn returns the question now open."""
+    session_id = "bench-resume"
+    await client.post("/interview/generate_question", json={"session_id": session_id, "role": ROLE})
+    answered = await client.post("/interview/generate_question", json={"session_id": session_id, "role": ROLE, "user_answer": ANSWER})
+    resumed = await client.post("/interview/generate_question", json={"session_id": session_id, "role": ROLE})
+    ok = resumed.json()["ai_question"] == answered.json()["ai_question"] and resumed.json()["turn"] == 1
+    print(f"{'resume':<18} | returned turn {resumed.json()['turn']} ({'the open question' if ok else 'a stale question'}) | "
+          f"{'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def run(duplicates: int, model_ms: float) -> bool:
+    model = CountingModel(model_ms / 1000)
+    llm.generate_contextual_question = model.generate
+    llm.stream_contextual_question = model.stream
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = [
+            await case(client, model, "concurrent", duplicates),
+            await case(client, model, "concurrent, turn", duplicates, turn=True),
+            await case(client, model, "staggered, turn", duplicates, turn=True, staggered=True),
+            await case(client, model, "after expiry", duplicates, turn=True, expire=True),
+            await case(client, model, "header", duplicates, key="retry-1"),
+            await case(client, model, "stream", duplicates, stream=True),
+            await repeated_answer(client, model, "repeated answer", turn=False),
+            await repeated_answer(client, model, "repeated, turn", turn=True),
+            await resume(client, model),
+        ]
+    print(f"turn requests: {idempotency.turn_coalescer.stats()}")
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duplicates", type=int, default=50)
+    parser.add_argument("--model-ms", type=float, default=300)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.duplicates, args.model_ms)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-request cost of the tracing layer: one trace, the stage spans a
+generate_question request records, and the request histogram observation.
+
+    python -m benchmarks.bench_metrics_overhead --requests 100000
+"""
+import time
+import argparse
+from src import metrics
+
+STAGES = ("parse", "db_read", "llm_call", "db_write")
+
+
+def one_request():
+    trace = metrics.RequestTrace()
+    token = metrics._trace.set(trace)
+    try:
+        trace.route = "/interview/generate_question"
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - trace.start, trace.route, "parse")
+        for stage in STAGES[1:]:
+            with metrics.span(stage):
+                pass
+        metrics.record_llm_call("gemini-2.0-flash", 0.4, "ok")
+    finally:
+        metrics._trace.reset(token)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - trace.start, trace.route, "POST", "200")
+
+
+def bare_request():
+    for _ in STAGES[1:]:
+        pass
+
+
+def run(fn, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = run(bare_request, args.requests)
+    traced = run(one_request, args.requests)
+    print(f"baseline loop:        {baseline:.2f} us/request")
+    print(f"traced request:       {traced:.2f} us/request")
+    print(f"tracing overhead:     {traced - baseline:.2f} us/request")
+    start = time.perf_counter()
+    metrics.render()
+    print(f"/metrics render:      {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Opening-question latency with the response pool cold vs warm.
+
+    python -m benchmarks.bench_opener_cache --sessions 200
+
+The stub model answers in --model-ms; once the pool for a (role, difficulty, JD)
+key is full, openers come from memory.
+"""
+import time
+import asyncio
+import argparse
+from src import llm
+from src.clients import registry
+from src.response_cache import opener_cache
+from benchmarks.fakes import FakeGeminiClient
+from benchmarks.load_test import percentile
+
+
+async def run(sessions: int):
+    cold, warm = [], []
+    for _ in range(sessions):
+        hits_before = opener_cache.hits
+        start = time.perf_counter()
+        await llm.generate_contextual_question(role="Data Analyst", history=[], difficulty="Hard", job_description="SQL, pandas")
+        elapsed = time.perf_counter() - start
+        (warm if opener_cache.hits > hits_before else cold).append(elapsed)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--model-ms", type=float, default=400)
+    args = parser.parse_args()
+
+    registry.override("gemini", FakeGeminiClient(first_token_ms=args.model_ms, token_ms=0))
+    cold, warm = asyncio.run(run(args.sessions))
+
+    print(f"misses {len(cold):4d} | p50 {percentile(cold, 50) * 1000:9.3f} ms")
+    if warm:
+        print(f"hits   {len(warm):4d} | p50 {percentile(warm, 50) * 1000:9.3f} ms | p99 {percentile(warm, 99) * 1000:9.3f} ms")
+    print(opener_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
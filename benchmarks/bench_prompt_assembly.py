@@ -0,0 +1,181 @@
+"""
+Prompt assembly cost and billed input tokens, before and after prompt templates + context caching.
+
+    python -m benchmarks.bench_prompt_assembly --turns 50 --sessions 5
+
+1. Assembly: builds the question prompt for every turn of a --turns session
+   and the evaluation prompt at the end. It compares the previous inline
+   f-strings and `+=` transcript with prompts.py (cached instruction blocks,
+   memoized transcript lines).
+2. Billed tokens: runs --sessions sessions through llm.py and the real SDK
+   against benchmarks.fake_gemini. Context caching is off for one run and
+   on for the other, and each run uses a short JD and a full job posting.
+   Billed input is uncached prompt tokens plus cached tokens at
+   --cached-price (Gemini bills cached input at 25% of the normal rate;
+   cache storage is billed separately per hour).
+"""
+import os
+import time
+import asyncio
+import argparse
+
+os.environ["LLM_PROVIDERS"] = "gemini"   # only the fake is reachable; read when llm builds its router
+from src import llm, prompts, context_cache, metrics  # noqa: E402
+from src.context_window import HistoryContext  # noqa: E402
+from benchmarks.load_test import _spawn  # noqa: E402
+from benchmarks.bench_connection_pool import wait_listening  # noqa: E402
+from benchmarks.bench_context_window import ANSWER  # noqa: E402
+
+PORT = 8773
+SHORT_JD = "SQL, Python, Airflow, dbt."
+REQUIREMENT = ("Design, build and operate batch and streaming pipelines on Airflow and Kafka, model warehouse "
+               "tables in dbt with tests and documentation, tune Postgres and BigQuery queries, and own data "
+               "quality checks, lineage and on-call for the analytics platform. ")
+FULL_JD = REQUIREMENT * 18   # a pasted job posting, ~1,500 tokens
+
+
+# --- 1. Assembly ---
+
+def legacy_question_prompt(role, history, difficulty, job_description, context):
+    conversation_text = context.render(history) if history else ""
+    jd_context = f"Focus strictly on these key skills/scope: {job_description}" if job_description else "Focus on core concepts for this role."
+    system_instruction = (
+        f"You are a technical interviewer for a {role} position. "
+        f"Current Difficulty: {difficulty}. "
+        f"{jd_context} "
+        "Analyze the candidate's last answer. "
+        "Rules:\n"
+        "1. If the answer is vague, ask 'Why?' or 'How?'.\n"
+        "2. If the answer is wrong, correct them briefly and move on.\n"
+        "3. If the answer is good, increase the complexity based on the difficulty level.\n"
+        "Output: JUST the question."
+    )
+    return system_instruction, f"INTERVIEW HISTORY:\n{conversation_text}\n\nGenerate the next question."
+
+
+def legacy_evaluation_prompt(role, history, difficulty, job_description):
+    transcript = ""
+    for idx, turn in enumerate(history):
+        transcript += f"{idx+1}. Q: {turn.get('Q', '')}\n   A: {turn.get('A', '(No Answer provided)')}\n"
+    jd_context = f"Candidate must demonstrate proficiency in: {job_description}" if job_description else ""
+    system_instruction = (
+        f"You are a 'Bar Raiser' Recruiter for a {role}. "
+        f"Difficulty Expected: {difficulty}. "
+        f"{jd_context} "
+        "Evaluate the candidate based STRICTLY on the transcript provided. "
+        "Do not hallucinate competence."
+    )
+    prompt = f"""
+    TRANSCRIPT:
+    {transcript}
+
+    INSTRUCTIONS:
+    1. SCORING RUBRIC (0-100) based on {difficulty} level expectations:
+       - 0-30: Nonsense or completely wrong.
+       - 31-60: Surface-level knowledge, major gaps.
+       - 61-80: Solid answers, minor mistakes.
+       - 81-100: Expert depth, covers edge cases.
+
+    2. RULES:
+       - If answers are one-word or off-topic, Technical Score MUST be < 30.
+
+    OUTPUT:
+       - detailed_feedback: one professional paragraph summarizing performance.
+       - technical_strengths / technical_weaknesses: specific skills.
+       - improvement_plan: about 3 actionable steps (e.g., 'Practice SQL Window Functions').
+       - learning_resources: specific books or documentation.
+    """
+    return system_instruction, prompt
+
+
+def templated_question_prompt(role, history, difficulty, job_description, context):
+    system_instruction = prompts.question_instruction(role, difficulty, job_description, not history)
+    return system_instruction, f"INTERVIEW HISTORY:\n{context.render(history)}\n\nGenerate the next question."
+
+
+def templated_evaluation_prompt(role, history, difficulty, job_description):
+    return prompts.evaluation_instruction(role, difficulty, job_description), prompts.evaluation_prompt(history)
+
+
+def session_history(turns: int) -> list:
+    history = []
+    for index in range(turns):
+        question = f"Question {index + 1}: how would you optimise query number {index + 1} on a large orders table?"
+        history.append({'Q': question, 'A': ANSWER})
+    return history
+
+
+def time_assembly(question_prompt, evaluation_prompt, turns: int, job_description: str, repeats: int) -> tuple:
+    history = session_history(turns)
+    question_sec = evaluation_sec = 0.0
+    for _ in range(repeats):
+        context = HistoryContext()
+        start = time.perf_counter()
+        for turn in range(1, turns + 1):
+            question_prompt("Data Engineer", history[:turn], "Hard", job_description, context)
+        question_sec += time.perf_counter() - start
+        start = time.perf_counter()
+        evaluation_prompt("Data Engineer", history, "Hard", job_description)
+        evaluation_sec += time.perf_counter() - start
+    return question_sec / (repeats * turns) * 1e6, evaluation_sec / repeats * 1e6
+
+
+# --- 2. Billed tokens ---
+
+def _token_sum(histogram) -> float:
+    return sum(series[-2] for series in histogram._series.values())
+
+
+async def run_sessions(sessions: int, turns: int, job_description: str) -> tuple:
+    before_prompt, before_cached = _token_sum(metrics.LLM_PROMPT_TOKENS), _token_sum(metrics.LLM_CACHED_TOKENS)
+    for index in range(sessions):
+        session_id = f"bench-{job_description[:8]}-{index}"
+        history = []
+        for _ in range(turns):
+            question = await llm.generate_contextual_question("Data Engineer", history, "Hard", job_description, session_id)
+            history.append({'Q': question, 'A': ANSWER})
+            await asyncio.sleep(0.01)   # lets a background cache creation finish, as the next turn's think time would
+        await llm.get_final_evaluation_json("Data Engineer", history, "Hard", job_description)
+    return (_token_sum(metrics.LLM_PROMPT_TOKENS) - before_prompt,
+            _token_sum(metrics.LLM_CACHED_TOKENS) - before_cached)
+
+
+async def measure_tokens(sessions: int, turns: int, cached_price: float):
+    await wait_listening(PORT)
+    for name, jd in (("short JD", SHORT_JD), ("full posting", FULL_JD)):
+        billed = {}
+        for caching in (False, True):
+            context_cache.CONTEXT_CACHE_ENABLED = caching
+            prompt_tokens, cached_tokens = await run_sessions(sessions, turns, jd)
+            billed[caching] = prompt_tokens - cached_tokens * (1 - cached_price)
+            print(f"tokens, {name:<12} | context cache {'on ' if caching else 'off'} | prompt {prompt_tokens:9.0f} | "
+                  f"cached {cached_tokens:9.0f} | billed input {billed[caching]:9.0f}")
+        print(f"tokens, {name:<12} | billed input saved {(1 - billed[True] / billed[False]) * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--cached-price", type=float, default=0.25)
+    args = parser.parse_args()
+
+    for name, jd in (("short JD", SHORT_JD), ("full posting", FULL_JD)):
+        legacy = time_assembly(legacy_question_prompt, legacy_evaluation_prompt, args.turns, jd, args.repeats)
+        templated = time_assembly(templated_question_prompt, templated_evaluation_prompt, args.turns, jd, args.repeats)
+        print(f"assembly, {name:<12} | question prompt {legacy[0]:6.1f} -> {templated[0]:6.1f} us/turn | "
+              f"{args.turns}-turn evaluation prompt {legacy[1]:6.1f} -> {templated[1]:6.1f} us")
+
+    env = {**os.environ, "FAKE_GEMINI_LATENCY_MS": "0", "FAKE_GEMINI_JITTER_MS": "0"}
+    fake = _spawn(["benchmarks.fake_gemini:app", "--port", str(PORT)], env)
+    try:
+        os.environ.update({"GEMINI_API_KEY": "bench", "GEMINI_BASE_URL": f"http://127.0.0.1:{PORT}"})
+        asyncio.run(measure_tokens(args.sessions, args.turns, args.cached_price))
+    finally:
+        fake.terminate()
+        fake.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Near-duplicate answer cache: hit rate, false hits, index memory and lookup latency at 1M stored pairs.
+
+    python -m benchmarks.bench_semantic_cache --pairs 1000000 --scopes 500 --queries 20000
+
+Fills a semantic_cache.SemanticCache with --pairs (question, answer) pairs
+spread over --scopes questions (role x difficulty x opener). Answers to a
+question share its topic words. --common of them reword one of --canonical
+typical answers per question, picked with Zipf popularity, with filler
+words, a dropped word and changed casing/punctuation as a transcript would
+have. The rest are answers nobody else gives. It then looks up --queries new answers drawn the same way, at
+several similarity thresholds:
+  hit rate     lookups answered from the cache (model calls saved)
+  false hits   hits whose stored answer was a different typical answer,
+               or a hit for an answer nobody else gave
+Evaluations are looked up by whole transcripts. --transcripts sessions of
+--transcript-answers typical answers are stored, then each is looked up
+reworded (should hit) and reworded with one answer replaced by one nobody
+else gave (should miss), comparing answer by answer as the cache does
+against one vector for the joined transcript.
+"""
+import gc
+import time
+import random
+import resource
+import argparse
+import numpy as np
+from src.semantic_cache import SemanticCache
+from benchmarks.load_test import percentile
+
+FILLERS = ["um", "uh", "you know", "basically", "I mean"]
+FUNCTION_WORDS = ["the", "a", "to", "and", "then", "with", "on", "for", "we", "it", "is", "of", "I", "would"]
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    syllables = ["da", "ta", "in", "dex", "que", "ry", "par", "ti", "tion", "ca", "che", "lo", "ad", "sha", "rd",
+                 "re", "pli", "ka", "stre", "am", "bat", "ch", "jo", "in", "ser", "ver", "lat", "en", "cy", "sto"]
+    return list({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(size * 2)})[:size]
+
+
+def random_answer(topic: list, vocab: list, rng: random.Random) -> list:
+    """Answers to one question share its topic words, as real ones do."""
+    words = []
+    for _ in range(rng.randint(15, 40)):
+        draw = rng.random()
+        words.append(rng.choice(FUNCTION_WORDS) if draw < 0.3 else rng.choice(topic) if draw < 0.75 else rng.choice(vocab))
+    return words
+
+
+def reword(words: list, rng: random.Random) -> str:
+    """A typical answer as one more candidate would say it."""
+    words = list(words)
+    if rng.random() < 0.5:
+        del words[rng.randrange(len(words))]
+    for _ in range(rng.randint(0, 3)):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    text = " ".join(words)
+    if rng.random() < 0.5:
+        text = text.capitalize()
+    return text + rng.choice([".", "", "...", "!"])
+
+
+class Workload:
+    def __init__(self, scopes: int, canonical: int, common: float, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.vocab = vocabulary(3000, self.rng)
+        self.scopes = [f"scope-{index}" for index in range(scopes)]
+        self.topics = {scope: self.rng.sample(self.vocab, 30) for scope in self.scopes}
+        self.typical = {scope: [random_answer(self.topics[scope], self.vocab, self.rng) for _ in range(canonical)]
+                        for scope in self.scopes}
+        weights = 1 / np.arange(1, canonical + 1)
+        self.popularity = list(weights / weights.sum())
+        self.common = common
+
+    def answer(self) -> tuple:
+        """(scope, answer text, index of the typical answer it rewords or -1)."""
+        scope = self.rng.choice(self.scopes)
+        if self.rng.random() < self.common:
+            index = self.rng.choices(range(len(self.popularity)), self.popularity)[0]
+            return scope, reword(self.typical[scope][index], self.rng), index
+        return scope, reword(random_answer(self.topics[scope], self.vocab, self.rng), self.rng), -1
+
+
+def transcripts(workload: Workload, count: int, answers: int, thresholds: list):
+    scope = workload.scopes[0]
+    typical = workload.typical[scope]
+    rng = workload.rng
+    stored = [[rng.randrange(len(typical)) for _ in range(answers)] for _ in range(count)]
+    per_answer = SemanticCache("bench-transcripts", bucket_size=count)
+    joined = SemanticCache("bench-joined", bucket_size=count)
+    for index, picks in enumerate(stored):
+        texts = [reword(typical[pick], rng) for pick in picks]
+        per_answer.add(scope, texts, index)
+        joined.add(scope, ("\n".join(texts),), index)
+
+    same, changed = [], []
+    for index, picks in enumerate(stored):
+        texts = [reword(typical[pick], rng) for pick in picks]
+        same.append((index, texts))
+        texts = list(texts)
+        texts[rng.randrange(answers)] = reword(random_answer(workload.topics[scope], workload.vocab, rng), rng)
+        changed.append((index, texts))
+
+    for threshold in thresholds:
+        for name, cache, as_key in (("per answer", per_answer, lambda texts: texts),
+                                    ("joined", joined, lambda texts: ("\n".join(texts),))):
+            cache.threshold = threshold
+            hits = sum(cache.lookup(scope, as_key(texts)) == index for index, texts in same)
+            false_hits = sum(cache.lookup(scope, as_key(texts)) is not None for _, texts in changed)
+            print(f"transcripts of {answers}, {name:<10} | threshold {threshold:.2f} | reworded hit {hits / count * 100:5.1f}% | "
+                  f"one answer changed, false hits {false_hits / count * 100:5.1f}%")
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=1_000_000)
+    parser.add_argument("--scopes", type=int, default=500)
+    parser.add_argument("--canonical", type=int, default=40)
+    parser.add_argument("--common", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.85, 0.9, 0.95])
+    parser.add_argument("--transcripts", type=int, default=1000)
+    parser.add_argument("--transcript-answers", type=int, default=8)
+    args = parser.parse_args()
+
+    workload = Workload(args.scopes, args.canonical, args.common)
+    cache = SemanticCache("bench", max_entries=args.pairs, bucket_size=args.pairs)
+    gc.collect()
+    before_mb = rss_mb()
+    start = time.perf_counter()
+    for _ in range(args.pairs):
+        scope, text, index = workload.answer()
+        cache.add(scope, (text,), index)
+    fill_sec = time.perf_counter() - start
+    stats = cache.stats()
+    print(f"filled {stats['entries']} pairs over {stats['scopes']} questions in {fill_sec:.0f}s "
+          f"({fill_sec / args.pairs * 1e6:.0f} us/add) | vectors {stats['vector_bytes'] / 2**20:.0f} MiB | "
+          f"process RSS +{rss_mb() - before_mb:.0f} MiB")
+
+    queries = [workload.answer() for _ in range(args.queries)]
+    for threshold in args.thresholds:
+        cache.threshold = threshold
+        hits = false_hits = 0
+        latencies = []
+        for scope, text, index in queries:
+            lookup_start = time.perf_counter()
+            found = cache.lookup(scope, (text,))
+            latencies.append(time.perf_counter() - lookup_start)
+            if found is not None:
+                hits += 1
+                false_hits += found != index or index == -1
+        print(f"threshold {threshold:.2f} | hit rate {hits / len(queries) * 100:5.1f}% | "
+              f"false hits {false_hits / max(hits, 1) * 100:5.2f}% of hits | "
+              f"lookup p50 {percentile(latencies, 50) * 1e6:6.0f} us | p99 {percentile(latencies, 99) * 1e6:6.0f} us")
+
+    transcripts(workload, args.transcripts, args.transcript_answers, args.thresholds)
+
+
+if __name__ == "__main__":
+    main()
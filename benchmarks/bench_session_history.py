@@ -0,0 +1,230 @@
+"""
+Session history storage: one growing history array vs. per-turn records, for long sessions.
+
+    python -m benchmarks.bench_session_history --turns 200 --answer-chars 1500
+
+Plays --turns turns of one session through each layout, the way
+SessionManager.record_turn writes them, then reads the session back.
+  legacy     the previous layout: Firestore keeps a `history` array on the
+             session document (the open question, then the question again
+             with its answer, via ArrayUnion); SQLite rewrites the session's
+             JSON row every turn
+  per-turn   session_store as it is now: Firestore `turns` segments with the
+             answer merged into its turn; SQLite one row per turn
+Reported: bytes stored for the session, bytes sent per turn, turns that fit
+Firestore's 1 MiB document limit, write latency of the last turns, a full
+load, and a tail read of the last --tail turns from a known turn index.
+Firestore is benchmarks.fake_firestore with --firestore-ms round trips and
+--mbps of bandwidth (sizes follow Firestore's storage-size rules).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from src.session_store import FirestoreBackend, SQLiteBackend, Turn
+from benchmarks.fake_firestore import FakeFirestore, MAX_DOCUMENT_BYTES, document_size
+from benchmarks.load_test import percentile
+from benchmarks.bench_context_window import ANSWER
+
+SESSION_ID = "session-long"
+
+
+def answer_text(turn: int, chars: int) -> str:
+    text = f"(turn {turn}) " + ANSWER
+    while len(text) < chars:
+        text += " " + ANSWER
+    return text[:chars]
+
+
+def question_text(turn: int) -> str:
+    return f"Question {turn + 1}: how would you change the design if the write volume grew ten times?"
+
+
+def stored_bytes(db: FakeFirestore) -> int:
+    return sum(document_size(path, data) for path, data in db.documents.items())
+
+
+class LegacyFirestore:
+    """The previous FirestoreBackend history calls."""
+
+    def __init__(self, db: FakeFirestore):
+        from firebase_admin import firestore
+        self.db = db
+        self.firestore = firestore
+
+    def _ref(self):
+        return self.db.collection('interview_sessions').document(SESSION_ID)
+
+    async def create(self, first_question: str):
+        await self._ref().set({'user_id': "guest", 'role': "Backend Engineer", 'status': 'active',
+                               'history': [{'Q': first_question, 'A': ''}]})
+
+    async def record_turn(self, turn: int, question: str, answer: str, next_question: str):
+        entries = [{'Q': question, 'A': answer}, {'Q': next_question, 'A': ''}]
+        await self._ref().update({'history': self.firestore.ArrayUnion(entries)})
+
+    async def load(self):
+        return (await self._ref().get()).to_dict()['history']
+
+    async def load_tail(self, start: int):
+        # No cursor into an array field: the whole document comes back and is sliced here.
+        history = await self.load()
+        return history[2 * start:]
+
+
+class PerTurnFirestore:
+    def __init__(self, db: FakeFirestore):
+        self.backend = FirestoreBackend(db)
+
+    async def create(self, first_question: str):
+        await self.backend.create(SESSION_ID, {'user_id': "guest", 'role': "Backend Engineer", 'status': 'active',
+                                               'history': [Turn(0, first_question)]})
+
+    async def record_turn(self, turn: int, question: str, answer: str, next_question: str):
+        await self.backend.save_turns(SESSION_ID, [Turn(turn, question, answer), Turn(turn + 1, next_question)])
+
+    async def load(self):
+        return (await self.backend.load(SESSION_ID))['history']
+
+    async def load_tail(self, start: int):
+        return await self.backend.load_turns(SESSION_ID, start)
+
+
+class LegacySQLite:
+    """The previous SQLiteBackend: the session, history included, is one JSON row."""
+
+    def __init__(self, path: str):
+        import sqlite3
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE interview_sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def _write(self, session):
+        self.conn.execute("INSERT OR REPLACE INTO interview_sessions (session_id, data) VALUES (?, ?)",
+                          (SESSION_ID, json.dumps(session)))
+        self.conn.commit()
+
+    def _read(self):
+        row = self.conn.execute("SELECT data FROM interview_sessions WHERE session_id = ?", (SESSION_ID,)).fetchone()
+        return json.loads(row[0])
+
+    async def create(self, first_question: str):
+        self._write({'user_id': "guest", 'role': "Backend Engineer", 'status': 'active',
+                     'history': [{'Q': first_question, 'A': ''}]})
+
+    async def record_turn(self, turn: int, question: str, answer: str, next_question: str):
+        session = self._read()
+        session['history'].extend([{'Q': question, 'A': answer}, {'Q': next_question, 'A': ''}])
+        self._write(session)
+
+    async def load(self):
+        return self._read()['history']
+
+    async def load_tail(self, start: int):
+        return self._read()['history'][2 * start:]
+
+
+class PerTurnSQLite:
+    def __init__(self, path: str):
+        self.backend = SQLiteBackend(path)
+
+    async def create(self, first_question: str):
+        self.backend._create(SESSION_ID, {'user_id': "guest", 'role': "Backend Engineer", 'status': 'active',
+                                          'history': [Turn(0, first_question)]})
+
+    async def record_turn(self, turn: int, question: str, answer: str, next_question: str):
+        # Called directly: the thread hop of the async wrappers is the same for both layouts
+        self.backend._save_turns(SESSION_ID, [Turn(turn, question, answer), Turn(turn + 1, next_question)])
+
+    async def load(self):
+        return self.backend._load(SESSION_ID)['history']
+
+    async def load_tail(self, start: int):
+        return self.backend._load_turns(SESSION_ID, start)
+
+
+async def play(store, turns: int, answer_chars: int, tail: int, size) -> dict:
+    """Writes the session turn by turn, then reads it back; `size()` is the bytes stored so far."""
+    await store.create(question_text(0))
+    write_latencies = []
+    fits = turns
+    for turn in range(turns):
+        start = time.perf_counter()
+        try:
+            await store.record_turn(turn, question_text(turn), answer_text(turn, answer_chars), question_text(turn + 1))
+        except AssertionError:   # fake_firestore refuses documents over 1 MiB, as Firestore does
+            fits = turn
+            break
+        write_latencies.append(time.perf_counter() - start)
+    recorded = len(write_latencies)
+
+    start = time.perf_counter()
+    history = await store.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    latest = await store.load_tail(max(recorded - tail, 0))
+    tail_ms = (time.perf_counter() - start) * 1000
+    assert len(latest) >= tail, "the tail read should return the last turns"
+    return {
+        "recorded": recorded,
+        "fits": fits,
+        "entries": len(history),
+        "stored": size(),
+        "write_ms": percentile(write_latencies[-20:], 50) * 1000,
+        "load_ms": load_ms,
+        "tail_ms": tail_ms,
+    }
+
+
+def report(name: str, result: dict, limit: str, extra: str = ""):
+    print(f"{name:<20} | {result['recorded']:4d} turns ({result['entries']:4d} entries) | "
+          f"stored {result['stored'] / 1024:8.1f} KiB | 1 MiB limit {limit:>13} | "
+          f"last writes p50 {result['write_ms']:6.2f} ms | full load {result['load_ms']:7.2f} ms | "
+          f"tail read {result['tail_ms']:6.2f} ms{extra}")
+
+
+async def firestore(args):
+    for name, layout in (("firestore legacy", LegacyFirestore), ("firestore per-turn", PerTurnFirestore)):
+        db = FakeFirestore(latency_ms=args.firestore_ms, jitter_ms=0, bandwidth_mbps=args.mbps)
+        result = await play(layout(db), args.turns, args.answer_chars, args.tail, lambda: stored_bytes(db))
+        sent = db.bytes_written / max(result["recorded"], 1)
+        largest = max(document_size(path, data) for path, data in db.documents.items())
+        if result["fits"] < args.turns:
+            limit = f"at turn {result['fits']}"
+        else:
+            limit = f"~{MAX_DOCUMENT_BYTES // (largest // max(result['recorded'], 1)):,} turns" if layout is LegacyFirestore else "none"
+        report(name, result, limit, f" | sent/turn {sent / 1024:5.1f} KiB | largest doc {largest / 1024:7.1f} KiB")
+
+
+async def sqlite(args):
+    for name, layout in (("sqlite legacy", LegacySQLite), ("sqlite per-turn", PerTurnSQLite)):
+        path = os.path.join(tempfile.mkdtemp(prefix="history-"), "sessions.db")
+        store = layout(path)
+        conn = store.conn if isinstance(store, LegacySQLite) else store.backend.conn
+
+        def size():
+            pages, page_size = conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA page_size").fetchone()[0]
+            return pages * page_size
+
+        result = await play(store, args.turns, args.answer_chars, args.tail, size)
+        report(name, result, "n/a")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--answer-chars", type=int, default=1500)
+    parser.add_argument("--tail", type=int, default=10)
+    parser.add_argument("--firestore-ms", type=float, default=20)
+    parser.add_argument("--mbps", type=float, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns, {args.answer_chars}-char answers; tail read = last {args.tail} turns", file=sys.stderr)
+    asyncio.run(firestore(args))
+    asyncio.run(sqlite(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Multi-worker session state: per-worker caches vs. no cache vs. sharded ownership.
+
+    python -m benchmarks.bench_session_shards --workers 1 2 4 8 --sessions 200 --turns 10
+
+Runs N "workers" in one process, each with its own SessionManager and cache
+over one shared backend (MemoryBackend plus --backend-ms per call, standing
+in for Firestore). Every turn is sent to a random worker, like the kernel
+spreading connections over `uvicorn --workers N`. It reads the history,
+checks that the previous turn is there (a stale read otherwise) and records
+the next turn. Modes:
+  per-worker cache  today's SessionManager in each worker (write-behind on)
+  no cache          every turn reads and writes the backend inline
+  sharded           session_shards.ShardedSessionManager: real slot locks and
+                    Unix-socket forwarding; one worker is restarted halfway
+"""
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from src.database import SessionManager
+from src.session_store import MemoryBackend, SessionCache
+from src.session_shards import ShardedSessionManager, ShardMembership
+from benchmarks.load_test import percentile
+
+
+class SlowBackend(MemoryBackend):
+    def __init__(self, latency_ms: float):
+        super().__init__()
+        self.latency = latency_ms / 1000
+        self.reads = 0
+
+    async def load(self, session_id):
+        self.reads += 1
+        await asyncio.sleep(self.latency)
+        return await super().load(session_id)
+
+    async def save_turns(self, session_id, turns):
+        await asyncio.sleep(self.latency)
+        await super().save_turns(session_id, turns)
+
+    async def create(self, session_id, session):
+        await asyncio.sleep(self.latency)
+        await super().create(session_id, session)
+
+
+async def run(mode: str, workers: int, sessions: int, turns: int, concurrency: int, backend_ms: float,
+              restart_midway: bool = True) -> dict:
+    backend = SlowBackend(backend_ms)
+    shard_dir = tempfile.mkdtemp(prefix="shards-")
+
+    async def make_worker():
+        if mode == "no cache":
+            return SessionManager(backend, SessionCache(ttl_sec=-1), write_behind=False)
+        manager = SessionManager(backend)
+        if mode == "sharded":
+            manager = ShardedSessionManager(manager, ShardMembership(shard_dir))
+            await manager.start()
+        return manager
+
+    pool = [await make_worker() for _ in range(workers)]
+    stale, latencies = 0, []
+    done_turns = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def restart(index: int):
+        # Like uvicorn, a worker that is shutting down gets no new requests.
+        old = pool.pop(index)
+        await old.close()
+        pool.insert(index, await make_worker())
+
+    async def interview(session_id: str):
+        nonlocal stale, done_turns
+        async with slots:
+            await random.choice(pool).start_session(session_id, "Backend Engineer", first_question="Q0")
+            for turn in range(1, turns + 1):
+                start = time.perf_counter()
+                manager = random.choice(pool)
+                history = await manager.get_history(session_id)
+                if not history or history[-1]['Q'] != f"Q{turn - 1}":
+                    stale += 1
+                await manager.record_turn(session_id, answered={'Q': f"Q{turn - 1}", 'A': "answer"},
+                                          next_question=f"Q{turn}")
+                latencies.append(time.perf_counter() - start)
+                done_turns += 1
+                if mode == "sharded" and restart_midway and workers > 1 and done_turns == sessions * turns // 2:
+                    asyncio.create_task(restart(0))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(interview(f"session-{i}") for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    for manager in pool:
+        await manager.close()
+    return {
+        "stale": stale,
+        "reads_per_turn": backend.reads / (sessions * turns),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "turns_per_sec": sessions * turns / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--backend-ms", type=float, default=8)
+    parser.add_argument("--no-restart", action="store_true", help="Keep every sharded worker up for the whole run.")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        for mode in ("per-worker cache", "no cache", "sharded"):
+            random.seed(workers)
+            result = asyncio.run(run(mode, workers, args.sessions, args.turns, args.concurrency, args.backend_ms,
+                                     not args.no_restart))
+            print(f"{workers} workers | {mode:<16} | stale reads {result['stale']:5d} | "
+                  f"backend reads/turn {result['reads_per_turn']:.2f} | turn p50 {result['p50_ms']:6.2f} ms | "
+                  f"p99 {result['p99_ms']:6.2f} ms | {result['turns_per_sec']:7.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
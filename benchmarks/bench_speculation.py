@@ -0,0 +1,77 @@
+"""
+Perceived turn latency with and without next-question speculation.
+
+    python -m benchmarks.bench_speculation --turns 20 --stt-ms 600 --llm-ms 700
+
+Turn latency is measured from the moment the candidate stops speaking to the
+moment the next question is back: final transcription plus generate_question.
+With speculation the partial transcript (here the first --partial share of the
+answer, --tail-ms before the end of speech) starts the next question early, as
+the streaming transcription WebSocket does.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import httpx
+
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+from src import speculation  # noqa: E402
+from src.main import app  # noqa: E402
+from src.speculation import question_prefetcher  # noqa: E402
+from src.clients import registry  # noqa: E402
+from benchmarks.fakes import FakeGeminiClient, RoutedFakeClient  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+
+ANSWER = ("I would start by looking at the query plan, check whether the filter columns are indexed, "
+          "add a composite index that matches the range predicate, and then confirm with explain analyze "
+          "that the planner actually uses it before touching the application code.")
+AUDIO_URI = "data:audio/wav;base64,AAAA"
+
+
+async def run(turns: int, enabled: bool, partial: float, tail_ms: float) -> list:
+    speculation.SPECULATION_ENABLED = enabled
+    session_id = f"spec-{enabled}"
+    body = {"session_id": session_id, "role": "Backend Engineer", "difficulty": "medium"}
+    words = ANSWER.split()
+    partial_text = " ".join(words[:int(len(words) * partial)])
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.post("/interview/generate_question", json=body)
+        for _ in range(turns):
+            # Candidate is still speaking: the streaming STT has published a partial transcript.
+            await question_prefetcher.speculate(session_id, partial_text)
+            await asyncio.sleep(tail_ms / 1000)
+
+            start = time.perf_counter()
+            heard = await client.post("/interview/transcribe", json={"session_id": session_id, "audio_data_uri": AUDIO_URI})
+            await client.post("/interview/generate_question", json={**body, "user_answer": heard.json()["transcript"]})
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--stt-ms", type=float, default=600)
+    parser.add_argument("--llm-ms", type=float, default=700)
+    parser.add_argument("--partial", type=float, default=0.8, help="Share of the answer in the partial transcript.")
+    parser.add_argument("--tail-ms", type=float, default=1500, help="Speech after the partial transcript.")
+    args = parser.parse_args()
+
+    stt = FakeGeminiClient(first_token_ms=args.stt_ms, token_ms=0, text=json.dumps({"transcript": ANSWER}))
+    registry.override("gemini", RoutedFakeClient({"gemini-2.5-flash": stt}, FakeGeminiClient(first_token_ms=args.llm_ms, token_ms=0)))
+
+    for enabled in (False, True):
+        latencies = asyncio.run(run(args.turns, enabled, args.partial, args.tail_ms))
+        print(f"speculation {'on ' if enabled else 'off'}: turn p50 {percentile(latencies, 50) * 1000:.0f} ms | "
+              f"p95 {percentile(latencies, 95) * 1000:.0f} ms")
+    hits = {labels[0]: int(value) for labels, value in speculation.SPECULATIONS._values.items()}
+    print(f"speculation outcomes: {hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Startup cost: `import src.main` (python -X importtime) and time until /health answers.
+
+    python -m benchmarks.bench_startup --budget-ms 1500
+
+Exits with status 1 when importing the app takes longer than the budget
+(median of --repeats runs), so it can gate CI; benchmarks.suite runs the
+same check before its scenarios. Also starts the API under
+uvicorn and reports when /health first answers and when the background
+warm-up (SDK imports, client construction) has finished.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+from collections import defaultdict
+import httpx
+from benchmarks.load_test import _spawn
+
+PORT = 8771
+STARTUP_BUDGET_MS = 1500
+
+
+def import_profile() -> tuple:
+    """(total ms, {top-level package: cumulative ms}) for one fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.main"],
+                            capture_output=True, text=True, check=True)
+    total = 0.0
+    packages = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if name == "src.main":
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            packages[name.split(".")[0]] += int(cumulative) / 1000
+    return total, packages
+
+
+def time_to_health(timeout: float = 60.0) -> tuple:
+    env = {**os.environ, "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "bench"), "SESSION_BACKEND": "memory",
+           "LLM_PROVIDERS": "gemini"}
+    start = time.perf_counter()
+    server = _spawn(["src.main:app", "--port", str(PORT)], env)
+    healthy = warm = None
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - start < timeout and warm is None:
+                try:
+                    body = client.get(f"http://127.0.0.1:{PORT}/health").json()
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                healthy = healthy or time.perf_counter() - start
+                if body.get("warm"):
+                    warm = time.perf_counter() - start
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    return healthy, warm
+
+
+def measure(repeats: int = 5) -> dict:
+    """Median import time, heaviest imports and time to /health, as stored by benchmarks.suite."""
+    runs = [import_profile() for _ in range(repeats)]
+    heaviest = sorted(runs[-1][1].items(), key=lambda item: -item[1])[:8]
+    healthy, warm = time_to_health()
+    as_ms = lambda seconds: None if seconds is None else round(seconds * 1000, 1)
+    return {
+        "import_ms": round(statistics.median(t for t, _ in runs), 1),
+        "heaviest_imports_ms": {name: round(ms, 1) for name, ms in heaviest},
+        "first_health_ms": as_ms(healthy),
+        "warm_ms": as_ms(warm),
+    }
+
+
+def report(result: dict, budget_ms: float) -> bool:
+    """Prints the measurement; False when the import time is over budget."""
+    print(f"import src.main: median {result['import_ms']:.0f} ms (budget {budget_ms:.0f} ms)")
+    print("  heaviest imports: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["heaviest_imports_ms"].items()))
+    as_text = lambda ms: "n/a" if ms is None else f"{ms:.0f} ms"
+    print(f"uvicorn start -> first /health {as_text(result['first_health_ms'])} | warm-up done {as_text(result['warm_ms'])}")
+    if result["import_ms"] > budget_ms:
+        print("FAIL: import time over budget")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    if not report(measure(args.repeats), args.budget_ms):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time-to-first-token for /generate_question vs /generate_question/stream.
+
+    python -m benchmarks.bench_stream_ttft --first-token-ms 400 --token-ms 40
+
+Uses the in-memory session backend and a stub streaming model, so no credentials are needed.
+"""
+import os
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+import httpx
+import uvicorn
+from src.clients import registry
+from src.main import app
+from benchmarks.fakes import FakeGeminiClient
+from benchmarks.load_test import percentile
+
+PORT = 8767
+
+
+async def time_blocking(client: httpx.AsyncClient, session_id: str) -> float:
+    start = time.perf_counter()
+    response = await client.post("/interview/generate_question", json={"session_id": session_id, "role": "Backend Engineer"})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def time_streaming(client: httpx.AsyncClient, session_id: str) -> float:
+    start = time.perf_counter()
+    payload = {"session_id": session_id, "role": "Backend Engineer"}
+    first_token = None
+    async with client.stream("POST", "/interview/generate_question/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            if first_token is None and line == "event: token":
+                first_token = time.perf_counter() - start
+    return first_token
+
+
+async def run(rounds: int):
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=60) as client:
+        blocking = [await time_blocking(client, f"ttft-b-{i}") for i in range(rounds)]
+        streaming = [await time_streaming(client, f"ttft-s-{i}") for i in range(rounds)]
+
+    server.should_exit = True
+    await serve_task
+
+    for name, samples in (("generate_question", blocking), ("generate_question/stream", streaming)):
+        print(f"{name:<26} first token p50 {percentile(samples, 50) * 1000:7.1f} ms | p99 {percentile(samples, 99) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    registry.override("gemini", FakeGeminiClient(first_token_ms=args.first_token_ms, token_ms=args.token_ms))
+    asyncio.run(run(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Peak server RSS and latency for /transcribe (Base64 JSON) vs /transcribe/upload (raw body).
+
+    python -m benchmarks.bench_upload --sizes 1 5 20
+
+Each (path, size) pair runs in a fresh server process with a stub STT model,
+so the reported peak RSS growth belongs to that one request.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import subprocess
+import httpx
+
+PORT = 8768
+FAKE_TRANSCRIPT = json.dumps({"transcript": "I would add an index.", "speechRateWpm": 140.0, "fillerRate": 0.0})
+
+
+def serve(port: int):
+    """Runs the API with a stub STT client (child process entry point)."""
+    import uvicorn
+    from src.clients import registry
+    from src.main import app
+    from benchmarks.fakes import FakeGeminiClient
+
+    registry.override("gemini", FakeGeminiClient(first_token_ms=0, token_ms=0, text=FAKE_TRANSCRIPT))
+    uvicorn.run(app, port=port, log_level="warning")
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def measure(path: str, size_mb: int) -> dict:
+    audio = os.urandom(size_mb * 1024 * 1024)
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_upload", "--serve"])
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=120) as client:
+            while True:
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            rss_before = peak_rss_mb(server.pid)
+
+            if path == "json":
+                payload = {"session_id": "bench", "audio_data_uri": "data:audio/webm;base64," + base64.b64encode(audio).decode()}
+                start = time.perf_counter()
+                response = await client.post("/interview/transcribe", json=payload)
+            else:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/interview/transcribe/upload",
+                    params={"session_id": "bench"},
+                    content=audio,
+                    headers={"Content-Type": "audio/webm"}
+                )
+            latency = time.perf_counter() - start
+            response.raise_for_status()
+            rss_growth = peak_rss_mb(server.pid) - rss_before
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {"path": path, "size_mb": size_mb, "latency_ms": latency * 1000, "peak_rss_growth_mb": rss_growth}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(PORT)
+        return
+
+    for size_mb in args.sizes:
+        for path in ("json", "upload"):
+            result = asyncio.run(measure(path, size_mb))
+            print(f"{result['path']:<7} {size_mb:>3} MB | latency {result['latency_ms']:8.1f} ms | "
+                  f"peak RSS +{result['peak_rss_growth_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
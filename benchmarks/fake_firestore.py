@@ -0,0 +1,226 @@
+"""
+In-memory stand-in for the async Firestore client (`firestore_async.client()`).
+
+Covers what FirestoreBackend uses: collection().document() with set (and
+merge) / get / update, subcollections, ArrayUnion and SERVER_TIMESTAMP,
+equality queries ordered by document ID with start_at / start_after cursors,
+streamed page by page, and batched writes. Every call (each query page, each
+batch commit) sleeps for a configurable round trip so the session store is
+benchmarked against realistic I/O. Bytes read and written are counted with
+Firestore's storage-size rules; with a bandwidth set, transferring them adds
+to the round trip.
+"""
+import os
+import copy
+import time
+import random
+import asyncio
+from typing import Any, Dict, Optional
+from google.cloud.firestore_v1.transforms import ArrayUnion, Sentinel
+
+LATENCY_MS = float(os.getenv("FAKE_FIRESTORE_LATENCY_MS", "20"))
+JITTER_MS = float(os.getenv("FAKE_FIRESTORE_JITTER_MS", "5"))
+BANDWIDTH_MBPS = float(os.getenv("FAKE_FIRESTORE_MBPS", "0"))   # 0: transfer time not modelled
+MAX_DOCUMENT_BYTES = 1_048_576 - 4   # Firestore's per-document limit
+
+
+def value_size(value) -> int:
+    """Storage size of a field value (https://firebase.google.com/docs/firestore/storage-size)."""
+    if isinstance(value, str):
+        return len(value.encode()) + 1
+    if isinstance(value, dict):
+        return sum(len(key.encode()) + 1 + value_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    if isinstance(value, bool) or value is None:
+        return 1
+    return 8
+
+
+def document_size(path: str, data: Dict[str, Any]) -> int:
+    return sum(len(part.encode()) + 1 for part in path.split("/")) + 16 + value_size(data) + 32
+
+
+class FakeSnapshot:
+    def __init__(self, data: Optional[Dict[str, Any]], document_id: str = ""):
+        self._data = data
+        self.id = document_id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocument:
+    def __init__(self, db: "FakeFirestore", path: str):
+        self.db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self.db, f"{self.path}/{name}")
+
+    async def set(self, data: Dict[str, Any], merge: bool = False):
+        await self.db.round_trip(self.db.write(self.path, data, "merge" if merge else "set"))
+
+    async def get(self) -> FakeSnapshot:
+        data = self.db.documents.get(self.path)
+        await self.db.round_trip(self.db.read(self.path, data))
+        return FakeSnapshot(data, self.id)
+
+    async def update(self, data: Dict[str, Any]):
+        if self.path not in self.db.documents:
+            await self.db.round_trip()
+            raise KeyError(f"No document to update: {self.path}")
+        await self.db.round_trip(self.db.write(self.path, data, "update"))
+
+
+class FakeQuery:
+    """where(filter=FieldFilter(field, '==', value)).order_by('__name__').start_at/start_after(...).limit(n).stream()"""
+
+    def __init__(self, collection: "FakeCollection", filters=(), start: Optional[str] = None, inclusive: bool = False,
+                 limit: Optional[int] = None):
+        self.collection = collection
+        self.filters = filters
+        self.start = start
+        self.inclusive = inclusive
+        self.max_results = limit
+
+    def _with(self, **changes) -> "FakeQuery":
+        fields = {"filters": self.filters, "start": self.start, "inclusive": self.inclusive, "limit": self.max_results}
+        fields.update(changes)
+        return FakeQuery(self.collection, **fields)
+
+    def where(self, filter) -> "FakeQuery":
+        assert filter.op_string == "==", "the fake only supports equality filters"
+        return self._with(filters=self.filters + ((filter.field_path, filter.value),))
+
+    def order_by(self, field: str) -> "FakeQuery":
+        assert field == "__name__", "the fake only orders by document ID"
+        return self
+
+    def start_at(self, cursor: Dict[str, str]) -> "FakeQuery":
+        return self._with(start=cursor["__name__"], inclusive=True)
+
+    def start_after(self, cursor: Dict[str, str]) -> "FakeQuery":
+        return self._with(start=cursor["__name__"], inclusive=False)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._with(limit=count)
+
+    async def stream(self):
+        prefix = f"{self.collection.name}/"
+        matches, size = [], 0
+        for path in sorted(self.collection.db.documents):
+            document_id = path[len(prefix):]
+            if not path.startswith(prefix) or "/" in document_id:
+                continue   # another collection, or a subcollection below this one
+            if self.start is not None and (document_id < self.start or (document_id == self.start and not self.inclusive)):
+                continue
+            document = self.collection.db.documents[path]
+            if all(document.get(field) == value for field, value in self.filters):
+                matches.append(FakeSnapshot(copy.deepcopy(document), document_id))
+                size += self.collection.db.read(path, document)
+                if self.max_results is not None and len(matches) == self.max_results:
+                    break
+        await self.collection.db.round_trip(size)
+        for snapshot in matches:
+            yield snapshot
+
+
+class FakeCollection:
+    def __init__(self, db: "FakeFirestore", name: str):
+        self.db = db
+        self.name = name
+
+    def document(self, document_id: str) -> FakeDocument:
+        return FakeDocument(self.db, f"{self.name}/{document_id}")
+
+    def where(self, filter) -> FakeQuery:
+        return FakeQuery(self).where(filter=filter)
+
+    def order_by(self, field: str) -> FakeQuery:
+        return FakeQuery(self).order_by(field)
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self.db = db
+        self.writes = []
+
+    def set(self, document: FakeDocument, data: Dict[str, Any], merge: bool = False):
+        self.writes.append((document.path, data, "merge" if merge else "set"))
+
+    def update(self, document: FakeDocument, data: Dict[str, Any]):
+        self.writes.append((document.path, data, "update"))
+
+    async def commit(self):
+        assert len(self.writes) <= 500, "Firestore batches hold at most 500 writes"
+        for path, _, mode in self.writes:
+            if mode == "update" and path not in self.db.documents:
+                raise KeyError(f"No document to update: {path}")
+        await self.db.round_trip(sum(self.db.write(path, data, mode) for path, data, mode in self.writes))
+
+
+class FakeFirestore:
+    """Process-local document store with simulated round-trip latency; counts calls and bytes."""
+
+    def __init__(self, latency_ms: float = LATENCY_MS, jitter_ms: float = JITTER_MS, bandwidth_mbps: float = BANDWIDTH_MBPS):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.calls = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    async def round_trip(self, size: int = 0):
+        self.calls += 1
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if self.bandwidth_mbps:
+            delay += size * 8 / (self.bandwidth_mbps * 1000)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+    def read(self, path: str, data: Optional[Dict[str, Any]]) -> int:
+        size = document_size(path, data) if data is not None else 0
+        self.bytes_read += size
+        return size
+
+    def write(self, path: str, data: Dict[str, Any], mode: str) -> int:
+        """Applies a set, set(merge=True) ("merge") or update to the stored document; returns the bytes sent."""
+        document = dict(self.documents.get(path) or {}) if mode != "set" else {}
+        for key, value in data.items():
+            if mode == "merge" and isinstance(value, dict) and isinstance(document.get(key), dict):
+                document[key] = {**document[key], **copy.deepcopy(value)}   # set(merge=True) merges nested maps
+            else:
+                document[key] = self.resolve(value, document.get(key))
+        assert document_size(path, document) <= MAX_DOCUMENT_BYTES, f"{path} exceeds Firestore's 1 MiB document limit"
+        self.documents[path] = document
+        sent = document_size(path, {key: value for key, value in data.items() if not isinstance(value, (Sentinel, ArrayUnion))})
+        if any(isinstance(value, ArrayUnion) for value in data.values()):
+            sent += sum(value_size(list(value.values)) for value in data.values() if isinstance(value, ArrayUnion))
+        self.bytes_written += sent
+        return sent
+
+    @staticmethod
+    def resolve(value, current):
+        """Applies Firestore transforms the way the server would."""
+        if isinstance(value, ArrayUnion):
+            merged = list(current or [])
+            merged.extend(copy.deepcopy(v) for v in value.values if v not in merged)
+            return merged
+        if isinstance(value, Sentinel):
+            return time.time()
+        return copy.deepcopy(value)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def close(self):
+        pass
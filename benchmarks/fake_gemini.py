@@ -0,0 +1,94 @@
+"""
+Local stand-in for the Gemini REST API used by the benchmarks.
+
+Run with: uvicorn benchmarks.fake_gemini:app --port 8765
+and point the backend at it with GEMINI_BASE_URL=http://127.0.0.1:8765
+
+Explicit context caches (cachedContents) are kept in memory; a call that
+references one reports the cached tokens as cachedContentTokenCount.
+"""
+import os
+import json
+import random
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("FAKE_GEMINI_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("FAKE_GEMINI_JITTER_MS", "0"))
+ERROR_RATE = float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0"))  # fraction of calls answered with a 503
+
+app = FastAPI(title="Fake Gemini")
+
+FAKE_QUESTION = "How would you design an index for a table with frequent range scans?"
+FAKE_TRANSCRIPT = {"transcript": "I would use a B-tree index on the range column.", "speechRateWpm": 140.0, "fillerRate": 0.02}
+FAKE_REPORT = {
+    "technical_score": 72,
+    "clarity_score": 80,
+    "fluency_score": 75,
+    "detailed_feedback": "Solid fundamentals with minor gaps.",
+    "technical_strengths": ["Indexing"],
+    "technical_weaknesses": ["Query planning"],
+    "improvement_plan": ["Practice EXPLAIN output"],
+    "learning_resources": ["Use The Index, Luke"],
+    "final_verdict": "Hire"
+}
+
+
+_questions_served = 0
+_cached_tokens = {}   # cache name -> tokens in its system instruction
+
+
+def _reply_text(body: dict) -> str:
+    global _questions_served
+    config = body.get("generationConfig") or {}
+    if config.get("responseMimeType") != "application/json":
+        # Distinct questions, as a real model would give; identical turns would collapse in ArrayUnion.
+        _questions_served += 1
+        return f"{FAKE_QUESTION} (variant {_questions_served})"
+    if "transcript" in json.dumps(config.get("responseSchema") or {}):
+        return json.dumps(FAKE_TRANSCRIPT)
+    return json.dumps(FAKE_REPORT)
+
+
+async def _simulated_latency():
+    delay = LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)
+    await asyncio.sleep(max(delay, 0) / 1000)
+
+
+@app.post("/{api_version}/cachedContents")
+async def create_cached_content(api_version: str, request: Request):
+    body = await request.json()
+    name = f"cachedContents/fake-{len(_cached_tokens) + 1}"
+    _cached_tokens[name] = len(json.dumps(body.get("systemInstruction") or {})) // 4
+    return {"name": name, "model": body.get("model"), "usageMetadata": {"totalTokenCount": _cached_tokens[name]}}
+
+
+@app.post("/{api_version}/models/{model_action}")
+async def generate_content(api_version: str, model_action: str, request: Request):
+    body = await request.json()
+    await _simulated_latency()
+    cached = 0
+    if body.get("cachedContent"):
+        if body["cachedContent"] not in _cached_tokens:
+            return JSONResponse({"error": {"code": 404, "message": "CachedContent not found.", "status": "NOT_FOUND"}},
+                                status_code=404)
+        cached = _cached_tokens[body["cachedContent"]]
+    if random.random() < ERROR_RATE:
+        return JSONResponse(
+            {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+            status_code=503
+        )
+    text = _reply_text(body)
+    return JSONResponse({
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP"
+        }],
+        "usageMetadata": {
+            "promptTokenCount": len(json.dumps(body)) // 4 + cached,
+            "cachedContentTokenCount": cached,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": (len(json.dumps(body)) + len(text)) // 4 + cached
+        }
+    })
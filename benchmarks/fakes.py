@@ -0,0 +1,51 @@
+"""In-process stand-ins for the Gemini client, installed with `clients.registry.override("gemini", ...)`."""
+import asyncio
+from types import SimpleNamespace
+
+FAKE_QUESTION = "How would you design an index for a table with frequent range scans?"
+
+
+class _FakeModels:
+    def __init__(self, first_token_ms: float, token_ms: float, text: str):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.tokens = text.split(" ")
+
+    async def generate_content(self, *, model, contents, config):
+        total_ms = self.first_token_ms + self.token_ms * (len(self.tokens) - 1)
+        await asyncio.sleep(total_ms / 1000)
+        return SimpleNamespace(text=" ".join(self.tokens))
+
+    async def generate_content_stream(self, *, model, contents, config):
+        async def chunks():
+            await asyncio.sleep(self.first_token_ms / 1000)
+            for index, token in enumerate(self.tokens):
+                if index:
+                    await asyncio.sleep(self.token_ms / 1000)
+                yield SimpleNamespace(text=token if index == 0 else " " + token)
+        return chunks()
+
+
+class FakeGeminiClient:
+    """Mimics `client.aio.models` with a fixed first-token delay and per-token pacing."""
+
+    def __init__(self, first_token_ms: float = 400, token_ms: float = 40, text: str = FAKE_QUESTION):
+        self.aio = SimpleNamespace(models=_FakeModels(first_token_ms, token_ms, text))
+
+
+class RoutedFakeClient:
+    """Sends each call to the fake for its model, e.g. one for transcription and one for questions."""
+
+    def __init__(self, by_model: dict, default: FakeGeminiClient):
+        self.by_model = by_model
+        self.default = default
+        self.aio = SimpleNamespace(models=self)
+
+    def _models(self, model):
+        return self.by_model.get(model, self.default).aio.models
+
+    def generate_content(self, *, model, contents, config):
+        return self._models(model).generate_content(model=model, contents=contents, config=config)
+
+    def generate_content_stream(self, *, model, contents, config):
+        return self._models(model).generate_content_stream(model=model, contents=contents, config=config)
@@ -0,0 +1,125 @@
+"""
+Load test for /interview/transcribe against the local fake Gemini server.
+
+    python -m benchmarks.load_test                 # current async path
+    python -m benchmarks.load_test --blocking      # emulate the old sync SDK calls
+
+Prints requests/sec and latency percentiles for the chosen mode.
+"""
+import os
+import sys
+import time
+import base64
+import asyncio
+import argparse
+import subprocess
+import httpx
+
+FAKE_PORT = 8765
+APP_PORT = 8766
+
+
+def blocking_app():
+    """App factory that restores the pre-async behaviour: sync SDK calls on the event loop."""
+    from src import llm_router, stt_service
+    from src.main import app
+
+    async def blocking_generate_content(client, *, model, contents, config, timeout=None):
+        return client.models.generate_content(model=model, contents=contents, config=config)
+
+    llm_router.generate_content = blocking_generate_content
+    stt_service.generate_content = blocking_generate_content
+    return app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _spawn(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args, "--log-level", "warning"],
+        env=env
+    )
+
+
+async def _wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start.")
+
+
+async def drive(total: int, concurrency: int) -> dict:
+    audio = base64.b64encode(b"\x00" * 16000).decode()
+    payload = {"session_id": "load-test", "audio_data_uri": f"data:audio/wav;base64,{audio}"}
+    latencies = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=120) as client:
+        async def one():
+            nonlocal errors
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post("/interview/transcribe", json=payload)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--blocking", action="store_true", help="Emulate the synchronous SDK path.")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({
+        "FAKE_GEMINI_LATENCY_MS": str(args.latency_ms),
+        "GEMINI_API_KEY": "fake-key",
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{FAKE_PORT}",
+    })
+    app_target = ["--factory", "benchmarks.load_test:blocking_app"] if args.blocking else ["src.main:app"]
+
+    fake = _spawn(["benchmarks.fake_gemini:app", "--port", str(FAKE_PORT)], env)
+    server = _spawn([*app_target, "--port", str(APP_PORT)], env)
+    try:
+        asyncio.run(_wait_ready(f"http://127.0.0.1:{FAKE_PORT}/docs"))
+        asyncio.run(_wait_ready(f"http://127.0.0.1:{APP_PORT}/health"))
+        result = asyncio.run(drive(args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+
+    mode = "blocking" if args.blocking else "async"
+    print(f"[{mode}] {result['requests']} requests, {result['errors']} errors | "
+          f"{result['rps']:.1f} req/s | p50 {result['p50_ms']:.0f} ms | p99 {result['p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
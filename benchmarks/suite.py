@@ -0,0 +1,250 @@
+"""
+End-to-end benchmark suite: multi-turn interview sessions against local stand-ins.
+
+    python -m benchmarks.suite                              # all scenarios -> bench_results.json
+    python -m benchmarks.suite --scenarios smoke steady --out before.json
+    python -m benchmarks.suite --baseline before.json       # print deltas against an earlier run
+
+Each scenario starts a fresh fake Gemini server (benchmarks.fake_gemini, with
+latency/jitter/error rate) and a fresh API process whose Firestore client is
+the in-memory fake from benchmarks.fake_firestore. Every simulated candidate
+opens a session, answers `turns` questions (transcribe + generate_question)
+and asks for the final evaluation; `concurrency` sessions run at once.
+Per-endpoint p50/p95/p99, throughput and server memory go to the JSON file,
+along with the app's startup cost (benchmarks.bench_startup); the run exits
+with status 1 when importing the app is over --startup-budget-ms.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import subprocess
+import httpx
+from benchmarks.load_test import percentile, _spawn, _wait_ready
+from benchmarks.bench_upload import peak_rss_mb
+from benchmarks.bench_audio_features import synthetic_answer, to_wav
+from benchmarks import bench_startup
+
+FAKE_PORT = 8765
+APP_PORT = 8769
+
+SCENARIOS = {
+    "smoke":    {"sessions": 10,  "turns": 3, "concurrency": 5,   "latency_ms": 50,  "jitter_ms": 10,  "error_rate": 0.0},
+    "steady":   {"sessions": 100, "turns": 5, "concurrency": 25,  "latency_ms": 300, "jitter_ms": 100, "error_rate": 0.0},
+    "peak":     {"sessions": 400, "turns": 5, "concurrency": 200, "latency_ms": 300, "jitter_ms": 100, "error_rate": 0.0},
+    "degraded": {"sessions": 100, "turns": 5, "concurrency": 50,  "latency_ms": 800, "jitter_ms": 400, "error_rate": 0.05},
+}
+
+ROLE = "Backend Engineer"
+FALLBACK_ANSWER = "I would profile first, then add a covering index and verify it with EXPLAIN ANALYZE."
+
+
+def serve(port: int):
+    """Runs the API with the fake Firestore client (child process entry point)."""
+    import uvicorn
+    from src import database
+    from src.main import app
+    from benchmarks.fake_firestore import FakeFirestore
+
+    database.DB = FakeFirestore()
+    uvicorn.run(app, port=port, log_level="warning")
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def call(self, endpoint: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            return None
+        return response.json()
+
+    def summary(self) -> dict:
+        endpoints = {}
+        for endpoint, values in self.latencies.items():
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        return endpoints
+
+
+async def run_session(client: httpx.AsyncClient, recorder: Recorder, index: int, turns: int, audio_uri: str):
+    session_id = f"bench-{index}"
+    body = {"session_id": session_id, "role": ROLE, "difficulty": "medium"}
+    transcript = []
+
+    result = await recorder.call("generate_question", client.post("/interview/generate_question", json=body))
+    question = result["ai_question"] if result else ""
+    for _ in range(turns):
+        heard = await recorder.call(
+            "transcribe",
+            client.post("/interview/transcribe", json={"session_id": session_id, "audio_data_uri": audio_uri})
+        )
+        answer = heard["transcript"] if heard else FALLBACK_ANSWER
+        transcript.append(f"Interviewer: {question}\nCandidate: {answer}")
+        result = await recorder.call(
+            "generate_question",
+            client.post("/interview/generate_question", json={**body, "user_answer": answer})
+        )
+        question = result["ai_question"] if result else question
+
+    await recorder.call("evaluate", client.post("/interview/evaluate", json={
+        "session_id": session_id, "role": ROLE, "difficulty": "medium", "full_transcript": "\n".join(transcript)
+    }))
+
+
+async def drive(config: dict, audio_uri: str, server_pid: int) -> dict:
+    recorder = Recorder()
+    slots = asyncio.Semaphore(config["concurrency"])
+    limits = httpx.Limits(max_connections=config["concurrency"], max_keepalive_connections=config["concurrency"])
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=300) as client:
+        async def one(index: int):
+            async with slots:
+                await run_session(client, recorder, index, config["turns"], audio_uri)
+
+        rss_idle = rss_mb(server_pid)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(config["sessions"])))
+        elapsed = time.perf_counter() - started
+
+    endpoints = recorder.summary()
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    total = len(all_latencies)
+    return {
+        "config": config,
+        "elapsed_sec": elapsed,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput_rps": total / elapsed,
+        "sessions_per_sec": config["sessions"] / elapsed,
+        "p50_ms": percentile(all_latencies, 50) * 1000,
+        "p95_ms": percentile(all_latencies, 95) * 1000,
+        "p99_ms": percentile(all_latencies, 99) * 1000,
+        "endpoints": endpoints,
+        "memory": {
+            "rss_idle_mb": rss_idle,
+            "rss_end_mb": rss_mb(server_pid),
+            "peak_rss_mb": peak_rss_mb(server_pid),
+        },
+    }
+
+
+def run_scenario(name: str, config: dict, audio_uri: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "FAKE_GEMINI_LATENCY_MS": str(config["latency_ms"]),
+        "FAKE_GEMINI_JITTER_MS": str(config["jitter_ms"]),
+        "FAKE_GEMINI_ERROR_RATE": str(config["error_rate"]),
+        "GEMINI_API_KEY": "fake-key",
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{FAKE_PORT}",
+        "SESSION_BACKEND": "firestore",
+        "LLM_PROVIDERS": "gemini",   # only the fake is reachable
+        # The fake has no quota to protect; bench_admission covers the limiter itself.
+        "ADMISSION_GLOBAL_RPS": env.get("ADMISSION_GLOBAL_RPS", "0"),
+    })
+    env.pop("FIREBASE_SERVICE_ACCOUNT_PATH", None)
+    env.pop("FIREBASE_CREDENTIALS_JSON", None)
+
+    fake = _spawn(["benchmarks.fake_gemini:app", "--port", str(FAKE_PORT)], env)
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.suite", "--serve"], env=env)
+    try:
+        asyncio.run(_wait_ready(f"http://127.0.0.1:{FAKE_PORT}/docs"))
+        asyncio.run(_wait_ready(f"http://127.0.0.1:{APP_PORT}/health"))
+        result = asyncio.run(drive(config, audio_uri, server.pid))
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+
+    print(f"[{name}] {result['requests']} requests, {result['errors']} errors | "
+          f"{result['throughput_rps']:.1f} req/s | p50 {result['p50_ms']:.0f} ms | "
+          f"p95 {result['p95_ms']:.0f} ms | p99 {result['p99_ms']:.0f} ms | "
+          f"peak RSS {result['memory']['peak_rss_mb']:.0f} MB")
+    return result
+
+
+def compare(results: dict, startup: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        saved = json.load(f)
+    baseline = saved["scenarios"]
+    if saved.get("startup"):
+        print(f"[startup] vs {baseline_path}: import {startup['import_ms'] - saved['startup']['import_ms']:+.0f} ms")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        print(f"[{name}] vs {baseline_path}: "
+              f"throughput {(result['throughput_rps'] / before['throughput_rps'] - 1) * 100:+.1f}% | "
+              f"p95 {result['p95_ms'] - before['p95_ms']:+.0f} ms | "
+              f"p99 {result['p99_ms'] - before['p99_ms']:+.0f} ms | "
+              f"peak RSS {result['memory']['peak_rss_mb'] - before['memory']['peak_rss_mb']:+.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, help="Override sessions per scenario.")
+    parser.add_argument("--turns", type=int, help="Override answered turns per session.")
+    parser.add_argument("--concurrency", type=int, help="Override concurrent sessions.")
+    parser.add_argument("--latency-ms", type=float, help="Override fake model latency.")
+    parser.add_argument("--jitter-ms", type=float, help="Override fake model jitter.")
+    parser.add_argument("--error-rate", type=float, help="Override fake model error rate (0-1).")
+    parser.add_argument("--audio-sec", type=float, default=5.0, help="Length of each answer recording.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against.")
+    parser.add_argument("--startup-budget-ms", type=float, default=bench_startup.STARTUP_BUDGET_MS)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(APP_PORT)
+        return
+
+    overrides = {k: v for k, v in vars(args).items()
+                 if k in ("sessions", "turns", "concurrency", "latency_ms", "jitter_ms", "error_rate") and v is not None}
+    audio_uri = "data:audio/wav;base64," + base64.b64encode(to_wav(synthetic_answer(args.audio_sec))).decode()
+
+    startup = bench_startup.measure()
+    within_budget = bench_startup.report(startup, args.startup_budget_ms)
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(name, {**SCENARIOS[name], **overrides}, audio_uri)
+
+    with open(args.out, "w") as f:
+        json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "startup": startup, "scenarios": results}, f, indent=2)
+    print(f"Wrote {args.out}")
+    if args.baseline:
+        compare(results, startup, args.baseline)
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
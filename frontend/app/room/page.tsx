@@ -18,6 +18,7 @@ function RoomContent() {
   
   // --- UI/API State ---
   const [question, setQuestion] = useState('Initializing AI Interface...');
+  const [turn, setTurn] = useState<number | undefined>(undefined); // index of the open question
   const [isProcessing, setIsProcessing] = useState(false);
   const [isComplete, setIsComplete] = useState(false);
   const [error, setError] = useState<string | null>(null);
@@ -49,6 +50,7 @@ function RoomContent() {
       // 1. Initial Call (Start Session)
       const response = await fetchNextQuestion({ session_id: sessionId, user_id: 'guest', role, user_answer: null });
       setQuestion(response.ai_question);
+      setTurn(response.turn);
       setIsComplete(response.is_complete);
     } catch (err) {
       console.error(err);
@@ -78,19 +80,30 @@ function RoomContent() {
         session_id: sessionId,
         user_id: 'guest', 
         role,
-        user_answer: transcript 
+        user_answer: transcript,
+        turn
       });
 
       setQuestion(nextQuestionResponse.ai_question);
+      setTurn(nextQuestionResponse.turn);
       setIsComplete(nextQuestionResponse.is_complete);
       
     } catch (err) {
       console.error(err);
       setError('Failed to process answer. Please try again.');
+      // The answer may have been recorded after all: pick up whichever question is open now
+      try {
+        const current = await fetchNextQuestion({ session_id: sessionId, user_id: 'guest', role, user_answer: null });
+        setQuestion(current.ai_question);
+        setTurn(current.turn);
+        setIsComplete(current.is_complete);
+      } catch {
+        // Still unreachable; the next answer is sent for the same turn
+      }
     } finally {
       setIsProcessing(false);
     }
-  }, [sessionId, role]);
+  }, [sessionId, role, turn]);
 
 
   const handleEndInterview = () => {
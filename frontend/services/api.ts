@@ -9,6 +9,7 @@ import {
 } from '@/types/apiTypes';
 
 const API_BASE_URL = "https://ai-mock-interview-5vz1.onrender.com/interview";
+const QUESTION_RETRIES = 2;
 
 async function apiCall<T>(endpoint: string, data: any): Promise<T> {
   try {
@@ -38,9 +39,19 @@ async function apiCall<T>(endpoint: string, data: any): Promise<T> {
 /**
  * Starts a session or submits an answer to get the next question.
  * Backend Endpoint: POST /interview/generate_question
+ * An answer carries the `turn` it answers, so the backend records it once however
+ * often it is sent: a request that failed on the network is sent again.
  */
-export const fetchNextQuestion = (data: InterviewRequest): Promise<InterviewResponse> => {
-  return apiCall<InterviewResponse>('generate_question', data);
+export const fetchNextQuestion = async (data: InterviewRequest): Promise<InterviewResponse> => {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await apiCall<InterviewResponse>('generate_question', data);
+    } catch (error) {
+      // fetch() rejects with a TypeError when no response came back; HTTP errors are not retried
+      if (!(error instanceof TypeError) || attempt >= QUESTION_RETRIES) throw error;
+      await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)));
+    }
+  }
 };
 
 /**
@@ -8,6 +8,7 @@ export interface InterviewRequest {
     user_answer: string | null; // Null for the very first request (Start Session)
     difficulty?: string;  // Optional parameter
     job_description?: string; // Optional: Added to match backend updates
+    turn?: number;        // The `turn` of the question being answered; makes a retried answer safe
 }
 
 export interface TranscriptionInput {
@@ -27,6 +28,7 @@ export interface InterviewResponse {
     session_id: string;
     ai_question: string;
     is_complete: boolean; 
+    turn?: number;        // Index of this question; sent back with its answer
 }
 
 export interface TranscriptionResponse {
@@ -0,0 +1,226 @@
+"""
+Admission control for model calls.
+
+Every question or transcription request takes a token from its client's
+bucket (the user_id, or the session for guests) and from the worker-wide
+bucket sized to the provider quota. A client over its own rate is turned
+away at once. When the global bucket is empty, requests wait in a priority
+queue: turns of interviews already in progress go ahead of new sessions,
+and each priority has its own deadline. A request that cannot be served
+within its deadline is rejected with a Retry-After estimate instead of
+running into provider quota errors.
+
+The global bucket stands for the provider quota, so every provider call
+draws on it (llm_runtime calls acquire()). The token a request took at
+admission pays for its first call. Further calls take their own: hedges,
+later segments of a streamed transcription, evaluation jobs, batch
+re-grades and speculative prefetches. They wait at the priority of the
+request that made them. Background work (background()) waits behind
+everything else.
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+from . import metrics
+
+ADMISSION_GLOBAL_RPS = float(os.getenv("ADMISSION_GLOBAL_RPS", "30"))   # 0 disables the global limit
+ADMISSION_GLOBAL_BURST = float(os.getenv("ADMISSION_GLOBAL_BURST", "60"))
+ADMISSION_USER_RPS = float(os.getenv("ADMISSION_USER_RPS", "2"))        # 0 disables per-user limits
+ADMISSION_USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "10"))
+ADMISSION_MAX_WAIT_SEC = float(os.getenv("ADMISSION_MAX_WAIT_SEC", "8"))          # in-progress interviews
+ADMISSION_NEW_SESSION_WAIT_SEC = float(os.getenv("ADMISSION_NEW_SESSION_WAIT_SEC", "2"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "500"))
+MAX_TRACKED_CLIENTS = 10000
+
+IN_PROGRESS, NEW_SESSION, BACKGROUND = 0, 1, 2   # lower is served first
+PRIORITY_NAMES = {IN_PROGRESS: "in_progress", NEW_SESSION: "new_session", BACKGROUND: "background"}
+
+# Priority of the model calls made from the current request or task; evaluation jobs keep the default.
+call_priority: ContextVar[int] = ContextVar("admission_call_priority", default=IN_PROGRESS)
+
+
+class _Credit:
+    """The global token a request took in admit(), shared by the tasks it starts until one call uses it."""
+    __slots__ = ("used",)
+
+    def __init__(self):
+        self.used = False
+
+
+_prepaid: ContextVar[Optional[_Credit]] = ContextVar("admission_prepaid", default=None)
+
+
+def background():
+    """Runs the current task's model calls as background work: lowest priority, not paid by the request."""
+    call_priority.set(BACKGROUND)
+    _prepaid.set(None)
+
+WAIT_SECONDS = metrics.histogram(
+    "admission_wait_seconds", "Time model calls waited for a token from the global bucket.", ("priority",)
+)
+REJECTED = metrics.counter(
+    "admission_rejected_total", "Requests turned away with 429 by reason (user, queue, deadline).",
+    ("reason", "priority")
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason} limit); retry in {retry_after:.1f}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def wait_time(self, now: float, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` tokens will have accumulated."""
+        self._refill(now)
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+
+class AdmissionController:
+    def __init__(self, global_rps: float = ADMISSION_GLOBAL_RPS, global_burst: float = ADMISSION_GLOBAL_BURST,
+                 user_rps: float = ADMISSION_USER_RPS, user_burst: float = ADMISSION_USER_BURST,
+                 max_queue: int = ADMISSION_MAX_QUEUE):
+        self.global_bucket = TokenBucket(global_rps, global_burst) if global_rps > 0 else None
+        self.user_rps = user_rps
+        self.user_burst = user_burst
+        self.max_queue = max_queue
+        self.max_wait = {IN_PROGRESS: ADMISSION_MAX_WAIT_SEC, NEW_SESSION: ADMISSION_NEW_SESSION_WAIT_SEC}   # route deadlines
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._owners: "OrderedDict[str, str]" = OrderedDict()   # session_id -> user_id
+        self._waiters = []   # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    def client_key(self, session_id: str, user_id: Optional[str] = None) -> str:
+        """Signed-in users share one bucket across sessions; guests are limited per session."""
+        if user_id and user_id != "guest":
+            self._owners[session_id] = user_id
+            self._owners.move_to_end(session_id)
+            if len(self._owners) > MAX_TRACKED_CLIENTS:
+                self._owners.popitem(last=False)
+        owner = self._owners.get(session_id)
+        return f"user:{owner}" if owner else f"session:{session_id}"
+
+    def _user_bucket(self, key: str) -> TokenBucket:
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = self._users[key] = TokenBucket(self.user_rps, self.user_burst)
+            if len(self._users) > MAX_TRACKED_CLIENTS:
+                self._users.popitem(last=False)
+        self._users.move_to_end(key)
+        return bucket
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def has_spare_capacity(self) -> bool:
+        """True when optional work (speculative calls) can run without delaying anyone."""
+        bucket = self.global_bucket
+        if bucket is None:
+            return True
+        return not self.queue_depth() and bucket.wait_time(time.monotonic(), bucket.burst / 2) == 0
+
+    def _reject(self, reason: str, priority: int, retry_after: float, user: Optional[TokenBucket]):
+        if user is not None:
+            user.refund()
+        REJECTED.inc(1, reason, PRIORITY_NAMES[priority])
+        raise AdmissionRejected(reason, max(retry_after, 0.1))
+
+    async def _take_global(self, priority: int, deadline: Optional[float] = None, user: Optional[TokenBucket] = None):
+        """Takes one global token, waiting behind higher priorities; with a deadline, rejects rather than wait past it."""
+        now = time.monotonic()
+        bucket = self.global_bucket
+        if bucket is None or (not self.queue_depth() and bucket.take(now)):
+            WAIT_SECONDS.observe(0.0, PRIORITY_NAMES[priority])
+            return
+
+        if deadline is not None:
+            ahead = sum(1 for p, _, future in self._waiters if p <= priority and not future.done())
+            estimate = bucket.wait_time(now, ahead + 1)
+            if ahead >= self.max_queue:
+                self._reject("queue", priority, estimate, user)
+            if estimate > deadline:
+                self._reject("deadline", priority, estimate, user)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            # Higher-priority arrivals took the tokens this request was counting on.
+            self._reject("deadline", priority, bucket.wait_time(time.monotonic(), self.queue_depth() + 1), user)
+        WAIT_SECONDS.observe(time.monotonic() - now, PRIORITY_NAMES[priority])
+
+    async def admit(self, key: str, priority: int = IN_PROGRESS):
+        """
+        Route check: returns once the request may call the model; raises
+        AdmissionRejected otherwise. The global token taken here pays for the
+        request's first model call; any further calls it makes take their own.
+        """
+        now = time.monotonic()
+        user = None
+        if self.user_rps > 0:
+            user = self._user_bucket(key)
+            if not user.take(now):
+                REJECTED.inc(1, "user", PRIORITY_NAMES[priority])
+                raise AdmissionRejected("user", max(user.wait_time(now), 0.1))
+        await self._take_global(priority, self.max_wait[priority], user)
+        call_priority.set(priority)
+        _prepaid.set(_Credit())
+
+    async def acquire(self):
+        """
+        Takes a global token for one provider call (llm_runtime), at the priority
+        of the request or task making it. The caller's timeout bounds the wait.
+        """
+        credit = _prepaid.get()
+        if credit is not None and not credit.used:
+            credit.used = True
+            return
+        await self._take_global(call_priority.get())
+
+    async def _pump(self):
+        """Hands out global tokens to waiters in priority order as they refill."""
+        bucket = self.global_bucket
+        while self._waiters:
+            if self._waiters[0][2].done():   # timed out or cancelled
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            if bucket.take(now):
+                heapq.heappop(self._waiters)[2].set_result(None)
+                continue
+            await asyncio.sleep(bucket.wait_time(now))
+
+
+controller = AdmissionController()
+metrics.gauge("admission_queue_depth", "Model calls waiting for a token from the global bucket.", controller.queue_depth)
@@ -0,0 +1,157 @@
+import io
+import re
+import wave
+import numpy as np
+from typing import Dict, List, Optional
+
+av = None  # PyAV decodes browser formats (webm/opus, ogg, mp4); imported on first use
+
+ANALYSIS_SAMPLE_RATE = 16000   # assumed rate when a container reports no frames
+FRAME_SEC = 0.02          # 20 ms energy frames
+MIN_PAUSE_SEC = 0.3       # shorter gaps are treated as normal articulation
+SILENCE_RANGE_DB = 35.0   # frames this far below the loudest frame count as silence
+
+FILLER_PATTERN = re.compile(
+    r"\b(?:u+m+|u+h+|e+r+m*|a+h+|h+m+|mhm|you know|i mean|basically|literally)\b",
+    re.IGNORECASE
+)
+WORD_PATTERN = re.compile(r"[\w']+")
+
+
+# --- 1. Decoding ---
+
+def load_av():
+    global av
+    if av is None:
+        try:
+            import av as module
+        except ImportError:
+            return None
+        av = module
+    return av
+
+
+def _decode_wav(audio_bytes: bytes) -> tuple[np.ndarray, int]:
+    with wave.open(io.BytesIO(audio_bytes)) as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+
+    dtypes = {1: np.uint8, 2: np.int16, 4: np.int32}
+    if width not in dtypes:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+    samples = np.frombuffer(raw, dtype=dtypes[width]).astype(np.float32)
+    if width == 1:
+        samples -= 128.0
+    samples /= float(2 ** (8 * width - 1))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def _decode_with_av(audio_bytes: bytes) -> tuple[np.ndarray, int]:
+    # Frames are mixed down to mono at their native rate; energy framing doesn't need resampling.
+    chunks = []
+    sample_rate = ANALYSIS_SAMPLE_RATE
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        for frame in container.decode(audio=0):
+            sample_rate = frame.sample_rate
+            data = frame.to_ndarray()
+            if data.dtype.kind in "iu":
+                data = data.astype(np.float32) / float(np.iinfo(data.dtype).max)
+            channels = len(frame.layout.channels)
+            if frame.format.is_planar:
+                data = data.mean(axis=0) if channels > 1 else data[0]
+            else:
+                data = data.reshape(-1, channels).mean(axis=1)
+            chunks.append(data.astype(np.float32, copy=False))
+    samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    return samples, sample_rate
+
+
+def decode_audio(audio_bytes: bytes, mime_type: str) -> Optional[tuple[np.ndarray, int]]:
+    """Decodes a recording to mono float32 samples. Returns None if the format can't be decoded here."""
+    try:
+        if mime_type in ("audio/wav", "audio/x-wav", "audio/wave") or audio_bytes[:4] == b"RIFF":
+            return _decode_wav(audio_bytes)
+        if load_av() is not None:
+            return _decode_with_av(audio_bytes)
+    except Exception as e:
+        print(f"Audio Decode Error ({mime_type}): {e}")
+    return None
+
+
+# --- 2. Signal Measurements (vectorized) ---
+
+def measure_signal(samples: np.ndarray, sample_rate: int) -> Dict[str, float]:
+    """Duration, voiced time and pause statistics from 20 ms frame energies."""
+    duration = len(samples) / sample_rate if sample_rate else 0.0
+    frame_len = max(1, int(sample_rate * FRAME_SEC))
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return {"durationSec": duration, "voicedSec": 0.0, "pauseCount": 0.0, "pauseTotalSec": 0.0, "longestPauseSec": 0.0}
+
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame_len + 1e-10)
+    voiced = energy_db > max(energy_db.max() - SILENCE_RANGE_DB, np.percentile(energy_db, 10) + 6.0)
+
+    # Run boundaries of unvoiced stretches; only gaps between voiced frames count as pauses.
+    edges = np.diff(np.concatenate(([1], voiced.astype(np.int8), [1])))
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+    inner = (starts > 0) & (ends < n_frames)
+    gaps = (ends[inner] - starts[inner]) * FRAME_SEC
+    pauses = gaps[gaps >= MIN_PAUSE_SEC]
+
+    return {
+        "durationSec": duration,
+        "voicedSec": float(voiced.sum()) * FRAME_SEC,
+        "pauseCount": float(len(pauses)),
+        "pauseTotalSec": float(pauses.sum()),
+        "longestPauseSec": float(pauses.max()) if len(pauses) else 0.0,
+    }
+
+
+def count_words_and_fillers(transcript: str) -> Dict[str, float]:
+    return {
+        "wordCount": float(len(WORD_PATTERN.findall(transcript))),
+        "fillerCount": float(len(FILLER_PATTERN.findall(transcript))),
+    }
+
+
+# --- 3. Feature Summary ---
+
+def combine(measurements: List[Dict[str, float]]) -> Dict[str, float]:
+    """Merges raw measurements from consecutive segments of one answer."""
+    combined: Dict[str, float] = {}
+    for m in measurements:
+        for key, value in m.items():
+            if key == "longestPauseSec":
+                combined[key] = max(combined.get(key, 0.0), value)
+            else:
+                combined[key] = combined.get(key, 0.0) + value
+    return combined
+
+
+def summarize(raw: Dict[str, float]) -> Dict[str, float]:
+    """Turns raw totals into the audio_features reported to clients."""
+    duration = raw.get("durationSec", 0.0)
+    words = raw.get("wordCount", 0.0)
+    pauses = raw.get("pauseCount", 0.0)
+    return {
+        "speechRateWpm": words / duration * 60 if duration > 0 else 0.0,
+        "fillerRate": raw.get("fillerCount", 0.0) / words if words else 0.0,
+        "voicedRatio": raw.get("voicedSec", 0.0) / duration if duration > 0 else 0.0,
+        "pauseCount": pauses,
+        "meanPauseSec": raw.get("pauseTotalSec", 0.0) / pauses if pauses else 0.0,
+        "longestPauseSec": raw.get("longestPauseSec", 0.0),
+    }
+
+
+def measure_audio(audio_bytes: bytes, mime_type: str) -> Optional[Dict[str, float]]:
+    """Decodes once and measures the signal. Returns None when the audio can't be decoded."""
+    decoded = decode_audio(audio_bytes, mime_type)
+    if decoded is None:
+        return None
+    return measure_signal(*decoded)
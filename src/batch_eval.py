@@ -0,0 +1,265 @@
+"""
+Re-grades completed interview sessions in bulk (e.g. after a rubric change).
+
+    python -m src.batch_eval --checkpoint regrade.json --concurrency 8
+
+Completed sessions are streamed from the session backend a page at a time,
+in session_id order. Up to --concurrency evaluations run at once through
+the normal evaluation path (llm.get_final_evaluation_json, with the
+router's hedging and failover), never more than BATCH_EVAL_MAX_CALLS, so a
+run inside the API leaves most model-call slots to live interviews. Each
+call takes a token from the worker's global admission bucket at background
+priority, behind interview traffic (a CLI run has a bucket of its own).
+New reports are written back in bulk batches of --write-batch. After each
+batch the checkpoint file records the session_id up to which every session
+has been written or has failed, plus the finished sessions past it. An
+interrupted run keeps the reports it has and resumes where it stopped; only
+evaluations in flight are repeated.
+
+Each session is graded with its stored difficulty and JD. Sessions created
+before those were stored use --difficulty / --job-description. A session
+whose evaluation fails keeps its previous report. The same run is available
+inside the API as POST /admin/evaluations/batch.
+"""
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()   # the API loads .env in src.main; the CLI is its own entry point
+
+import os  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+import asyncio  # noqa: E402
+import argparse  # noqa: E402
+from collections import deque  # noqa: E402
+from typing import Any, Dict, List, Optional  # noqa: E402
+from .models import EvaluationReport  # noqa: E402
+from .llm_runtime import LLM_MAX_CONCURRENCY  # noqa: E402
+from . import llm, metrics, admission  # noqa: E402
+
+BATCH_EVAL_CONCURRENCY = int(os.getenv("BATCH_EVAL_CONCURRENCY", "8"))
+BATCH_EVAL_PAGE_SIZE = int(os.getenv("BATCH_EVAL_PAGE_SIZE", "100"))
+BATCH_EVAL_WRITE_BATCH = int(os.getenv("BATCH_EVAL_WRITE_BATCH", "50"))
+BATCH_EVAL_CHECKPOINT_PATH = os.getenv("BATCH_EVAL_CHECKPOINT_PATH", "batch_eval_checkpoint.json")
+# Upper bound on --concurrency, kept below the worker's shared model-call slots so live interviews always find one
+BATCH_EVAL_MAX_CALLS = int(os.getenv("BATCH_EVAL_MAX_CALLS", str(max(1, LLM_MAX_CONCURRENCY // 4))))
+
+GRADED = metrics.counter("batch_evaluations_total", "Sessions re-graded by batch evaluation, by outcome.", ("outcome",))
+
+
+class Checkpoint:
+    """Progress of a batch run; saved (atomically) after every bulk write."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.cursor: Optional[str] = None   # every session up to here is written or failed
+        self.graded = 0
+        self.failed: Dict[str, str] = {}    # session_id -> error
+        self.ahead: List[str] = []          # written or failed, but past the cursor
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.cursor, self.graded, self.failed, self.ahead = saved["cursor"], saved["graded"], saved["failed"], saved["ahead"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cursor": self.cursor, "graded": self.graded, "failed": self.failed, "ahead": self.ahead}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, self.path)
+
+
+class BatchEvaluation:
+    def __init__(self, backend, checkpoint: Checkpoint, concurrency: int = BATCH_EVAL_CONCURRENCY,
+                 page_size: int = BATCH_EVAL_PAGE_SIZE, write_batch: int = BATCH_EVAL_WRITE_BATCH,
+                 limit: Optional[int] = None, difficulty: str = "Medium", job_description: str = ""):
+        self.backend = backend
+        self.checkpoint = checkpoint
+        self.concurrency = min(concurrency, BATCH_EVAL_MAX_CALLS)
+        self.page_size = page_size
+        self.write_batch = write_batch
+        self.limit = limit
+        self.difficulty = difficulty
+        self.job_description = job_description
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.processed = 0   # this run, graded or failed
+        self._order = deque()        # session_ids in stream order, not yet behind the checkpoint cursor
+        self._finished = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}   # reports waiting for the next bulk write
+        self._write_lock = asyncio.Lock()
+
+    def sessions_per_minute(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.processed / elapsed * 60 if elapsed > 0 else 0.0
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "processed": self.processed,
+            "graded_total": self.checkpoint.graded,
+            "failed_total": len(self.checkpoint.failed),
+            "cursor": self.checkpoint.cursor,
+            "sessions_per_minute": round(self.sessions_per_minute(), 1),
+            "error": self.error,
+        }
+
+    async def _grade(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        data = await llm.get_final_evaluation_json(
+            role=session.get('role', ''),
+            history=session.get('history') or [],
+            difficulty=session.get('difficulty') or self.difficulty,
+            job_description=session.get('job_description') or self.job_description
+        )
+        if data.get("final_verdict") == "Error":
+            raise RuntimeError(data.get("detailed_feedback") or "Evaluation failed.")
+        report = EvaluationReport(**data)
+        # Video metrics came from the live interview and cannot be recomputed here.
+        report.confidence_metrics = (session.get('final_report') or {}).get('confidence_metrics')
+        return report.model_dump()
+
+    async def _write(self):
+        """Writes the pending reports in one bulk call, then moves the checkpoint forward."""
+        async with self._write_lock:
+            batch = dict(self._pending)
+            if batch:
+                await self.backend.save_reports(batch)
+                # Dropped only once written, so a write cut off by an interrupt is retried by the final one.
+                for session_id in batch:
+                    del self._pending[session_id]
+                self.checkpoint.graded += len(batch)
+                self._finished.update(batch)
+            while self._order and self._order[0] in self._finished:
+                session_id = self._order.popleft()
+                self._finished.discard(session_id)
+                self.checkpoint.cursor = session_id
+            self.checkpoint.ahead = sorted(self._finished)
+            self.checkpoint.save()
+
+    async def _process(self, session_id: str, session: Dict[str, Any], slots: asyncio.Semaphore):
+        try:
+            self._pending[session_id] = await self._grade(session)
+            GRADED.inc(1, "graded")
+        except Exception as e:
+            print(f"Batch evaluation failed for {session_id}: {e}")
+            self.checkpoint.failed[session_id] = str(e)
+            self._finished.add(session_id)
+            GRADED.inc(1, "failed")
+        finally:
+            slots.release()
+        self.processed += 1
+        if len(self._pending) >= self.write_batch:
+            await self._write()
+            print(f"Batch evaluation: {self.checkpoint.graded} graded, {len(self.checkpoint.failed)} failed, "
+                  f"{self.sessions_per_minute():.1f} sessions/min")
+
+    async def run(self) -> Dict[str, Any]:
+        # Every evaluation call takes a global quota token, behind live interview traffic
+        admission.background()
+        self.status = "running"
+        self.started_at = time.monotonic()
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        skip = set(self.checkpoint.ahead)
+        try:
+            seen = 0
+            async for session_id, session in self.backend.iter_sessions(after=self.checkpoint.cursor, page_size=self.page_size):
+                if session_id in skip:
+                    self._order.append(session_id)
+                    self._finished.add(session_id)
+                    continue
+                if self.limit is not None and seen >= self.limit:
+                    break
+                seen += 1
+                await slots.acquire()   # backpressure: the stream is read only as fast as sessions are graded
+                self._order.append(session_id)
+                task = asyncio.create_task(self._process(session_id, session, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+            await self._write()
+            self.status = "completed"
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._write()   # keep the reports that did finish
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            self.status, self.error = "failed", str(e)
+            raise
+        finally:
+            self.finished_at = time.monotonic()
+        return self.progress()
+
+
+# --- Admin endpoint support (one run per worker) ---
+
+_current: Optional[BatchEvaluation] = None
+_task: Optional[asyncio.Task] = None
+
+
+def current() -> Optional[BatchEvaluation]:
+    return _current
+
+
+def start(backend, restart: bool = False, **options) -> BatchEvaluation:
+    """Starts a background run from the checkpoint (or from scratch with restart=True)."""
+    global _current, _task
+    if _task is not None and not _task.done():
+        raise RuntimeError("A batch evaluation is already running.")
+    if restart and os.path.exists(BATCH_EVAL_CHECKPOINT_PATH):
+        os.remove(BATCH_EVAL_CHECKPOINT_PATH)
+    _current = BatchEvaluation(backend, Checkpoint(BATCH_EVAL_CHECKPOINT_PATH), **options)
+    _task = asyncio.create_task(_current.run())
+    _task.add_done_callback(lambda t: t.cancelled() or t.exception())   # outcome is kept in _current.status
+    return _current
+
+
+async def stop():
+    """Cancels a running batch on shutdown; the checkpoint lets the next run resume."""
+    if _task is not None and not _task.done():
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+
+
+async def _main(args):
+    from .database import create_backend
+    from .clients import registry
+    backend = create_backend()
+    batch = BatchEvaluation(
+        backend, Checkpoint(args.checkpoint), concurrency=args.concurrency, page_size=args.page_size,
+        write_batch=args.write_batch, limit=args.limit, difficulty=args.difficulty, job_description=args.job_description
+    )
+    try:
+        result = await batch.run()
+    finally:
+        await registry.aclose()
+        await backend.close()
+    print(json.dumps(result, indent=2))
+    print(f"Re-graded {result['processed']} sessions at {result['sessions_per_minute']:.1f} sessions/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", default=BATCH_EVAL_CHECKPOINT_PATH)
+    parser.add_argument("--concurrency", type=int, default=BATCH_EVAL_CONCURRENCY)
+    parser.add_argument("--page-size", type=int, default=BATCH_EVAL_PAGE_SIZE)
+    parser.add_argument("--write-batch", type=int, default=BATCH_EVAL_WRITE_BATCH)
+    parser.add_argument("--limit", type=int, help="Stop after this many sessions (the checkpoint allows continuing later).")
+    parser.add_argument("--difficulty", default="Medium", help="For sessions that did not store their difficulty.")
+    parser.add_argument("--job-description", default="", help="For sessions that did not store their JD.")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
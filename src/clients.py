@@ -0,0 +1,171 @@
+"""
+Outbound AI clients (Gemini, OpenAI, Anthropic) on shared, pooled HTTP clients.
+
+Every SDK client is built on a registry-owned AsyncClient, so calls from the
+interviewer, the transcriber and the evaluation workers reuse the same
+keep-alive (and, over TLS, HTTP/2) connections instead of each SDK keeping
+a small private pool. There is one pool per HTTP library: google-genai takes
+an `httpx` client, while current OpenAI and Anthropic SDKs are built on the
+`httpx2` fork. Clients are built on first use or by the app's background
+warm-up, and the lifespan drains in-flight calls before closing the pools.
+"""
+import os
+import time
+import asyncio
+from typing import Callable, Dict
+import threading
+import importlib
+import importlib.util
+from .llm_runtime import client_http_options, in_flight_calls
+from . import metrics
+
+# --- Pool Configuration (per worker) ---
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))
+HTTP_KEEPALIVE_SEC = float(os.getenv("HTTP_KEEPALIVE_SEC", "120"))  # httpx default is 5 s, shorter than a turn
+HTTP_CONNECT_TIMEOUT_SEC = float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1" and importlib.util.find_spec("h2") is not None
+HTTP_DRAIN_SEC = float(os.getenv("HTTP_DRAIN_SEC", "10"))
+
+CONNECTIONS = metrics.counter(
+    "outbound_requests_total",
+    "Outbound HTTP requests by host and whether they opened a new connection or reused a pooled one.",
+    ("host", "connection")
+)
+
+
+async def _on_request(request):
+    opened = []
+
+    async def trace(event: str, info: dict):
+        if event.endswith("connect_tcp.complete"):
+            opened.append(True)
+
+    request.extensions["trace"] = trace
+    request.extensions["connections_opened"] = opened
+
+
+async def _on_response(response):
+    opened = response.request.extensions.get("connections_opened")
+    if opened is not None:
+        CONNECTIONS.inc(1, response.request.url.host, "opened" if opened else "reused")
+
+
+class ClientRegistry:
+    """
+    Owns the shared HTTP pools and the SDK clients built on them. `override`
+    replaces a client (benchmarks install fakes this way).
+    """
+
+    def __init__(self, max_connections: int = HTTP_MAX_CONNECTIONS, max_keepalive: int = HTTP_MAX_KEEPALIVE,
+                 keepalive_sec: float = HTTP_KEEPALIVE_SEC, http2: bool = HTTP2_ENABLED, verify=True):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_sec = keepalive_sec
+        self.http2 = http2
+        self.verify = verify
+        self._pools: Dict[str, object] = {}   # HTTP library name -> AsyncClient
+        self._clients: Dict[str, object] = {}
+        self._overridden = set()
+        self._lock = threading.RLock()   # the warm-up builds clients on a worker thread
+        self._factories: Dict[str, Callable[["ClientRegistry"], object]] = {
+            "gemini": _gemini_client,
+            "openai": _openai_client,
+            "anthropic": _anthropic_client,
+        }
+
+    def http(self, library: str = "httpx"):
+        """The shared AsyncClient of an httpx-compatible library (`httpx` or `httpx2`)."""
+        with self._lock:
+            pool = self._pools.get(library)
+            if pool is None or pool.is_closed:
+                if pool is not None:
+                    # SDK clients built on the closed pool are rebuilt on next use.
+                    self._clients = {name: c for name, c in self._clients.items() if name in self._overridden}
+                module = importlib.import_module(library)
+                pool = self._pools[library] = module.AsyncClient(
+                    limits=module.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive,
+                        keepalive_expiry=self.keepalive_sec
+                    ),
+                    http2=self.http2,
+                    verify=self.verify,
+                    # Per-call deadlines are enforced by llm_runtime; only connecting is bounded here.
+                    timeout=module.Timeout(None, connect=HTTP_CONNECT_TIMEOUT_SEC),
+                    event_hooks={"request": [_on_request], "response": [_on_response]}
+                )
+            return pool
+
+    def get(self, name: str):
+        """The named SDK client, or None when it is not configured (no API key / SDK)."""
+        if name not in self._clients:
+            with self._lock:
+                if name not in self._clients:
+                    try:
+                        self._clients[name] = self._factories[name](self)
+                    except Exception as e:
+                        print(f"{name} client initialization error: {e}")
+                        self._clients[name] = None
+        return self._clients[name]
+
+    def gemini(self):
+        return self.get("gemini")
+
+    def override(self, name: str, client):
+        self._overridden.add(name)
+        self._clients[name] = client
+
+    def build_all(self):
+        """Imports the SDKs and builds every configured client (the app's warm-up does this off the event loop)."""
+        for name in self._factories:
+            self.get(name)
+
+    async def aclose(self, drain_sec: float = HTTP_DRAIN_SEC):
+        """Waits (up to drain_sec) for in-flight model calls, then closes the pools."""
+        deadline = time.monotonic() + drain_sec
+        while in_flight_calls() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if in_flight_calls():
+            print(f"Closing outbound clients with {in_flight_calls()} call(s) still in flight")
+        for pool in self._pools.values():
+            await pool.aclose()
+
+
+# --- SDK Client Factories (SDKs are imported here, on first use) ---
+
+def _sdk_http_library(client_class) -> str:
+    """Which httpx flavour an SDK's default client derives from."""
+    base = next(c for c in client_class.__mro__ if c.__name__ == "AsyncClient")
+    return base.__module__.split(".")[0]
+
+
+def _gemini_client(registry: "ClientRegistry"):
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("WARNING: GEMINI_API_KEY not found in environment variables.")
+        return None
+    from google import genai
+    options = client_http_options()
+    options.httpx_async_client = registry.http("httpx")
+    return genai.Client(api_key=api_key, http_options=options)
+
+
+def _openai_client(registry: "ClientRegistry"):
+    if not os.getenv("OPENAI_API_KEY") or importlib.util.find_spec("openai") is None:
+        return None
+    import openai
+    # Retries are the router's job; the SDK's own would hide a slow provider from it.
+    http = registry.http(_sdk_http_library(openai.DefaultAsyncHttpxClient))
+    return openai.AsyncOpenAI(base_url=os.getenv("OPENAI_BASE_URL"), max_retries=0, http_client=http)
+
+
+def _anthropic_client(registry: "ClientRegistry"):
+    if not os.getenv("ANTHROPIC_API_KEY") or importlib.util.find_spec("anthropic") is None:
+        return None
+    import anthropic
+    http = registry.http(_sdk_http_library(anthropic.DefaultAsyncHttpxClient))
+    return anthropic.AsyncAnthropic(base_url=os.getenv("ANTHROPIC_BASE_URL"), max_retries=0, http_client=http)
+
+
+registry = ClientRegistry()
@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
+import numpy as np
+
+cv2 = None  # opencv-python (YuNet face detection); imported on first use, the API runs without it
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "confidenceDetection", "yunet.onnx")
+
+CONFIDENCE_TARGET_FPS = float(os.getenv("CONFIDENCE_TARGET_FPS", "10"))
+CONFIDENCE_MAX_WIDTH = int(os.getenv("CONFIDENCE_MAX_WIDTH", "640"))
+CONFIDENCE_WORKERS = int(os.getenv("CONFIDENCE_WORKERS", str(os.cpu_count() or 1)))
+CONFIDENCE_WINDOW_SEC = float(os.getenv("CONFIDENCE_WINDOW_SEC", "10"))
+CONFIDENCE_EMIT_SEC = 1.0
+CONFIDENCE_MIN_WIDTH = 160   # YuNet starts missing faces below this
+CONFIDENCE_RESULTS_SIZE = 1024
+CONFIDENCE_ARTIFACT_DIR = os.getenv("CONFIDENCE_ARTIFACT_DIR", "video_metrics")  # offline analyses (confidence_batch)
+
+# Detection and smoothing settings from the original webcam demo (confidenceDetection/main.py)
+SCORE_THRESHOLD = 0.85
+NMS_THRESHOLD = 0.2
+ALPHA = 0.75          # smoothing factor per reference frame
+MAX_JUMP = 60         # pixel jump clamp per reference frame
+CONF_MIN = 0.5        # minimum reliable confidence
+UNSTABLE_SPEED = 7    # "Stay still please"
+REFERENCE_FPS = 30.0  # the values above were tuned frame-by-frame on a ~30 fps webcam
+
+
+# --- 1. Detection (runs in worker processes) ---
+
+_detector = None
+_REDUCTIONS = (1, 2, 4, 8)
+
+
+def load_cv2():
+    """Imports OpenCV on first use; returns None when it is not installed."""
+    global cv2
+    if cv2 is None:
+        try:
+            import cv2 as module
+        except ImportError:
+            return None
+        cv2 = module
+    return cv2
+
+
+def _init_worker():
+    global _detector
+    load_cv2()
+    cv2.setNumThreads(1)  # one core per worker; the pool provides the parallelism
+    _detector = cv2.FaceDetectorYN_create(
+        MODEL_PATH, "", (320, 320),
+        score_threshold=SCORE_THRESHOLD,
+        nms_threshold=NMS_THRESHOLD,
+        top_k=5
+    )
+
+
+def _decode_flag(reduce: int) -> int:
+    return {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }[reduce]
+
+
+def detect_in_frame(frame: np.ndarray, scale: float = 1.0) -> Optional[Tuple[float, float, float]]:
+    """(cx, cy, score) of the most confident face, in coordinates multiplied by `scale`."""
+    if _detector is None:
+        _init_worker()
+    h, w = frame.shape[:2]
+    _detector.setInputSize((w, h))
+    _, faces = _detector.detect(frame)
+    if faces is None or len(faces) == 0:
+        return None
+    best = faces[int(np.argmax(faces[:, 14]))]
+    x, y, fw, fh = best[:4]
+    return (float(x + fw / 2) * scale, float(y + fh / 2) * scale, float(best[14]))
+
+
+def detect_face(jpeg: bytes, reduce: int = 1) -> Tuple[int, Optional[Tuple[float, float, float]]]:
+    """
+    Decodes a JPEG at 1/`reduce` scale (libjpeg skips the discarded detail, so
+    this is cheaper than decoding and resizing) and detects the main face.
+    Returns (full-resolution width, face in full-resolution pixels or None).
+    """
+    load_cv2()
+    frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), _decode_flag(reduce))
+    if frame is None:
+        raise ValueError("Frame is not a decodable image.")
+    return frame.shape[1] * reduce, detect_in_frame(frame, scale=reduce)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if load_cv2() is None:
+        raise RuntimeError("Confidence detection requires opencv-python.")
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CONFIDENCE_WORKERS, initializer=_init_worker)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# --- 2. Head Motion ---
+
+class HeadMotionTracker:
+    """
+    The demo's smoothing rules (EMA of centroid speed, jump clamping, "unstable"
+    above 7 px/frame), normalised to a 30 fps reference so results don't depend
+    on how many frames were actually analysed.
+    """
+
+    def __init__(self, window_sec: float = CONFIDENCE_WINDOW_SEC):
+        self.window_sec = window_sec
+        self.prev: Optional[Tuple[float, float, float]] = None
+        self.smoothed = 0.0
+        self.frames = 0
+        self.face_frames = 0
+        self.unstable_frames = 0
+        self.speed_total = 0.0
+        self.window: Deque[Tuple[float, float, bool]] = deque()  # (time, speed, face seen)
+
+    def update(self, t: float, face: Optional[Tuple[float, float, float]]) -> float:
+        speed = 0.0
+        if face is not None and face[2] >= CONF_MIN:
+            cx, cy, _ = face
+            if self.prev is not None:
+                prev_cx, prev_cy, prev_t = self.prev
+                elapsed = max((t - prev_t) * REFERENCE_FPS, 1.0)
+                instant_speed = math.hypot(cx - prev_cx, cy - prev_cy) / elapsed
+                if instant_speed > MAX_JUMP:
+                    instant_speed = self.smoothed
+                decay = ALPHA ** elapsed
+                self.smoothed = decay * self.smoothed + (1 - decay) * instant_speed
+                speed = self.smoothed
+            else:
+                self.smoothed = 0.0
+            self.prev = (cx, cy, t)
+
+        self.frames += 1
+        if face is not None:
+            self.face_frames += 1
+            self.speed_total += speed
+            self.unstable_frames += speed > UNSTABLE_SPEED
+        self.window.append((t, speed, face is not None))
+        while self.window and self.window[0][0] < t - self.window_sec:
+            self.window.popleft()
+        return speed
+
+    @staticmethod
+    def _stats(frames: int, face_frames: int, unstable: int, speed_total: float) -> Dict[str, float]:
+        unstable_ratio = unstable / face_frames if face_frames else 0.0
+        return {
+            "framesAnalyzed": float(frames),
+            "faceVisibleRatio": face_frames / frames if frames else 0.0,
+            "meanHeadSpeed": speed_total / face_frames if face_frames else 0.0,
+            "unstableRatio": unstable_ratio,
+            "stabilityScore": 100.0 * (1.0 - unstable_ratio) if face_frames else 0.0,
+        }
+
+    def summary(self) -> Dict[str, float]:
+        return self._stats(self.frames, self.face_frames, self.unstable_frames, self.speed_total)
+
+    def rolling(self) -> Dict[str, float]:
+        seen = [speed for _, speed, face in self.window if face]
+        return self._stats(len(self.window), len(seen), sum(s > UNSTABLE_SPEED for s in seen), sum(seen))
+
+
+# --- 3. Per-Session Analysis ---
+
+class ConfidenceSession:
+    """
+    Analyses one session's video frames. At most one frame per session is in
+    detection at a time and frames arriving faster than the target FPS (or while
+    detection is busy) are dropped, so load lowers the analysed rate instead of
+    growing a backlog. Decode scale adapts to keep detection within the budget.
+    """
+
+    def __init__(self, session_id: str, target_fps: float = CONFIDENCE_TARGET_FPS):
+        self.session_id = session_id
+        self.interval = 1.0 / target_fps
+        self.tracker = HeadMotionTracker()
+        self.updates: asyncio.Queue = asyncio.Queue()
+        self.received = 0
+        self.dropped = 0
+        self.reduce: Optional[int] = None
+        self._min_reduce = 1
+        self._latency: Optional[float] = None
+        self._since_adjust = 0
+        self._last_accepted = float("-inf")
+        self._last_emit = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, jpeg: bytes) -> bool:
+        """Queues a frame for detection unless it should be skipped. Returns whether it was taken."""
+        now = time.monotonic()
+        self.received += 1
+        if (self._task is not None and not self._task.done()) or now - self._last_accepted < self.interval:
+            self.dropped += 1
+            return False
+        self._last_accepted = now
+        self._task = asyncio.create_task(self._analyze(jpeg, now))
+        return True
+
+    async def _analyze(self, jpeg: bytes, captured_at: float):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            width, face = await loop.run_in_executor(get_pool(), detect_face, jpeg, self.reduce or 1)
+        except ValueError:
+            self.dropped += 1
+            return
+        self._adapt(width, time.perf_counter() - start)
+        self.tracker.update(captured_at, face)
+
+        if captured_at - self._last_emit >= CONFIDENCE_EMIT_SEC:
+            self._last_emit = captured_at
+            self.updates.put_nowait(self.rolling())
+
+    def _adapt(self, width: int, latency: float):
+        if self.reduce is None:
+            # Start at the largest decode that fits CONFIDENCE_MAX_WIDTH.
+            self._min_reduce = next((r for r in _REDUCTIONS if width / r <= CONFIDENCE_MAX_WIDTH), _REDUCTIONS[-1])
+            self.reduce = self._min_reduce
+            return
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._since_adjust += 1
+        if self._since_adjust < 5:
+            return
+        if self._latency > self.interval and self.reduce < _REDUCTIONS[-1] and width / (self.reduce * 2) >= CONFIDENCE_MIN_WIDTH:
+            self.reduce *= 2
+            self._since_adjust = 0
+        elif self._latency < self.interval / 3 and self.reduce > self._min_reduce:
+            self.reduce //= 2
+            self._since_adjust = 0
+
+    def _with_counts(self, stats: Dict[str, float]) -> Dict[str, float]:
+        return {**stats, "framesReceived": float(self.received), "framesDropped": float(self.dropped)}
+
+    def rolling(self) -> Dict[str, float]:
+        return self._with_counts(self.tracker.rolling())
+
+    def summary(self) -> Dict[str, float]:
+        return self._with_counts(self.tracker.summary())
+
+    async def finish(self) -> Dict[str, float]:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+        return self.summary()
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+# One live video analysis per interview session; finished summaries are kept for the evaluation.
+_active: Dict[str, ConfidenceSession] = {}
+_results: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+
+def start(session_id: str) -> ConfidenceSession:
+    """Opens video analysis for a session, replacing any abandoned one."""
+    get_pool()
+    previous = _active.pop(session_id, None)
+    if previous is not None:
+        previous.cancel()
+    analysis = ConfidenceSession(session_id)
+    _active[session_id] = analysis
+    return analysis
+
+
+def release(analysis: ConfidenceSession):
+    if _active.get(analysis.session_id) is analysis:
+        del _active[analysis.session_id]
+    summary = analysis.summary()
+    if summary["framesAnalyzed"]:
+        _results[analysis.session_id] = summary
+        _results.move_to_end(analysis.session_id)
+        while len(_results) > CONFIDENCE_RESULTS_SIZE:
+            _results.popitem(last=False)
+
+
+def artifact_path(session_id: str) -> str:
+    return os.path.join(CONFIDENCE_ARTIFACT_DIR, re.sub(r"[^\w-]", "_", session_id) + ".npz")
+
+
+def _saved_summary(session_id: str) -> Optional[Dict[str, float]]:
+    path = artifact_path(session_id)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return json.loads(str(data["summary"]))
+
+
+def summary_for(session_id: str) -> Optional[Dict[str, float]]:
+    """
+    Latest stability metrics for a session: the live stream, a finished stream,
+    or an offline analysis of its recording. None if no video was analysed.
+    """
+    analysis = _active.get(session_id)
+    if analysis is not None and analysis.tracker.frames:
+        return analysis.summary()
+    if session_id in _results:
+        return _results[session_id]
+    return _saved_summary(session_id)
@@ -1,84 +1,35 @@
 # feature will get implemented on site
 # this will enable video calling
+# Local webcam demo of the head-stability analysis served by /interview/confidence/stream.
+# Run from the backend directory: python -m src.confidenceDetection.main
 import cv2
 import time
-import math
-start_time=time.time()
-detector = cv2.FaceDetectorYN_create(
-    "yunet.onnx", "", (320, 320),
-    score_threshold=0.85,
-    nms_threshold=0.2,
-    top_k=500
-)
-stability=0
-camera = cv2.VideoCapture(0)
-
-prev_cx, prev_cy = None, None
-speed = 0.0
-smoothed_speed = 0.0
+from src import confidence
 
-alpha = 0.75      # smoothing factor
-MAX_JUMP = 60     # pixel jump clamp
-CONF_MIN = 0.5    # minimum reliable confidence
+camera = cv2.VideoCapture(0)
+tracker = confidence.HeadMotionTracker()
 
 while True:
     ret, frame = camera.read()
-    h, w = frame.shape[:2]
+    if not ret:
+        break
 
-    detector.setInputSize((w, h))
-    _, face = detector.detect(frame)
+    face = confidence.detect_in_frame(frame)
+    speed = tracker.update(time.monotonic(), face)
 
     if face is not None:
-        for face in face:
-            x, y, w, h = map(int, face[:4])
-            confidence = face[14]
-
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-            cx = x + w // 2
-            cy = y + h // 2
-
-            if confidence < CONF_MIN:
-                speed = 0.0
-            else:
-                if prev_cx is not None:
-                    dx = cx - prev_cx
-                    dy = cy - prev_cy
-                    instant_speed = (dx**2 + dy**2) ** 0.5
-
-                    if instant_speed > MAX_JUMP:
-                        instant_speed = smoothed_speed
-
-                    smoothed_speed = (
-                        alpha * smoothed_speed + (1 - alpha) * instant_speed
-                    )
-                    speed = smoothed_speed
-                else:
-                    speed = 0.0
-                    smoothed_speed = 0.0
-
-                prev_cx, prev_cy = cx, cy
-
-            print(f"Speed: {speed:.2f}", end="\r", flush=True)
-            if(speed>7):
-                print("Stay still please",end="\r",flush=True)
-                stability=stability+1
+        cx, cy, _ = face
+        cv2.circle(frame, (int(cx), int(cy)), 6, (0, 255, 0), 2)
+        status = "Stay still please" if speed > confidence.UNSTABLE_SPEED else ""
+        print(f"Speed: {speed:.2f} {status:<20}", end="\r", flush=True)
 
     cv2.imshow("Confidence Detection", frame)
 
     if cv2.waitKey(1) & 0xFF == ord("q"):
-        
-        end_time = time.time()
-
-        # total time
-        elapsed_time = end_time - start_time
-        print("Total time: ",elapsed_time)
-        f=math.log((elapsed_time/stability))
-        print("Log value : ", f)
-        if(f<0):
-            print("Extremely unstable.")
-        elif(f>0 or f<0.5):
-            print("Mostly stable")
+        summary = tracker.summary()
+        print()
+        print(f"Stability score: {summary['stabilityScore']:.0f}/100 "
+              f"(unstable {summary['unstableRatio']:.0%} of frames, face visible {summary['faceVisibleRatio']:.0%})")
         break
 
 camera.release()
@@ -0,0 +1,172 @@
+"""
+Offline head-stability analysis of a recorded interview video.
+
+    python -m src.confidence_batch recording.mp4 --session-id <session_id>
+
+The recording is split into segments that worker processes decode and run
+through the detector in parallel, sampling CONFIDENCE_TARGET_FPS frames per
+second at CONFIDENCE_BATCH_WIDTH; the motion math then runs as NumPy array
+operations over the whole timeline. The per-frame metrics array and the
+summary are saved to CONFIDENCE_ARTIFACT_DIR/<session_id>.npz, where the
+evaluation picks them up.
+"""
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import numpy as np
+from . import confidence
+
+# A seated candidate fills much of the frame, so recordings are analysed smaller than live frames.
+CONFIDENCE_BATCH_WIDTH = int(os.getenv("CONFIDENCE_BATCH_WIDTH", "320"))
+MIN_SEGMENT_FRAMES = 900   # each segment pays one seek (decode from the previous keyframe)
+EMA_BLOCK = 32   # recurrence is solved in blocks so cumulative decay products stay in float range
+
+# Compact per-frame record; cx/cy/score are NaN where no face was found.
+FRAME_DTYPE = np.dtype([("t", "f4"), ("cx", "f4"), ("cy", "f4"), ("score", "f2"), ("speed", "f4")])
+
+
+# --- 1. Batched Detection ---
+
+def detect_segment(path: str, first: int, last: Optional[int], stride: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes and analyses source frames [first, last) of a video in one worker.
+    Only every `stride`-th frame is converted to colour, shrunk to `width` and
+    run through the detector. Returns (frame indices, (n, 3) cx/cy/score in
+    source pixels, NaN where no face was found).
+    """
+    cv2 = confidence.load_cv2()
+    capture = cv2.VideoCapture(path)
+    if first:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+    indices, found = [], []
+    index = first
+    while (last is None or index < last) and capture.grab():
+        if index % stride == 0:
+            ok, frame = capture.retrieve()
+            if ok:
+                scale = frame.shape[1] / width
+                if scale > 1:
+                    frame = cv2.resize(frame, (width, round(frame.shape[0] / scale)), interpolation=cv2.INTER_AREA)
+                face = confidence.detect_in_frame(frame, scale=max(scale, 1.0))
+                indices.append(index)
+                found.append(face if face is not None else (np.nan, np.nan, np.nan))
+        index += 1
+    capture.release()
+    return np.asarray(indices, dtype=np.int64), np.asarray(found, dtype=np.float32).reshape(-1, 3)
+
+
+def detect_video(path: str, target_fps: float = confidence.CONFIDENCE_TARGET_FPS,
+                 max_width: int = CONFIDENCE_BATCH_WIDTH,
+                 workers: int = confidence.CONFIDENCE_WORKERS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (timestamps, detections) for the sampled frames of a video file.
+    The timeline is split into contiguous segments that are decoded and
+    analysed in parallel, so decoding scales across cores along with detection.
+    """
+    cv2 = confidence.load_cv2()
+    if cv2 is None:
+        raise RuntimeError("Confidence detection requires opencv-python.")
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or confidence.REFERENCE_FPS
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    stride = max(1, round(fps / target_fps))
+
+    segments = max(1, min(workers * 4, total // MIN_SEGMENT_FRAMES)) if workers > 1 else 1
+    # Boundaries fall on sampled frames so every segment starts with a frame it analyses.
+    bounds = [round(total * i / segments / stride) * stride for i in range(segments)] + [None]
+    with ProcessPoolExecutor(max_workers=workers, initializer=confidence._init_worker) as pool:
+        parts = list(pool.map(detect_segment, [path] * segments, bounds[:-1], bounds[1:],
+                              [stride] * segments, [max_width] * segments))
+
+    indices = np.concatenate([p[0] for p in parts])
+    detections = np.concatenate([p[1] for p in parts])
+    return indices / fps, detections
+
+
+# --- 2. Vectorized Motion ---
+
+def _ema(values: np.ndarray, decay: np.ndarray) -> np.ndarray:
+    """s[i] = decay[i] * s[i-1] + (1 - decay[i]) * values[i], s[-1] = 0, without a per-element loop."""
+    out = np.empty_like(values)
+    decay = np.clip(decay, 1e-5, 1.0)  # below this the previous state no longer matters
+    state = 0.0
+    for start in range(0, len(values), EMA_BLOCK):
+        d = decay[start:start + EMA_BLOCK]
+        x = values[start:start + EMA_BLOCK]
+        log_p = np.cumsum(np.log(d))
+        p = np.exp(log_p)
+        out[start:start + EMA_BLOCK] = p * (state + np.cumsum((1 - d) * x * np.exp(-log_p)))
+        state = out[start + len(d) - 1]
+    return out
+
+
+def head_speeds(t: np.ndarray, cx: np.ndarray, cy: np.ndarray, score: np.ndarray) -> np.ndarray:
+    """
+    Smoothed head speed per frame, matching confidence.HeadMotionTracker:
+    speeds are per 30 fps reference frame, jumps above MAX_JUMP hold the
+    smoothed value, and frames without a reliable face read 0.
+    """
+    speed = np.zeros(len(t), dtype=np.float64)
+    reliable = np.flatnonzero(np.nan_to_num(score, nan=0.0) >= confidence.CONF_MIN)
+    if len(reliable) < 2:
+        return speed
+
+    elapsed = np.maximum(np.diff(t[reliable]) * confidence.REFERENCE_FPS, 1.0)
+    instant = np.hypot(np.diff(cx[reliable]), np.diff(cy[reliable])) / elapsed
+    decay = confidence.ALPHA ** elapsed
+    # A jump feeds the current smoothed value back in, i.e. the state is held.
+    decay[instant > confidence.MAX_JUMP] = 1.0
+    speed[reliable[1:]] = _ema(instant, decay)
+    return speed
+
+
+def summarize(frames: np.ndarray) -> Dict[str, float]:
+    face = ~np.isnan(frames["score"])
+    unstable = face & (frames["speed"] > confidence.UNSTABLE_SPEED)
+    return confidence.HeadMotionTracker._stats(
+        len(frames), int(face.sum()), int(unstable.sum()), float(frames["speed"][face].sum())
+    )
+
+
+def analyze_video(path: str, **detect_options) -> Tuple[np.ndarray, Dict[str, float]]:
+    t, detections = detect_video(path, **detect_options)
+    frames = np.zeros(len(t), dtype=FRAME_DTYPE)
+    frames["t"] = t
+    frames["cx"], frames["cy"], frames["score"] = detections.T
+    frames["speed"] = head_speeds(t, detections[:, 0], detections[:, 1], detections[:, 2])
+    summary = summarize(frames)
+    summary["durationSec"] = float(t[-1]) if len(t) else 0.0
+    return frames, summary
+
+
+# --- 3. Artifacts ---
+
+def save(session_id: str, frames: np.ndarray, summary: Dict[str, float]) -> str:
+    """Writes the metrics next to the session's other artifacts; confidence.summary_for reads them back."""
+    os.makedirs(confidence.CONFIDENCE_ARTIFACT_DIR, exist_ok=True)
+    path = confidence.artifact_path(session_id)
+    np.savez_compressed(path, frames=frames, summary=np.array(json.dumps(summary)))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--session-id", required=True)
+    parser.add_argument("--fps", type=float, default=confidence.CONFIDENCE_TARGET_FPS, help="Frames analysed per second of video.")
+    parser.add_argument("--workers", type=int, default=confidence.CONFIDENCE_WORKERS)
+    args = parser.parse_args()
+
+    frames, summary = analyze_video(args.video, target_fps=args.fps, workers=args.workers)
+    path = save(args.session_id, frames, summary)
+    print(json.dumps(summary, indent=2))
+    print(f"Saved {len(frames)} frames of metrics to {path}")
+
+
+if __name__ == "__main__":
+    main()
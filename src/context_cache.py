@@ -0,0 +1,115 @@
+"""
+Provider-side caching of the shared system-instruction prefix.
+
+Every turn of a session, and every session for the same (role, difficulty,
+JD), starts with the same system instruction (see prompts). Providers bill
+a cached prefix at a fraction of the normal input price, but only above a
+minimum size of about 1024 tokens. The built-in instructions reach that
+once a full job description is pasted in.
+
+- Gemini: an explicit cache (`caches.create`) per (model, instruction). It
+  is created in the background the first time the instruction is seen
+  (that call still sends it inline), then referenced through
+  `cached_content` until shortly before it expires. The create call is a
+  model call like any other (llm_runtime.call_model), at background
+  priority.
+- Anthropic: the system block is marked `cache_control: ephemeral`.
+- OpenAI caches stable prefixes on its own; keeping them first is enough.
+"""
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+from .context_window import estimate_tokens
+from .llm_runtime import call_model
+from . import admission, metrics
+
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "1") == "1"
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))   # providers' minimum cacheable prefix
+CONTEXT_CACHE_TTL_SEC = int(os.getenv("CONTEXT_CACHE_TTL_SEC", "900"))
+CONTEXT_CACHE_RETRY_SEC = 300   # after a failed create, send instructions inline for this long
+MAX_CACHES = 256
+
+CACHE_LOOKUPS = metrics.counter(
+    "llm_context_cache_total",
+    "Shared system-instruction cache use by provider and outcome (hit, miss, created, failed).",
+    ("provider", "outcome")
+)
+
+
+def cacheable(system_instruction: str) -> bool:
+    return CONTEXT_CACHE_ENABLED and estimate_tokens(system_instruction) >= CONTEXT_CACHE_MIN_TOKENS
+
+
+class GeminiPrefixCache:
+    def __init__(self, ttl_sec: int = CONTEXT_CACHE_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._names: "OrderedDict[tuple, tuple[str, float]]" = OrderedDict()   # key -> (cache name, use until)
+        self._creating: Dict[tuple, asyncio.Task] = {}
+        self._retry_at = 0.0
+
+    def lookup(self, client, model: str, system_instruction: str) -> Optional[str]:
+        """Name of a live cache holding `system_instruction`, or None (one is then created in the background)."""
+        if not cacheable(system_instruction):
+            return None
+        key = (model, hashlib.sha256(system_instruction.encode()).hexdigest())
+        now = time.monotonic()
+        entry = self._names.get(key)
+        if entry is not None and entry[1] > now:
+            self._names.move_to_end(key)
+            CACHE_LOOKUPS.inc(1, "gemini", "hit")
+            return entry[0]
+        CACHE_LOOKUPS.inc(1, "gemini", "miss")
+        if key not in self._creating and now >= self._retry_at:
+            task = asyncio.create_task(self._create(client, key, model, system_instruction))
+            self._creating[key] = task
+            task.add_done_callback(lambda _: self._creating.pop(key, None))
+        return None
+
+    async def _create(self, client, key: tuple, model: str, system_instruction: str):
+        from google.genai import types
+        admission.background()   # quota and a slot behind live calls; the request that saw the miss goes inline
+        try:
+            cache = await call_model(
+                model,
+                lambda: client.aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(system_instruction=system_instruction, ttl=f"{self.ttl_sec}s")
+                ),
+                usage_of=lambda response: None   # no tokens generated; the cached ones are billed on use
+            )
+        except Exception as e:
+            print(f"Context cache creation failed for {model}: {e}")
+            CACHE_LOOKUPS.inc(1, "gemini", "failed")
+            self._retry_at = time.monotonic() + CONTEXT_CACHE_RETRY_SEC
+            return
+        # Stop referencing it a little before the provider deletes it.
+        self._names[key] = (cache.name, time.monotonic() + self.ttl_sec * 0.9)
+        while len(self._names) > MAX_CACHES:
+            self._names.popitem(last=False)   # the provider expires it on its own TTL
+        CACHE_LOOKUPS.inc(1, "gemini", "created")
+
+    def invalidate(self, name: str):
+        """Forgets a cache the provider no longer recognises."""
+        for key in [key for key, (cached, _) in self._names.items() if cached == name]:
+            del self._names[key]
+
+    def config(self, client, model: str, system_instruction: str, **settings):
+        """GenerateContentConfig that references the cached instruction when one is live, else sends it inline."""
+        from google.genai import types
+        name = self.lookup(client, model, system_instruction)
+        if name is not None:
+            return types.GenerateContentConfig(cached_content=name, **settings)
+        return types.GenerateContentConfig(system_instruction=system_instruction, **settings)
+
+
+def anthropic_system(system: str):
+    """The system prompt as a cache-marked block when it is long enough to be cached."""
+    if not cacheable(system):
+        return system
+    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+
+gemini_prefix_cache = GeminiPrefixCache()
@@ -0,0 +1,117 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "6"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "1024"))
+
+SUMMARY_QUESTION_WORDS = 18
+SUMMARY_ANSWER_WORDS = 30
+
+_SENTENCE_END = re.compile(r"(?<=[.?!])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def answered_turns(history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Drops open-question placeholders that are followed by the same question with its answer."""
+    turns = []
+    for index, turn in enumerate(history):
+        is_placeholder = not turn.get('A') and index + 1 < len(history) and history[index + 1].get('Q') == turn.get('Q')
+        if not is_placeholder:
+            turns.append(turn)
+    return turns
+
+
+def _clip(text: str, max_words: int) -> str:
+    first_sentence = _SENTENCE_END.split(text.strip(), 1)[0]
+    words = first_sentence.split()
+    clipped = " ".join(words[:max_words])
+    return clipped + ("..." if len(words) > max_words or first_sentence != text.strip() else "")
+
+
+def compress_turn(turn: Dict[str, str]) -> str:
+    answer = turn.get('A') or "(no answer)"
+    return f"- Asked: {_clip(turn.get('Q', ''), SUMMARY_QUESTION_WORDS)} | Candidate: {_clip(answer, SUMMARY_ANSWER_WORDS)}"
+
+
+def format_turn(turn: Dict[str, str]) -> str:
+    return f"Interviewer: {turn.get('Q', '')}\nCandidate: {turn.get('A', '')}\n"
+
+
+class HistoryContext:
+    """
+    Builds the interview-history block of the question prompt for one session.
+    The last `recent_turns` turns are kept verbatim; older turns are compressed
+    into one summary line each, appended only when a turn leaves the window.
+    The oldest summary lines are dropped once the block exceeds `token_budget`.
+    """
+
+    def __init__(self, recent_turns: int = CONTEXT_RECENT_TURNS, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_lines: List[str] = []
+        self.summary_tokens = 0
+        self.summarized_upto = 0
+        self.dropped = 0
+
+    def _reset(self):
+        self.summary_lines, self.summary_tokens, self.summarized_upto, self.dropped = [], 0, 0, 0
+
+    def render(self, history: List[Dict[str, str]]) -> str:
+        turns = answered_turns(history)
+        cutoff = max(0, len(turns) - self.recent_turns)
+        if cutoff < self.summarized_upto:
+            self._reset()
+
+        # Incremental: only turns that just fell out of the window get compressed.
+        for turn in turns[self.summarized_upto:cutoff]:
+            line = compress_turn(turn)
+            self.summary_lines.append(line)
+            self.summary_tokens += estimate_tokens(line)
+        self.summarized_upto = max(self.summarized_upto, cutoff)
+
+        recent = "".join(format_turn(turn) for turn in turns[cutoff:])
+        recent_tokens = estimate_tokens(recent)
+        while self.summary_lines and self.summary_tokens + recent_tokens > self.token_budget:
+            self.summary_tokens -= estimate_tokens(self.summary_lines.pop(0))
+            self.dropped += 1
+
+        if not self.summary_lines and not self.dropped:
+            return recent
+
+        header = "EARLIER TURNS (summarized):\n"
+        if self.dropped:
+            header += f"- ({self.dropped} earliest turns omitted)\n"
+        return header + "\n".join(self.summary_lines) + "\n\nRECENT TURNS:\n" + recent
+
+
+class ContextRegistry:
+    """LRU of HistoryContext objects so summaries persist across a session's turns."""
+
+    def __init__(self, max_sessions: int = CONTEXT_CACHE_SIZE):
+        self.max_sessions = max_sessions
+        self._contexts: "OrderedDict[str, HistoryContext]" = OrderedDict()
+
+    def get(self, session_id: Optional[str]) -> HistoryContext:
+        if session_id is None:
+            return HistoryContext()
+        context = self._contexts.get(session_id)
+        if context is None:
+            context = HistoryContext()
+            self._contexts[session_id] = context
+            while len(self._contexts) > self.max_sessions:
+                self._contexts.popitem(last=False)
+        self._contexts.move_to_end(session_id)
+        return context
+
+    def discard(self, session_id: str):
+        self._contexts.pop(session_id, None)
+
+
+history_contexts = ContextRegistry()
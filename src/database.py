@@ -1,23 +1,44 @@
 import os
+import copy
 import json
-from firebase_admin import initialize_app, firestore, credentials
-from typing import Dict, Any, List 
-from dotenv import load_dotenv
-
-load_dotenv() 
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional
+from .metrics import span
+from .session_store import SessionBackend, SessionCache, FirestoreBackend, MemoryBackend, SQLiteBackend, Turn
+from . import metrics, session_shards
 
 FIREBASE_CREDENTIALS_JSON = os.getenv('FIREBASE_CREDENTIALS_JSON')
 SERVICE_ACCOUNT_PATH = os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH') # Local fallback
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'firestore').lower()
+SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH', 'sessions.db')
+SESSION_WRITE_BEHIND = os.getenv('SESSION_WRITE_BEHIND', '1') == '1'
+SESSION_WRITE_RETRIES = int(os.getenv('SESSION_WRITE_RETRIES', '5'))   # background writes; backoff 0.5s, 1s, 2s, ...
+SESSION_WRITE_BACKOFF_SEC = float(os.getenv('SESSION_WRITE_BACKOFF_SEC', '0.5'))
 DB = None 
 GLOBAL_DB_MANAGER = None
+_firebase_lock = threading.Lock()  # the app's warm-up may initialize from a worker thread
+
+WRITE_FAILURES = metrics.counter(
+    "session_write_failures_total",
+    "Background session writes that failed, by outcome: retried, or dropped once SESSION_WRITE_RETRIES ran out.",
+    ("outcome",)
+)
+
 
 def initialize_firebase():
     """Initializes the Firebase Admin SDK using the appropriate method (Env Var or File)."""
+    with _firebase_lock:
+        _initialize_firebase()
+
+
+def _initialize_firebase():
     global DB
-    
+
     if DB is not None:
         return
 
+    from firebase_admin import initialize_app, firestore_async, credentials
     cred = None
     
     if FIREBASE_CREDENTIALS_JSON:
@@ -40,7 +61,7 @@ def initialize_firebase():
     if cred:
         try:
             initialize_app(cred)
-            DB = firestore.client()
+            DB = firestore_async.client()
         except Exception as e:
             print(f"ERROR: Failed to initialize Firebase App: {e}")
             DB = None
@@ -50,55 +71,190 @@ def initialize_firebase():
 
 
 class SessionManager:
-    """Manages CRUD operations for interview sessions in Firestore."""
+    """
+    Manages interview sessions on top of a pluggable backend.
+    Hot sessions are served from process memory, so a turn costs at most one
+    backend read (on a cache miss) and one write.
+    """
     
-    def __init__(self):
-        if DB is None:
-            raise ConnectionError("Firestore client not initialized. Check credentials.")
-        self.db = DB
-        self.collection = 'interview_sessions' 
+    def __init__(self, backend: SessionBackend, cache: Optional[SessionCache] = None, write_behind: bool = SESSION_WRITE_BEHIND,
+                 write_retries: int = SESSION_WRITE_RETRIES, write_backoff_sec: float = SESSION_WRITE_BACKOFF_SEC):
+        self.backend = backend
+        self.cache = cache if cache is not None else SessionCache()
+        self.write_behind = write_behind
+        self.write_retries = write_retries
+        self.write_backoff_sec = write_backoff_sec
+        self._pending: Dict[str, asyncio.Task] = {}
 
-    
-    def get_session_ref(self, session_id: str):
-        return self.db.collection(self.collection).document(session_id)
+    async def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self.cache.get(session_id)
+        if session is not None:
+            return session
+        # An evicted session may still have a write in flight; let it land first.
+        pending = self._pending.get(session_id)
+        if pending is not None:
+            await pending
+        with span("db_read"):
+            session = await self.backend.load(session_id)
+        if session is not None:
+            session.setdefault('history', [])
+            self.cache.put(session_id, session)
+        return session
 
-    def start_session(self, session_id: str, role: str, user_id: str = "guest"):
-        session_ref = self.get_session_ref(session_id)
-        session_ref.set({
+    async def _write(self, session_id: str, write):
+        """
+        Runs a backend write inline, or queues it behind earlier writes for the
+        same session. The caller has already answered by then, so a queued write
+        that fails is retried with backoff; the cached session (and any later
+        write) waits for it meanwhile.
+        """
+        if not self.write_behind:
+            with span("db_write"):
+                await write()
+            return
+
+        previous = self._pending.get(session_id)
+
+        async def run():
+            if previous is not None:
+                await previous
+            for attempt in range(self.write_retries + 1):
+                try:
+                    with span("db_write"):
+                        await write()
+                    return
+                except Exception as e:
+                    if attempt == self.write_retries:
+                        print(f"ERROR: Session write failed for {session_id} after {attempt + 1} attempts: {e}")
+                        WRITE_FAILURES.inc(1, "dropped")
+                        # The backend no longer matches the cache; the next read goes back to it.
+                        self.cache.discard(session_id)
+                        return
+                    print(f"WARNING: Session write failed for {session_id}, retrying: {e}")
+                    WRITE_FAILURES.inc(1, "retried")
+                    await asyncio.sleep(self.write_backoff_sec * 2 ** attempt)
+
+        task = asyncio.create_task(run())
+        self._pending[session_id] = task
+        task.add_done_callback(lambda t: self._pending.pop(session_id, None) if self._pending.get(session_id) is t else None)
+
+    async def start_session(self, session_id: str, role: str, user_id: str = "guest", first_question: Optional[str] = None,
+                            difficulty: Optional[str] = None, job_description: Optional[str] = None):
+        history = [Turn(0, first_question)] if first_question is not None else []
+        session = {
             'user_id': user_id,
             'role': role,
             'status': 'active',
-            'created_at': firestore.SERVER_TIMESTAMP,
-            'history': []
-        })
-
-    def get_history(self, session_id: str) -> List[Dict[str, str]]:
-        session_ref = self.get_session_ref(session_id)
-        doc = session_ref.get()
-        if doc.exists:
-            return doc.to_dict().get('history', [])
-        return []
-
-    def append_qa_pair(self, session_id: str, question: str, answer: str):
-        session_ref = self.get_session_ref(session_id)
-        new_qa = {'Q': question, 'A': answer}
-        session_ref.update({
-            'history': firestore.ArrayUnion([new_qa])
-        })
+            'history': history
+        }
+        # Kept so the session can be re-graded later with the same expectations (see batch_eval)
+        if difficulty:
+            session['difficulty'] = difficulty
+        if job_description:
+            session['job_description'] = job_description
+        self.cache.put(session_id, copy.deepcopy(session))
+        await self._write(session_id, lambda: self.backend.create(session_id, session))
+
+    async def get_history(self, session_id: str) -> List[Turn]:
+        session = await self._load(session_id)
+        return list(session['history']) if session else []
+
+    async def record_turn(self, session_id: str, answered: Optional[Dict[str, str]] = None, next_question: Optional[str] = None):
+        """
+        Fills in the answer to the open question and opens the next one. Only
+        those turns are written (one write), never the whole history.
+        """
+        session = await self._load(session_id)
+        if session is None:
+            print(f"WARNING: No session {session_id} to record a turn in.")
+            return
+        history = session['history']
+        changed = []
+        if answered is not None:
+            question, answer = answered.get('Q', ''), answered.get('A') or ''
+            last = history[-1] if history else None
+            if last is not None and not last.answer and last.question == question:
+                # A new object rather than a mutation: histories already handed out stay as they were
+                history[-1] = Turn(last.index, question, answer)
+                changed.append(history[-1])
+            elif not any(turn.question == question and turn.answer == answer for turn in history):
+                history.append(Turn(len(history), question, answer))
+                changed.append(history[-1])
+        if next_question is not None and not (history and history[-1].question == next_question and not history[-1].answer):
+            history.append(Turn(len(history), next_question))
+            changed.append(history[-1])
+        if not changed:
+            return   # a repeat of turns already recorded
+        await self._write(session_id, lambda: self.backend.save_turns(session_id, changed))
+
+    async def append_qa_pair(self, session_id: str, question: str, answer: str):
+        await self.record_turn(session_id, answered={'Q': question, 'A': answer})
     
-    def save_final_report(self, session_id: str, report: Dict[str, Any]):
-        session_ref = self.get_session_ref(session_id)
-        session_ref.update({
-            'status': 'completed',
-            'final_report': report,
-            'completed_at': firestore.SERVER_TIMESTAMP
-        })
+    async def save_final_report(self, session_id: str, report: Dict[str, Any]):
+        session = self.cache.get(session_id)
+        if session is not None:
+            session.update({'status': 'completed', 'final_report': report})
+        await self._write(session_id, lambda: self.backend.save_report(session_id, report))
+
+    async def evict(self, session_id: str):
+        """Lands queued writes for a session and drops it from the cache (another worker now owns it)."""
+        pending = self._pending.get(session_id)
+        if pending is not None:
+            await pending
+        self.cache.discard(session_id)
+
+    async def flush(self):
+        """Waits for all queued writes to reach the backend."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending.values()), return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+        await self.backend.close()
+
+
+def create_backend() -> SessionBackend:
+    """Selects the storage backend from SESSION_BACKEND (firestore | memory | sqlite)."""
+    if SESSION_BACKEND == "memory":
+        return MemoryBackend()
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteBackend(SESSION_SQLITE_PATH)
+
+    initialize_firebase()
+    if DB is None:
+        raise ConnectionError("Firestore client not initialized. Check credentials.")
+    return FirestoreBackend(DB)
 
 
 def get_db_manager() -> 'SessionManager':
-    """Returns the single, initialized SessionManager instance."""
+    """Returns the single, initialized SessionManager instance (sharded across workers with SESSION_SHARDING=1)."""
     global GLOBAL_DB_MANAGER
     if GLOBAL_DB_MANAGER is None:
-        initialize_firebase() 
-        GLOBAL_DB_MANAGER = SessionManager()
-    return GLOBAL_DB_MANAGER
\ No newline at end of file
+        manager = SessionManager(create_backend())
+        if session_shards.SESSION_SHARDING and session_shards.fcntl is not None:
+            manager = session_shards.ShardedSessionManager(manager)
+        GLOBAL_DB_MANAGER = manager
+    return GLOBAL_DB_MANAGER
+
+
+async def start_db_manager():
+    """With SESSION_SHARDING=1, joins this worker's shard before it serves requests."""
+    if not session_shards.SESSION_SHARDING:
+        return
+    if session_shards.fcntl is None:
+        print("WARNING: SESSION_SHARDING needs flock (POSIX); each worker keeps its own sessions.")
+        return
+    try:
+        manager = await asyncio.to_thread(get_db_manager)
+    except ConnectionError as e:
+        print(f"ERROR: Session shard not started: {e}")
+        return
+    await manager.start()
+
+
+async def close_db_manager():
+    """Flushes pending session writes and releases the backend on shutdown."""
+    global GLOBAL_DB_MANAGER
+    if GLOBAL_DB_MANAGER is not None:
+        await GLOBAL_DB_MANAGER.close()
+        GLOBAL_DB_MANAGER = None
@@ -0,0 +1,133 @@
+"""
+Idempotent turn submission for /interview/generate_question.
+
+Clients retry a turn when the response is slow, often while the first
+request is still waiting on the model. Each request maps to a turn key:
+the Idempotency-Key header when the client sends one, otherwise the session
+plus the turn being answered (InterviewRequest.turn) or, failing that, the
+answer text. Requests with the same key share one execution: a duplicate
+that arrives mid-flight awaits the same task. Only keys that name the turn
+(the header, or `turn`) also get the stored result for IDEMPOTENCY_TTL_SEC
+after it finished. The same answer text, or a call without an answer, can
+legitimately come again for the next question, so those keys are only
+coalesced while in flight. Failures are not stored, so a retry after an
+error runs again.
+
+Executions for one session also run one at a time, under a per-session
+lock that exists only while it is in use, so two different turns cannot
+interleave their history reads and writes. The work runs in its own task:
+a client that disconnects does not cancel a turn its retry is waiting for.
+Coalescing is per worker. With SESSION_SHARDING a retry may reach another
+worker; the stored history (see routers.interview._recorded_reply) still
+stops it from recording the turn twice.
+"""
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from . import metrics
+
+IDEMPOTENCY_TTL_SEC = float(os.getenv("IDEMPOTENCY_TTL_SEC", "60"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+TURNS = metrics.counter(
+    "turn_requests_total",
+    "Question requests by how they were served: executed, coalesced onto one in flight, or replayed from a recent result.",
+    ("outcome",)
+)
+
+
+def turn_key(session_id: str, idempotency_key: Optional[str], turn: Optional[int], answer: Optional[str]) -> Tuple[str, bool]:
+    """(key, whether a finished result may be replayed for it)."""
+    if idempotency_key:
+        return f"{session_id}:key:{idempotency_key}", True
+    if answer is None:
+        return f"{session_id}:open", False   # start or resume: whatever question is open at the time
+    if turn is not None:
+        return f"{session_id}:turn:{turn}", True
+    return f"{session_id}:answer:{hashlib.blake2b(answer.encode(), digest_size=16).hexdigest()}", False
+
+
+class _SessionLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class TurnCoalescer:
+    def __init__(self, ttl_sec: float = IDEMPOTENCY_TTL_SEC, max_entries: int = IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._results: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._locks: Dict[str, _SessionLock] = {}
+
+    @asynccontextmanager
+    async def session_lock(self, session_id: str):
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _SessionLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del self._locks[session_id]
+
+    def _result(self, key: str) -> Optional[Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl_sec:
+            del self._results[key]
+            return None
+        return result
+
+    def _store(self, key: str, result: Any):
+        self._results[key] = (time.monotonic(), result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def _execute(self, session_id: str, key: str, produce: Callable[[], Awaitable[Any]], replay: bool) -> Any:
+        try:
+            async with self.session_lock(session_id):
+                result = await produce()
+            if replay:
+                self._store(key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def run(self, session_id: str, key: str, produce: Callable[[], Awaitable[Any]], replay: bool = True) -> Any:
+        """
+        Result of `produce()` for this turn key, running it only if no duplicate
+        is in flight or (with `replay`) just done.
+        """
+        result = self._result(key) if replay else None
+        if result is not None:
+            TURNS.inc(1, "replayed")
+            return result
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._execute(session_id, key, produce, replay))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())   # waiters may all be gone
+            self._in_flight[key] = task
+            TURNS.inc(1, "executed")
+        else:
+            TURNS.inc(1, "coalesced")
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._in_flight), "results": len(self._results), "locked_sessions": len(self._locks)}
+
+
+turn_coalescer = TurnCoalescer()
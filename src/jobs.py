@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+from .database import get_db_manager
+from .models import EvaluationRequest, EvaluationReport
+from . import llm, metrics, confidence
+
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+EVAL_JOB_TTL_SEC = float(os.getenv("EVAL_JOB_TTL_SEC", "3600"))
+EVAL_JOBS_SQLITE_PATH = os.getenv("EVAL_JOBS_SQLITE_PATH")  # set to survive restarts
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+class EvaluationJob:
+    """One evaluation run for a session, tracked from submission to report."""
+
+    def __init__(self, request: EvaluationRequest, job_id: Optional[str] = None, status: str = QUEUED):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.request = request
+        self.status = status
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.turns: Optional[int] = None   # history length the report covers; unknown for restored jobs until they run
+        self.updated_at = time.time()
+        self.done = asyncio.Event()
+
+    @property
+    def session_id(self) -> str:
+        return self.request.session_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "report": self.report,
+            "error": self.error,
+        }
+
+
+class SQLiteJobStore:
+    """Optional persistence so queued and running jobs are picked up again after a restart."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS eval_jobs (job_id TEXT PRIMARY KEY, session_id TEXT NOT NULL, "
+                "request TEXT NOT NULL, status TEXT NOT NULL, report TEXT, error TEXT, updated_at REAL NOT NULL)"
+            )
+
+    def _save(self, job: EvaluationJob):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO eval_jobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.job_id, job.session_id, job.request.model_dump_json(), job.status,
+                 json.dumps(job.report) if job.report is not None else None, job.error, job.updated_at)
+            )
+
+    def _unfinished(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT job_id, request FROM eval_jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+        return [EvaluationJob(EvaluationRequest.model_validate_json(request), job_id=job_id) for job_id, request in rows]
+
+    async def save(self, job: EvaluationJob):
+        await asyncio.to_thread(self._save, job)
+
+    async def unfinished(self):
+        return await asyncio.to_thread(self._unfinished)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class EvaluationQueue:
+    """
+    In-process evaluation queue. A fixed pool of workers caps how many evaluation
+    calls run at once, independently of question traffic. Submitting a session that
+    already has a queued, running or recently completed job for the same number of
+    turns returns that job; a session that gained turns since is evaluated again.
+    """
+
+    def __init__(self, workers: int = EVAL_WORKERS, store: Optional[SQLiteJobStore] = None):
+        self.workers = workers
+        self.store = store
+        self.jobs: Dict[str, EvaluationJob] = {}
+        self.by_session: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store is not None:
+            for job in await self.store.unfinished():
+                self._track(job)
+                self._queue.put_nowait(job)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store is not None:
+            self.store.close()
+
+    def _track(self, job: EvaluationJob):
+        self.jobs[job.job_id] = job
+        self.by_session[job.session_id] = job.job_id
+
+    def _purge_expired(self):
+        cutoff = time.time() - EVAL_JOB_TTL_SEC
+        for job_id in [j.job_id for j in self.jobs.values() if j.done.is_set() and j.updated_at < cutoff]:
+            job = self.jobs.pop(job_id)
+            if self.by_session.get(job.session_id) == job_id:
+                del self.by_session[job.session_id]
+
+    async def submit(self, request: EvaluationRequest) -> EvaluationJob:
+        if self._queue is None:
+            raise RuntimeError("Evaluation queue is not running.")
+        self._purge_expired()
+
+        turns = len(await get_db_manager().get_history(request.session_id))
+        existing_id = self.by_session.get(request.session_id)
+        existing = self.jobs.get(existing_id) if existing_id else None
+        if existing is not None and existing.status != FAILED and existing.turns in (None, turns):
+            return existing
+
+        job = EvaluationJob(request)
+        job.turns = turns
+        self._track(job)
+        if self.store is not None:
+            await self.store.save(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[EvaluationJob]:
+        return self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _set_status(self, job: EvaluationJob, status: str):
+        job.status = status
+        job.updated_at = time.time()
+        if self.store is not None:
+            await self.store.save(job)
+
+    async def _run(self, job: EvaluationJob):
+        req = job.request
+        db_manager = get_db_manager()
+        history = await db_manager.get_history(req.session_id)
+        job.turns = len(history)
+        print(f"DEBUG: Evaluating Session {req.session_id} with {len(history)} turns.")
+
+        evaluation_data = await llm.get_final_evaluation_json(
+            role=req.role,
+            history=history,
+            difficulty=req.difficulty,
+            job_description=req.job_description or ""
+        )
+        # A failed call comes back as an "Error" report: fail the job rather than store it over the last good one
+        if evaluation_data.get("final_verdict") == "Error":
+            raise RuntimeError(evaluation_data.get("detailed_feedback") or "Evaluation failed.")
+        report = EvaluationReport(**evaluation_data)
+        report.confidence_metrics = confidence.summary_for(req.session_id)
+        await db_manager.save_final_report(req.session_id, report.model_dump())
+        return report.model_dump()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._set_status(job, RUNNING)
+                job.report = await self._run(job)
+                await self._set_status(job, COMPLETED)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Evaluation Error: {e}")
+                job.error = str(e)
+                await self._set_status(job, FAILED)
+            finally:
+                if job.status in (COMPLETED, FAILED):
+                    job.done.set()
+                self._queue.task_done()
+
+
+evaluation_queue = EvaluationQueue(store=SQLiteJobStore(EVAL_JOBS_SQLITE_PATH) if EVAL_JOBS_SQLITE_PATH else None)
+metrics.gauge("evaluation_queue_depth", "Evaluation jobs waiting for a worker.", evaluation_queue.depth)
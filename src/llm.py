@@ -1,23 +1,22 @@
-import os
+import copy
 import json
+import math
 import re
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# --- 1. Client Initialization ---
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("WARNING: GEMINI_API_KEY not found in environment variables.")
-        client = None
-    else:
-        client = genai.Client(api_key=api_key)
-except Exception as e:
-    print(f"LLM Initialization Error: {e}")
-    client = None
+from typing import AsyncIterator, Optional
+from .llm_runtime import stream_content
+from .llm_router import LLMRequest, build_router
+from .clients import registry
+from .response_cache import opener_cache, prompt_key
+from .context_window import history_contexts
+from .context_cache import gemini_prefix_cache
+from . import prompts, semantic_cache
+from .metrics import span
+from .models import EvaluationReport
+from . import metrics
+
+# --- 1. Clients ---
+# SDK clients live in clients.registry (one shared connection pool) and calls
+# are spread across providers by llm_router.
 
 # --- Helper: Clean JSON Markdown ---
 def clean_json_text(text: str) -> str:
@@ -30,72 +29,265 @@ def clean_json_text(text: str) -> str:
 
 # --- 2. Interviewer Logic (Question Generation) ---
 
-def generate_contextual_question(
+QUESTION_MODEL = "gemini-2.0-flash"
+FALLBACK_QUESTION = "Could you elaborate on your experience with these skills?"
+UNAVAILABLE_QUESTION = "Error: AI Service Unavailable. Please check backend logs."
+
+# Gemini first, then any other provider with credentials (see llm_router)
+router = build_router(QUESTION_MODEL)
+
+def build_question_prompt(
     role: str, 
     history: list[dict] = None, 
     difficulty: str = "Medium", 
-    job_description: str = ""
+    job_description: str = "",
+    session_id: Optional[str] = None
+) -> tuple[str, str]:
+    """
+    Returns (system_instruction, user_prompt) for the next interview question.
+    """
+    # Static per (role, difficulty, JD): formatted once, shared by every turn (see prompts)
+    system_instruction = prompts.question_instruction(role, difficulty, job_description or "", not history)
+    if not history:
+        user_prompt = "Start the interview."
+    else:
+        # Recent turns verbatim, older ones as a bounded rolling summary
+        conversation_text = history_contexts.get(session_id).render(history)
+        user_prompt = f"INTERVIEW HISTORY:\n{conversation_text}\n\nGenerate the next question."
+
+    return system_instruction, user_prompt
+
+
+def _question_config(client, system_instruction: str):
+    return gemini_prefix_cache.config(
+        client, QUESTION_MODEL, system_instruction,
+        temperature=0.7, 
+        max_output_tokens=150
+    )
+
+
+def _question_request(system_instruction: str, user_prompt: str) -> LLMRequest:
+    return LLMRequest("question", system_instruction, user_prompt, temperature=0.7, max_output_tokens=150)
+
+
+def _similar_answer_key(system_instruction: str, history: list[dict]) -> Optional[tuple[str, tuple[str, ...]]]:
+    """Semantic cache key for follow-ups to the first answers of a session, else None."""
+    if not semantic_cache.SEMANTIC_CACHE_ENABLED or not history or len(history) > semantic_cache.SEMANTIC_CACHE_MAX_TURNS:
+        return None
+    return semantic_cache.turns_key(QUESTION_MODEL, system_instruction, history)
+
+
+async def generate_contextual_question(
+    role: str, 
+    history: list[dict] = None, 
+    difficulty: str = "Medium", 
+    job_description: str = "",
+    session_id: Optional[str] = None
 ) -> str:
     """
     Generates the next interview question based on Role, Difficulty, and JD.
     """
+    if not router.available():
+        return UNAVAILABLE_QUESTION
+
+    system_instruction, user_prompt = build_question_prompt(role, history, difficulty, job_description, session_id)
+
+    # Openers depend only on (role, difficulty, JD), so they are served from a pool of variants
+    cache_key = None
+    if not history:
+        cache_key = prompt_key(QUESTION_MODEL, system_instruction, user_prompt)
+        cached = opener_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Near-identical early answers get the follow-up already generated for them
+    similar_key = _similar_answer_key(system_instruction, history)
+    if similar_key is not None:
+        cached = semantic_cache.followup_cache.lookup(*similar_key)
+        if cached is not None:
+            return cached
+
+    try:
+        question = (await router.complete(_question_request(system_instruction, user_prompt))).strip()
+        if cache_key is not None and question:
+            opener_cache.add(cache_key, question)
+        if similar_key is not None and question:
+            semantic_cache.followup_cache.add(*similar_key, question)
+        return question
+    except Exception as e:
+        print(f"Question Generation Error: {e}")
+        return FALLBACK_QUESTION
+
+
+async def stream_contextual_question(
+    role: str, 
+    history: list[dict] = None, 
+    difficulty: str = "Medium", 
+    job_description: str = "",
+    session_id: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Same as generate_contextual_question, but yields text chunks as the model produces them.
+    Streaming is Gemini-only; if the stream fails before any text arrives, the
+    question comes from the router (other providers) or the fallback instead.
+    """
+    client = registry.gemini()
     if client is None:
-        return "Error: AI Service Unavailable. Please check backend logs."
+        yield await generate_contextual_question(role, history, difficulty, job_description, session_id)
+        return
 
-    # Format history for context
-    conversation_text = ""
-    if history:
-        for turn in history:
-            conversation_text += f"Interviewer: {turn.get('Q', '')}\nCandidate: {turn.get('A', '')}\n"
+    system_instruction, user_prompt = build_question_prompt(role, history, difficulty, job_description, session_id)
 
-    # Context String
-    jd_context = f"Focus strictly on these key skills/scope: {job_description}" if job_description else "Focus on core concepts for this role."
-    
-    # Dynamic System Instruction
+    cache_key = None
     if not history:
-        # START PHASE
-        system_instruction = (
-            f"You are a strict technical interviewer for a {role} position. "
-            f"Difficulty Level: {difficulty}. "
-            f"{jd_context} "
-            "Start with a foundational question related to the job scope. "
-            "Do not greet. Go straight to the question. Keep it under 2 sentences."
-        )
-        user_prompt = "Start the interview."
-    else:
-        # FOLLOW-UP PHASE
-        system_instruction = (
-            f"You are a technical interviewer for a {role} position. "
-            f"Current Difficulty: {difficulty}. "
-            f"{jd_context} "
-            "Analyze the candidate's last answer. "
-            "Rules:\n"
-            "1. If the answer is vague, ask 'Why?' or 'How?'.\n"
-            "2. If the answer is wrong, correct them briefly and move on.\n"
-            "3. If the answer is good, increase the complexity based on the difficulty level.\n"
-            "Output: JUST the question."
-        )
-        user_prompt = f"INTERVIEW HISTORY:\n{conversation_text}\n\nGenerate the next question."
+        cache_key = prompt_key(QUESTION_MODEL, system_instruction, user_prompt)
+        cached = opener_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
 
+    similar_key = _similar_answer_key(system_instruction, history)
+    if similar_key is not None:
+        cached = semantic_cache.followup_cache.lookup(*similar_key)
+        if cached is not None:
+            yield cached
+            return
+
+    produced = []
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
+        async for chunk in stream_content(
+            client,
+            model=QUESTION_MODEL,
             contents=[user_prompt],
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=0.7, 
-                max_output_tokens=150
-            )
-        )
-        return response.text.strip()
+            config=_question_config(client, system_instruction)
+        ):
+            if chunk.text:
+                produced.append(chunk.text)
+                yield chunk.text
+        if cache_key is not None and produced:
+            opener_cache.add(cache_key, "".join(produced).strip())
+        if similar_key is not None and produced:
+            semantic_cache.followup_cache.add(*similar_key, "".join(produced).strip())
     except Exception as e:
-        print(f"Question Generation Error: {e}")
-        return "Could you elaborate on your experience with these skills?"
+        print(f"Question Streaming Error: {e}")
+        if not produced:
+            try:
+                yield (await router.complete(_question_request(system_instruction, user_prompt))).strip()
+            except Exception as e:
+                print(f"Question Generation Error: {e}")
+                yield FALLBACK_QUESTION
 
 
 # --- 3. Grader Logic (Evaluation) ---
 
-def get_final_evaluation_json(
+VERDICTS = ["Strong Hire", "Hire", "Weak Hire", "No Hire"]
+SCORE_FIELDS = ("technical_score", "clarity_score", "fluency_score")
+LIST_FIELDS = ("technical_strengths", "technical_weaknesses", "improvement_plan", "learning_resources")
+LOCAL_FIELDS = {"confidence_metrics"}  # filled in by the backend, not the model
+
+EVALUATION_OUTCOMES = metrics.counter(
+    "evaluation_parse_total", "Evaluation responses by outcome (valid, repaired, failed).", ("outcome",)
+)
+EVALUATION_REPAIRS = metrics.counter(
+    "evaluation_repairs_total", "Fields of evaluation responses fixed locally.", ("field",)
+)
+
+
+def evaluation_response_schema() -> dict:
+    """Response schema for the grader, taken from EvaluationReport so the two can't drift."""
+    schema = EvaluationReport.model_json_schema()
+    properties = {
+        name: {k: v for k, v in prop.items() if k not in ("title", "default")}
+        for name, prop in schema["properties"].items() if name not in LOCAL_FIELDS
+    }
+    properties["final_verdict"]["enum"] = VERDICTS
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+EVALUATION_SCHEMA = evaluation_response_schema()
+
+
+def _as_score(value):
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    score = float(value)
+    if not math.isfinite(score):
+        raise ValueError(f"Score is not a finite number: {value!r}")
+    return min(100, max(0, round(score)))
+
+
+def validate_evaluation(text: str) -> tuple[dict, list[str]]:
+    """
+    Parses the grader's JSON and fixes what can be fixed locally: scores out of
+    range or sent as floats/strings, lists missing or sent as a single string,
+    missing text fields and verdict casing. Returns (report, repaired fields).
+    Raises ValueError when the response is unusable (not JSON, or a score is missing).
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(clean_json_text(text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Response is not JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object.")
+
+    repairs = []
+    report = {}
+    for field in SCORE_FIELDS:
+        value = data.get(field)
+        if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 100:
+            report[field] = value
+            continue
+        try:
+            report[field] = _as_score(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Missing or invalid {field}: {value!r}")
+        repairs.append(field)
+
+    for field in LIST_FIELDS:
+        value = data.get(field)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            report[field] = value
+            continue
+        if value is None:
+            report[field] = []
+        elif isinstance(value, list):
+            report[field] = [str(item) for item in value if item is not None]
+        else:
+            report[field] = [str(value)]
+        repairs.append(field)
+
+    feedback = data.get("detailed_feedback")
+    report["detailed_feedback"] = feedback if isinstance(feedback, str) else ""
+    if not isinstance(feedback, str):
+        repairs.append("detailed_feedback")
+
+    verdict = data.get("final_verdict")
+    text = verdict.strip() if isinstance(verdict, str) else ""
+    report["final_verdict"] = next((v for v in VERDICTS if v.lower() == text.lower()), text or "Pending")
+    if report["final_verdict"] != verdict:
+        repairs.append("final_verdict")
+
+    return EvaluationReport.model_validate(report).model_dump(exclude=LOCAL_FIELDS), repairs
+
+
+def _failed_report() -> dict:
+    return {
+        "technical_score": 0,
+        "clarity_score": 0,
+        "fluency_score": 0,
+        "detailed_feedback": "Failed to generate report.",
+        "technical_strengths": [],
+        "technical_weaknesses": [],
+        "improvement_plan": [],
+        "learning_resources": [],
+        "final_verdict": "Error"
+    }
+
+
+async def get_final_evaluation_json(
     role: str, 
     history: list[dict], 
     difficulty: str = "Medium", 
@@ -120,9 +312,11 @@ def get_final_evaluation_json(
             "final_verdict": "Fail"
         }
 
-    if client is None:
+    if not router.available():
         return {
             "technical_score": 0, 
+            "clarity_score": 0,
+            "fluency_score": 0,
             "detailed_feedback": "AI Service Unavailable.", 
             "final_verdict": "Error",
             "technical_strengths": [],
@@ -132,84 +326,39 @@ def get_final_evaluation_json(
             "learning_resources": []
         }
 
-    # Format transcript
-    transcript = ""
-    for idx, turn in enumerate(history):
-        transcript += f"{idx+1}. Q: {turn.get('Q', '')}\n   A: {turn.get('A', '(No Answer provided)')}\n"
-
-    jd_context = f"Candidate must demonstrate proficiency in: {job_description}" if job_description else ""
-
     # --- STRONG EVALUATION PROMPT ---
-    system_instruction = (
-        f"You are a 'Bar Raiser' Recruiter for a {role}. "
-        f"Difficulty Expected: {difficulty}. "
-        f"{jd_context} "
-        "Evaluate the candidate based STRICTLY on the transcript provided. "
-        "Do not hallucinate competence."
-    )
+    # Rubric and rules are static per (role, difficulty, JD), so they lead as a cacheable prefix;
+    # the transcript follows.
+    system_instruction = prompts.evaluation_instruction(role, difficulty, job_description or "")
+    prompt = prompts.evaluation_prompt(history)
 
-    prompt = f"""
-    TRANSCRIPT:
-    {transcript}
-
-    INSTRUCTIONS:
-    1. SCORING RUBRIC (0-100) based on {difficulty} level expectations:
-       - 0-30: Nonsense or completely wrong.
-       - 31-60: Surface-level knowledge, major gaps.
-       - 61-80: Solid answers, minor mistakes.
-       - 81-100: Expert depth, covers edge cases.
-    
-    2. RULES:
-       - If answers are one-word or off-topic, Technical Score MUST be < 30.
-    
-    OUTPUT FORMAT (JSON ONLY):
-    {{
-        "technical_score": (integer 0-100),
-        "clarity_score": (integer 0-100),
-        "fluency_score": (integer 0-100),
-        "detailed_feedback": "A professional paragraph summarizing performance.",
-        "technical_strengths": ["Specific Skill 1", "Specific Skill 2"],
-        "technical_weaknesses": ["Specific Skill 1", "Specific Skill 2"],
-        
-        "improvement_plan": [
-            "Actionable Step 1 (e.g., 'Practice SQL Window Functions')", 
-            "Actionable Step 2",
-            "Actionable Step 3"
-        ],
-        "learning_resources": [
-            "Resource 1 (e.g., 'Book: Cracking the Coding Interview')",
-            "Resource 2 (e.g., 'Documentation: React Hooks')"
-        ],
-        
-        "final_verdict": "Strong Hire" | "Hire" | "Weak Hire" | "No Hire"
-    }}
-    """
+    # Near-identical answers to each of the same questions get the same grade (see semantic_cache)
+    similar_key = None
+    if semantic_cache.SEMANTIC_CACHE_ENABLED:
+        similar_key = semantic_cache.turns_key(QUESTION_MODEL, system_instruction, history)
+        cached = semantic_cache.evaluation_cache.lookup(*similar_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                temperature=0.2
-            )
-        )
-        
-        cleaned_text = clean_json_text(response.text)
-        result = json.loads(cleaned_text)
-        return result
-
+        text = await router.complete(LLMRequest(
+            "evaluation", system_instruction, prompt, temperature=0.2, json_schema=EVALUATION_SCHEMA
+        ))
     except Exception as e:
         print(f"Evaluation Error: {e}")
-        return {
-            "technical_score": 0,
-            "clarity_score": 0,
-            "fluency_score": 0,
-            "detailed_feedback": "Failed to generate report.",
-            "technical_strengths": [],
-            "technical_weaknesses": [],
-            "improvement_plan": [],
-            "learning_resources": [],
-            "final_verdict": "Error"
-        }
\ No newline at end of file
+        return _failed_report()
+
+    with span("json_parse"):
+        try:
+            report, repairs = validate_evaluation(text)
+        except ValueError as e:
+            print(f"Evaluation Parse Error: {e}")
+            EVALUATION_OUTCOMES.inc(1, "failed")
+            return _failed_report()
+
+    for field in repairs:
+        EVALUATION_REPAIRS.inc(1, field)
+    EVALUATION_OUTCOMES.inc(1, "repaired" if repairs else "valid")
+    if similar_key is not None:
+        semantic_cache.evaluation_cache.add(*similar_key, copy.deepcopy(report))
+    return report
@@ -0,0 +1,344 @@
+"""
+Routes text generation across LLM providers (Gemini, OpenAI, Anthropic).
+
+Providers are tried in LLM_PROVIDERS order, skipping any without an API key
+or with an open circuit breaker. If the first attempt has not answered by the
+LLM_HEDGE_PERCENTILE latency of recent calls of the same kind, a hedged
+attempt goes to the next provider (or the same one when it is the only one)
+and whichever answers first wins; the other is cancelled. An attempt that
+fails fails over to the next provider straight away, and that attempt is
+hedged on its own provider's latency.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from .llm_runtime import LLM_TIMEOUT_SEC, call_model, generate_content
+from .clients import registry
+from .context_cache import gemini_prefix_cache, anthropic_system
+from . import metrics
+
+# --- Configuration ---
+LLM_PROVIDERS = [p.strip() for p in os.getenv("LLM_PROVIDERS", "gemini,openai,anthropic").split(",") if p.strip()]
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest")
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "250"))
+LLM_HEDGE_DEFAULT_MS = float(os.getenv("LLM_HEDGE_DEFAULT_MS", "3000"))  # until enough samples are in
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SEC = float(os.getenv("LLM_BREAKER_COOLDOWN_SEC", "30"))
+LATENCY_WINDOW = 512
+MIN_SAMPLES = 20
+
+HEDGES = metrics.counter(
+    "llm_hedged_requests_total", "Hedged second attempts by call kind and whether the hedge answered first.",
+    ("kind", "outcome")
+)
+FAILOVERS = metrics.counter(
+    "llm_failovers_total", "Failed attempts that moved on to the next provider, by the provider that failed.", ("provider",)
+)
+BREAKER_TRIPS = metrics.counter(
+    "llm_breaker_trips_total", "Times a provider's circuit breaker opened.", ("provider",)
+)
+
+
+class LLMRequest:
+    """Provider-neutral description of one generation call."""
+
+    __slots__ = ("kind", "system_instruction", "prompt", "temperature", "max_output_tokens", "json_schema")
+
+    def __init__(self, kind: str, system_instruction: str, prompt: str, temperature: float,
+                 max_output_tokens: Optional[int] = None, json_schema: Optional[dict] = None):
+        self.kind = kind
+        self.system_instruction = system_instruction
+        self.prompt = prompt
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.json_schema = json_schema
+
+
+# --- 1. Providers ---
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self, model: str, get_client: Callable = registry.gemini):
+        self.get_client = get_client  # looked up on every call so the client can be swapped (benchmarks)
+        self.model = model
+
+    def available(self) -> bool:
+        return self.get_client() is not None
+
+    async def complete(self, request: LLMRequest, timeout: float) -> str:
+        client = self.get_client()
+        config = gemini_prefix_cache.config(
+            client, self.model, request.system_instruction,
+            temperature=request.temperature,
+            max_output_tokens=request.max_output_tokens
+        )
+        if request.json_schema is not None:
+            config.response_mime_type = "application/json"
+            config.response_schema = request.json_schema
+        try:
+            response = await generate_content(
+                client, model=self.model, contents=[request.prompt], config=config, timeout=timeout
+            )
+        except Exception as e:
+            if config.cached_content and getattr(e, "code", None) in (400, 403, 404):
+                gemini_prefix_cache.invalidate(config.cached_content)
+            raise
+        return response.text or ""
+
+
+class OpenAIProvider:
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_MODEL):
+        self.model = model
+
+    @property
+    def client(self):
+        return registry.get("openai")
+
+    def available(self) -> bool:
+        return self.client is not None
+
+    async def complete(self, request: LLMRequest, timeout: float) -> str:
+        options = {}
+        if request.max_output_tokens is not None:
+            options["max_tokens"] = request.max_output_tokens
+        if request.json_schema is not None:
+            options["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": request.kind, "schema": request.json_schema},
+            }
+        response = await call_model(
+            self.model,
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": request.system_instruction},
+                    {"role": "user", "content": request.prompt},
+                ],
+                temperature=request.temperature,
+                **options
+            ),
+            timeout,
+            usage_of=lambda r: r.usage and SimpleNamespace(
+                prompt_token_count=r.usage.prompt_tokens, candidates_token_count=r.usage.completion_tokens,
+                cached_content_token_count=getattr(r.usage.prompt_tokens_details, "cached_tokens", None)
+            )
+        )
+        return response.choices[0].message.content or ""
+
+
+class AnthropicProvider:
+    name = "anthropic"
+
+    def __init__(self, model: str = ANTHROPIC_MODEL):
+        self.model = model
+
+    @property
+    def client(self):
+        return registry.get("anthropic")
+
+    def available(self) -> bool:
+        return self.client is not None
+
+    async def complete(self, request: LLMRequest, timeout: float) -> str:
+        system = request.system_instruction
+        if request.json_schema is not None:
+            # No schema-constrained mode here; the caller validates and repairs the JSON.
+            system += f"\nRespond with only a JSON object matching this JSON schema: {request.json_schema}"
+        response = await call_model(
+            self.model,
+            lambda: self.client.messages.create(
+                model=self.model,
+                system=anthropic_system(system),
+                messages=[{"role": "user", "content": request.prompt}],
+                temperature=request.temperature,
+                max_tokens=request.max_output_tokens or 2048
+            ),
+            timeout,
+            # input_tokens excludes the prompt-cache reads and writes
+            usage_of=lambda r: SimpleNamespace(
+                prompt_token_count=r.usage.input_tokens + (r.usage.cache_read_input_tokens or 0)
+                + (r.usage.cache_creation_input_tokens or 0),
+                candidates_token_count=r.usage.output_tokens,
+                cached_content_token_count=r.usage.cache_read_input_tokens
+            )
+        )
+        return "".join(block.text for block in response.content if block.type == "text")
+
+
+# --- 2. Health and Latency Tracking ---
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed calls; while open the provider is
+    skipped. After `cooldown` seconds a single trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN_SEC):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.trial_running or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self.trial_running = True
+        return True
+
+    def success(self):
+        self.consecutive = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def failure(self):
+        self.consecutive += 1
+        if self.trial_running or (self.opened_at is None and self.consecutive >= self.failures):
+            if self.opened_at is None:
+                print(f"LLM provider {self.name} circuit opened after {self.consecutive} failures")
+                BREAKER_TRIPS.inc(1, self.name)
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def release(self):
+        """A trial call that was cancelled tells us nothing; let the next one try."""
+        self.trial_running = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies (seconds) for one (provider, kind)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+# --- 3. Router ---
+
+class LLMRouter:
+    def __init__(self, providers: List, hedge: bool = LLM_HEDGE_ENABLED,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE, timeout: float = LLM_TIMEOUT_SEC):
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.timeout = timeout
+        self.breakers: Dict[str, CircuitBreaker] = {p.name: CircuitBreaker(p.name) for p in providers}
+        self._latency: Dict[tuple, LatencyTracker] = {}
+
+    def available(self) -> bool:
+        return any(p.available() for p in self.providers)
+
+    def hedge_delay(self, provider, kind: str) -> float:
+        """Seconds to wait on an attempt before hedging it."""
+        tracker = self._latency.get((provider.name, kind))
+        observed = tracker.percentile(self.hedge_percentile) if tracker else None
+        delay_ms = LLM_HEDGE_DEFAULT_MS if observed is None else max(LLM_HEDGE_MIN_MS, observed * 1000)
+        return delay_ms / 1000
+
+    async def _attempt(self, provider, request: LLMRequest) -> str:
+        breaker = self.breakers[provider.name]
+        start = time.perf_counter()
+        try:
+            text = await provider.complete(request, self.timeout)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            print(f"LLM provider {provider.name} failed: {e}")
+            breaker.failure()
+            raise
+        breaker.success()
+        self._latency.setdefault((provider.name, request.kind), LatencyTracker()).add(time.perf_counter() - start)
+        return text
+
+    async def complete(self, request: LLMRequest) -> str:
+        """
+        Returns the first successful completion. Raises the last provider error
+        if every usable provider failed, or RuntimeError if none was usable.
+        """
+        queue = [p for p in self.providers if p.available()]
+        attempts: Dict[asyncio.Task, tuple] = {}   # task -> (provider, is the hedge)
+        error: Optional[Exception] = None
+
+        def launch(is_hedge: bool = False):
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].allow():
+                    attempts[asyncio.create_task(self._attempt(provider, request))] = (provider, is_hedge)
+                    return provider
+            return None
+
+        def hedge_at(provider):
+            return time.monotonic() + self.hedge_delay(provider, request.kind) if self.hedge else None
+
+        current = launch()
+        if current is None:
+            raise RuntimeError("No LLM provider is available (missing keys or open circuits).")
+        hedge_deadline = hedge_at(current)
+
+        try:
+            while attempts:
+                timeout = None if hedge_deadline is None else max(0.0, hedge_deadline - time.monotonic())
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slow attempt: hedge to the next provider, or to the same one if it is the only one.
+                    hedge_deadline = None
+                    if not launch(is_hedge=True) and self.breakers[current.name].allow():
+                        attempts[asyncio.create_task(self._attempt(current, request))] = (current, True)
+                    continue
+
+                for task in done:
+                    failed, is_hedge = attempts.pop(task)
+                    if task.exception() is None:
+                        if is_hedge or any(hedge for _, hedge in attempts.values()):
+                            HEDGES.inc(1, request.kind, "won" if is_hedge else "lost")
+                        return task.result()
+                    error = task.exception()
+                if not attempts:
+                    current = launch()
+                    if current is not None:
+                        FAILOVERS.inc(1, failed.name)
+                        hedge_deadline = hedge_at(current)
+        finally:
+            for task in attempts:
+                task.cancel()
+        raise error
+
+
+def build_router(gemini_model: str) -> LLMRouter:
+    """Providers from LLM_PROVIDERS, in order; ones without credentials stay unavailable."""
+    factories = {
+        "gemini": lambda: GeminiProvider(gemini_model),
+        "openai": OpenAIProvider,
+        "anthropic": AnthropicProvider,
+    }
+    providers = []
+    for name in LLM_PROVIDERS:
+        if name not in factories:
+            print(f"WARNING: unknown LLM provider '{name}' in LLM_PROVIDERS")
+            continue
+        providers.append(factories[name]())
+    return LLMRouter(providers)
@@ -0,0 +1,113 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable
+from .metrics import span, record_llm_call
+from . import admission
+
+# --- Runtime Limits (per worker) ---
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "30"))
+STT_TIMEOUT_SEC = float(os.getenv("STT_TIMEOUT_SEC", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+
+_call_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_in_flight = 0
+
+
+def in_flight_calls() -> int:
+    """Model calls started and not yet finished (including ones waiting for a slot)."""
+    return _in_flight
+
+
+def client_http_options():
+    """Gemini HttpOptions; GEMINI_BASE_URL points the SDK at a local stand-in."""
+    from google.genai import types
+    return types.HttpOptions(base_url=os.getenv("GEMINI_BASE_URL") or None)
+
+
+async def call_model(model: str, call: Callable[[], Awaitable], timeout: float = LLM_TIMEOUT_SEC,
+                     usage_of: Callable = lambda response: getattr(response, "usage_metadata", None)):
+    """
+    Runs one provider call (any SDK) under the provider quota (admission), the shared
+    slots, deadline and latency metrics. `call` builds the request coroutine; `usage_of`
+    maps the response to Gemini-style usage.
+    """
+    async def _call():
+        await admission.controller.acquire()
+        async with _call_slots:
+            return await call()
+
+    global _in_flight
+    start = time.perf_counter()
+    outcome = "error"
+    response = None
+    _in_flight += 1
+    try:
+        with span("llm_call"):
+            response = await asyncio.wait_for(_call(), timeout=timeout)
+        outcome = "ok"
+        return response
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise TimeoutError(f"LLM call to {model} exceeded {timeout:.0f}s")
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        _in_flight -= 1
+        record_llm_call(model, time.perf_counter() - start, outcome, usage_of(response) if response is not None else None)
+
+
+async def generate_content(client, *, model: str, contents, config, timeout: float = LLM_TIMEOUT_SEC):
+    """
+    Runs one Gemini call on the SDK's async client without blocking the event loop.
+    The timeout covers waiting for quota and a free slot, and the call itself.
+    """
+    return await call_model(
+        model,
+        lambda: client.aio.models.generate_content(model=model, contents=contents, config=config),
+        timeout
+    )
+
+
+async def stream_content(client, *, model: str, contents, config, timeout: float = LLM_TIMEOUT_SEC):
+    """
+    Streams a Gemini response chunk by chunk. The slot is held until the stream ends,
+    and the timeout applies to the wait for each chunk rather than the whole reply.
+    """
+    async def _start():
+        await admission.controller.acquire()
+        await _call_slots.acquire()
+
+    global _in_flight
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(_start(), timeout=timeout)
+    except asyncio.TimeoutError:
+        record_llm_call(model, time.perf_counter() - start, "timeout")
+        raise TimeoutError(f"No quota or free Gemini slot for {model} within {timeout:.0f}s")
+    _in_flight += 1
+
+    outcome = "error"
+    usage = None
+    try:
+        stream = await asyncio.wait_for(
+            client.aio.models.generate_content_stream(model=model, contents=contents, config=config),
+            timeout=timeout
+        )
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                outcome = "ok"
+                return
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise TimeoutError(f"Gemini stream from {model} stalled for {timeout:.0f}s")
+    finally:
+        _in_flight -= 1
+        _call_slots.release()
+        record_llm_call(model, time.perf_counter() - start, outcome, usage)
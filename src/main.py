@@ -1,22 +1,49 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware 
-from contextlib import asynccontextmanager
-from src.routers import interview 
-from src.database import initialize_firebase 
 from dotenv import load_dotenv
-import os
 
-load_dotenv() 
+load_dotenv()  # once, before any module reads its settings
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    print("Application Startup: Initializing services...")
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import PlainTextResponse  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+from src.routers import interview, admin  # noqa: E402
+from src.database import initialize_firebase, start_db_manager, close_db_manager  # noqa: E402
+from src.jobs import evaluation_queue  # noqa: E402
+from src import metrics, confidence, audio_features, batch_eval  # noqa: E402
+from src.clients import registry  # noqa: E402
+import os  # noqa: E402
+import asyncio  # noqa: E402
+
+_warm_up_task = None
+
+
+def _warm_up():
+    """Imports the heavy SDKs and builds their clients (runs on a worker thread)."""
     if os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH'):
         initialize_firebase()
     else:
         print("WARNING: Skipping Firebase initialization.")
+    registry.build_all()
+    audio_features.load_av()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _warm_up_task
+    print("Application Startup: Initializing services...")
+    # Warm-up runs in the background so the port binds and /health answers right away;
+    # a request that arrives first builds what it needs on first use.
+    _warm_up_task = asyncio.create_task(asyncio.to_thread(_warm_up))
+    await start_db_manager()
+    await evaluation_queue.start()
     yield 
     print("Application Shutdown: Cleaning up resources...")
+    await _warm_up_task
+    await batch_eval.stop()
+    await evaluation_queue.stop()
+    await registry.aclose()
+    confidence.shutdown()
+    await close_db_manager()
 
 app = FastAPI(
     title="AI Mock Interview Platform API",
@@ -38,8 +65,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.TracingMiddleware)
+
 app.include_router(interview.router)
+app.include_router(admin.router)
 
 @app.get("/health", tags=["Health"])
 async def health():
-    return {"status": "ok", "service": "AI Mock Interview Backend"}
\ No newline at end of file
+    warm = _warm_up_task is not None and _warm_up_task.done()
+    return {"status": "ok", "service": "AI Mock Interview Backend", "warm": warm}
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, stage and model-call latencies."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
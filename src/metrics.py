@@ -0,0 +1,211 @@
+import os
+import time
+import asyncio
+import functools
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi.routing import APIRoute
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+# --- 1. Metric Types (Prometheus text format) ---
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help_text, self.labelnames = name, help_text, labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.labelnames = name, help_text, labelnames
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above last bucket, sum, total count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time (queue depths, cache sizes)."""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name, self.help_text, self.read = name, help_text, read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+
+_registry: List = []
+
+
+def counter(name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    metric = Counter(name, help_text, labelnames)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+    metric = Histogram(name, help_text, labelnames, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def gauge(name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+    metric = Gauge(name, help_text, read)
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- 2. Core Series ---
+
+REQUEST_SECONDS = histogram("interview_request_seconds", "End-to-end latency of /interview requests.", ("route", "method", "status"))
+STAGE_SECONDS = histogram("interview_stage_seconds", "Latency of individual request stages.", ("route", "stage"))
+LLM_SECONDS = histogram("llm_call_seconds", "Latency of outbound model calls.", ("model", "outcome"))
+LLM_PROMPT_TOKENS = histogram("llm_prompt_tokens", "Prompt tokens per model call.", ("model",), TOKEN_BUCKETS)
+LLM_OUTPUT_TOKENS = histogram("llm_output_tokens", "Output tokens per model call.", ("model",), TOKEN_BUCKETS)
+LLM_CACHED_TOKENS = histogram("llm_cached_prompt_tokens", "Prompt tokens served from the provider's context cache.", ("model",), TOKEN_BUCKETS)
+
+
+# --- 3. Request Tracing ---
+
+class RequestTrace:
+    __slots__ = ("route", "start")
+
+    def __init__(self):
+        self.route = "unmatched"
+        self.start = time.perf_counter()
+
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Times one stage of the current /interview request. Background work started by the request is included."""
+    trace = _trace.get() if METRICS_ENABLED else None
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, trace.route, stage)
+
+
+def record_llm_call(model: str, seconds: float, outcome: str, usage=None):
+    """Tags a model call with its latency and token usage (from the SDK's usage_metadata)."""
+    if not METRICS_ENABLED:
+        return
+    LLM_SECONDS.observe(seconds, model, outcome)
+    if usage is not None:
+        if usage.prompt_token_count is not None:
+            LLM_PROMPT_TOKENS.observe(usage.prompt_token_count, model)
+        if usage.candidates_token_count is not None:
+            LLM_OUTPUT_TOKENS.observe(usage.candidates_token_count, model)
+        if getattr(usage, "cached_content_token_count", None):
+            LLM_CACHED_TOKENS.observe(usage.cached_content_token_count, model)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware (streaming-safe) that opens a trace for every /interview request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/interview"):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _trace.set(trace)
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _trace.reset(token)
+            REQUEST_SECONDS.observe(time.perf_counter() - trace.start, trace.route, scope["method"], status)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route class that labels the trace with the route template and records the
+    time spent before the endpoint runs (body read + pydantic validation).
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router() rebuilds routes with the prefixed path; always wrap the original endpoint.
+        endpoint = getattr(endpoint, "__untimed__", endpoint)
+        if METRICS_ENABLED and asyncio.iscoroutinefunction(endpoint):
+            endpoint = self._timed(path, endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _timed(path: str, endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            trace = _trace.get()
+            if trace is not None:
+                trace.route = path
+                STAGE_SECONDS.observe(time.perf_counter() - trace.start, path, "parse")
+            return await endpoint(*args, **kwargs)
+        timed_endpoint.__untimed__ = endpoint
+        return timed_endpoint
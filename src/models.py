@@ -7,6 +7,7 @@ class InterviewRequest(BaseModel):
     user_id: str = Field("guest", description="ID of the user, used for database indexing.") 
     role: str = Field(..., description="The job role being interviewed for (e.g., 'Data Analyst').")
     user_answer: Optional[str] = Field(None, description="The user's last transcribed answer text.")
+    turn: Optional[int] = Field(None, ge=0, description="Index of the question being answered (the `turn` of the last response); makes retries of the turn safe.")
     difficulty: Optional[str] = "medium"
     
     job_description: Optional[str] = Field(None, description="Optional job description text.")
@@ -30,14 +31,15 @@ class TranscriptionResponse(BaseModel):
     """Output after transcribing user audio via Gemini Multimodal STT."""
     session_id: str
     transcript: str
-    duration_sec: float = Field(..., description="Estimated duration of the audio in seconds.") 
-    audio_features: Dict[str, float] = Field(..., description="Structured analysis features (WPM, filler rate).") 
+    duration_sec: float = Field(..., description="Duration of the audio in seconds (estimated if it could not be decoded).") 
+    audio_features: Dict[str, float] = Field(..., description="Locally measured features (WPM, filler rate, voiced ratio, pauses).") 
 
 class InterviewResponse(BaseModel):
     """Output containing the AI's question."""
     session_id: str
     ai_question: str
     is_complete: bool = False
+    turn: Optional[int] = Field(None, description="Index of this question; send it back as `turn` with the answer.")
 
 class EvaluationReport(BaseModel):
     """The structured output model for the LLM evaluation (0-100 scores)."""
@@ -53,4 +55,31 @@ class EvaluationReport(BaseModel):
     improvement_plan: List[str] = Field(..., description="Step-by-step actionable plan.")
     learning_resources: List[str] = Field(..., description="Suggested books or documentation.")
     
-    final_verdict: str = "Pending"
\ No newline at end of file
+    final_verdict: str = "Pending"
+
+    confidence_metrics: Optional[Dict[str, float]] = Field(None, description="Head-stability metrics from the video feed, when one was streamed.")
+
+class EvaluationJobStatus(BaseModel):
+    """Status of a queued evaluation; `report` is set once the job completes."""
+    job_id: str
+    session_id: str
+    status: str = Field(..., description="queued | running | completed | failed")
+    report: Optional[EvaluationReport] = None
+    error: Optional[str] = None
+
+class BatchEvaluationRequest(BaseModel):
+    """Options for re-grading completed sessions in bulk (see batch_eval)."""
+    concurrency: int = Field(8, ge=1, le=64, description="Evaluations in flight at once (at most BATCH_EVAL_MAX_CALLS).")
+    limit: Optional[int] = Field(None, ge=1, description="Stop after this many sessions; the next run continues from the checkpoint.")
+    difficulty: str = Field("Medium", description="For sessions that did not store their difficulty.")
+    job_description: str = Field("", description="For sessions that did not store their JD.")
+    restart: bool = Field(False, description="Discard the checkpoint and re-grade from the first session.")
+
+class BatchEvaluationStatus(BaseModel):
+    status: str = Field(..., description="pending | running | completed | cancelled | failed")
+    processed: int = Field(..., description="Sessions graded or failed in this run.")
+    graded_total: int
+    failed_total: int
+    cursor: Optional[str] = Field(None, description="Every session up to this session_id has been written or has failed.")
+    sessions_per_minute: float
+    error: Optional[str] = None
@@ -0,0 +1,91 @@
+"""
+Prompt templates for the interviewer and the grader.
+
+The instruction blocks depend only on (role, difficulty, JD), so each
+combination is formatted once and reused for every turn and every session
+that shares it. Everything static sits in the system instruction and the
+per-session text (history, transcript) comes after it. That gives providers
+the same prefix on every call to cache (see context_cache). Transcript
+lines are memoized per turn, so a 50-turn evaluation only formats turns it
+has not seen before.
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "512"))          # (role, difficulty, JD) combinations
+TRANSCRIPT_LINE_CACHE_SIZE = int(os.getenv("TRANSCRIPT_LINE_CACHE_SIZE", "8192"))
+
+NO_ANSWER = "(No Answer provided)"
+
+
+# --- 1. Interviewer ---
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def question_instruction(role: str, difficulty: str, job_description: str, opening: bool) -> str:
+    """System instruction for the opening question, or for follow-ups when `opening` is False."""
+    jd_context = f"Focus strictly on these key skills/scope: {job_description}" if job_description else "Focus on core concepts for this role."
+    if opening:
+        return (
+            f"You are a strict technical interviewer for a {role} position. "
+            f"Difficulty Level: {difficulty}. "
+            f"{jd_context} "
+            "Start with a foundational question related to the job scope. "
+            "Do not greet. Go straight to the question. Keep it under 2 sentences."
+        )
+    return (
+        f"You are a technical interviewer for a {role} position. "
+        f"Current Difficulty: {difficulty}. "
+        f"{jd_context} "
+        "Analyze the candidate's last answer. "
+        "Rules:\n"
+        "1. If the answer is vague, ask 'Why?' or 'How?'.\n"
+        "2. If the answer is wrong, correct them briefly and move on.\n"
+        "3. If the answer is good, increase the complexity based on the difficulty level.\n"
+        "Output: JUST the question."
+    )
+
+
+# --- 2. Grader ---
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def evaluation_instruction(role: str, difficulty: str, job_description: str) -> str:
+    """System instruction for the final evaluation: persona, rubric, rules and output fields."""
+    jd_context = f"Candidate must demonstrate proficiency in: {job_description}" if job_description else ""
+    return (
+        f"You are a 'Bar Raiser' Recruiter for a {role}. "
+        f"Difficulty Expected: {difficulty}. "
+        f"{jd_context} "
+        "Evaluate the candidate based STRICTLY on the transcript provided. "
+        "Do not hallucinate competence.\n\n"
+        "INSTRUCTIONS:\n"
+        f"1. SCORING RUBRIC (0-100) based on {difficulty} level expectations:\n"
+        "   - 0-30: Nonsense or completely wrong.\n"
+        "   - 31-60: Surface-level knowledge, major gaps.\n"
+        "   - 61-80: Solid answers, minor mistakes.\n"
+        "   - 81-100: Expert depth, covers edge cases.\n"
+        "2. RULES:\n"
+        "   - If answers are one-word or off-topic, Technical Score MUST be < 30.\n"
+        "OUTPUT:\n"
+        "   - detailed_feedback: one professional paragraph summarizing performance.\n"
+        "   - technical_strengths / technical_weaknesses: specific skills.\n"
+        "   - improvement_plan: about 3 actionable steps (e.g., 'Practice SQL Window Functions').\n"
+        "   - learning_resources: specific books or documentation."
+    )
+
+
+@lru_cache(maxsize=TRANSCRIPT_LINE_CACHE_SIZE)
+def transcript_line(number: int, question: str, answer: str) -> str:
+    return f"{number}. Q: {question}\n   A: {answer}\n"
+
+
+def build_transcript(history: List[Dict[str, str]]) -> str:
+    """Numbered Q/A transcript; each turn's line is formatted once and joined, not concatenated."""
+    return "".join(
+        transcript_line(index + 1, turn.get('Q', ''), turn.get('A', NO_ANSWER))
+        for index, turn in enumerate(history)
+    )
+
+
+def evaluation_prompt(history: List[Dict[str, str]]) -> str:
+    return f"TRANSCRIPT:\n{build_transcript(history)}"
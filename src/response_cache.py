@@ -0,0 +1,129 @@
+import os
+import re
+import time
+import random
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from . import metrics
+
+OPENER_POOL_SIZE = int(os.getenv("OPENER_POOL_SIZE", "5"))
+OPENER_CACHE_TTL_SEC = float(os.getenv("OPENER_CACHE_TTL_SEC", "86400"))
+OPENER_CACHE_MAX_KEYS = int(os.getenv("OPENER_CACHE_MAX_KEYS", "512"))
+OPENER_CACHE_SQLITE_PATH = os.getenv("OPENER_CACHE_SQLITE_PATH")  # set to share pools across workers
+
+
+def prompt_key(model: str, *parts: str) -> str:
+    """Content hash of a prompt, insensitive to case and whitespace differences."""
+    normalized = "\x1f".join(re.sub(r"\s+", " ", p).strip().lower() for p in (model, *parts))
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class SQLitePoolStore:
+    """Pools shared between workers on the same host through one SQLite file."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_pool (key TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS response_pool_key ON response_pool (key)")
+
+    def load(self, key: str, ttl_sec: float) -> List[str]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT response FROM response_pool WHERE key = ? AND created_at > ?",
+                (key, time.time() - ttl_sec)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def add(self, key: str, response: str, ttl_sec: float):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM response_pool WHERE key = ? AND created_at <= ?",
+                (key, time.time() - ttl_sec)
+            )
+            self.conn.execute(
+                "INSERT INTO response_pool (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class ResponsePool:
+    """
+    Keeps up to `pool_size` model responses per prompt key. A key only counts as
+    a hit once its pool is full, so early sessions keep generating fresh variants
+    and later sessions pick one of them at random.
+    """
+
+    def __init__(self, pool_size: int = OPENER_POOL_SIZE, ttl_sec: float = OPENER_CACHE_TTL_SEC,
+                 max_keys: int = OPENER_CACHE_MAX_KEYS, shared: Optional[SQLitePoolStore] = None):
+        self.pool_size = pool_size
+        self.ttl_sec = ttl_sec
+        self.max_keys = max_keys
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._pools: "OrderedDict[str, tuple[float, List[str]]]" = OrderedDict()
+
+    def _local_pool(self, key: str) -> List[str]:
+        entry = self._pools.get(key)
+        if entry is None:
+            return []
+        created_at, pool = entry
+        if time.monotonic() - created_at > self.ttl_sec:
+            del self._pools[key]
+            return []
+        self._pools.move_to_end(key)
+        return pool
+
+    def _store_local(self, key: str, pool: List[str]):
+        created_at = self._pools[key][0] if key in self._pools else time.monotonic()
+        self._pools[key] = (created_at, pool)
+        self._pools.move_to_end(key)
+        while len(self._pools) > self.max_keys:
+            self._pools.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        pool = self._local_pool(key)
+        if len(pool) < self.pool_size and self.shared is not None:
+            pool = self.shared.load(key, self.ttl_sec)[:self.pool_size]
+            if pool:
+                self._store_local(key, pool)
+        if len(pool) >= self.pool_size:
+            self.hits += 1
+            return random.choice(pool)
+        self.misses += 1
+        return None
+
+    def add(self, key: str, response: str):
+        pool = list(self._local_pool(key))
+        if len(pool) >= self.pool_size:
+            return
+        pool.append(response)
+        self._store_local(key, pool)
+        if self.shared is not None:
+            self.shared.add(key, response, self.ttl_sec)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "keys": len(self._pools),
+        }
+
+
+opener_cache = ResponsePool(shared=SQLitePoolStore(OPENER_CACHE_SQLITE_PATH) if OPENER_CACHE_SQLITE_PATH else None)
+metrics.gauge("opener_cache_hits", "Opening questions served from the response pool.", lambda: opener_cache.hits)
+metrics.gauge("opener_cache_misses", "Opening questions that needed a model call.", lambda: opener_cache.misses)
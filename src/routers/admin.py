@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+import os
+import secrets
+from ..database import get_db_manager
+from .. import batch_eval
+from ..models import BatchEvaluationRequest, BatchEvaluationStatus
+from ..metrics import TimedRoute
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")   # admin endpoints answer 404 while unset
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    route_class=TimedRoute,
+    dependencies=[Depends(_require_admin)]
+)
+
+@router.post("/evaluations/batch", response_model=BatchEvaluationStatus, status_code=202)
+async def start_batch_evaluation(req: BatchEvaluationRequest):
+    """Re-grades completed sessions in the background, resuming from the last checkpoint."""
+    try:
+        backend = get_db_manager().backend
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=f"Database Unavailable: {e}")
+    try:
+        run = batch_eval.start(
+            backend, restart=req.restart, concurrency=req.concurrency, limit=req.limit,
+            difficulty=req.difficulty, job_description=req.job_description
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return BatchEvaluationStatus(**run.progress())
+
+@router.get("/evaluations/batch", response_model=BatchEvaluationStatus)
+async def batch_evaluation_status():
+    run = batch_eval.current()
+    if run is None:
+        raise HTTPException(status_code=404, detail="No batch evaluation has been started on this worker.")
+    return BatchEvaluationStatus(**run.progress())
@@ -1,17 +1,68 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from fastapi.responses import StreamingResponse
+import io
 import uuid
+import json
+import math
+import asyncio
+from typing import Callable, Optional
 from ..database import get_db_manager 
-from .. import stt_service, llm
+from ..session_store import with_answer
+from .. import stt_service, stt_stream, audio_features, llm, confidence, admission
 from ..models import (
     InterviewRequest, InterviewResponse, EvaluationRequest, EvaluationReport, 
-    TranscriptionResponse, TranscriptionInput
+    TranscriptionResponse, TranscriptionInput, EvaluationJobStatus
 )
+from ..jobs import evaluation_queue, COMPLETED
+from ..speculation import question_prefetcher
+from ..idempotency import turn_coalescer, turn_key
+from ..metrics import TimedRoute
 
 router = APIRouter(
     prefix="/interview",
-    tags=["Interview Core"]
+    tags=["Interview Core"],
+    route_class=TimedRoute
 )
 
+def _transcription_response(session_id: str, analysis_data: dict) -> TranscriptionResponse:
+    transcript = analysis_data.get("transcript", "Transcription failed.")
+    measurements = dict(analysis_data.get("measurements") or {})
+
+    if not measurements.get("durationSec"):
+        # Audio could not be decoded locally; fall back to a 180 WPM estimate.
+        transcript_length = len(transcript.split())
+        measurements["durationSec"] = (transcript_length / 180) * 60 if transcript_length > 0 else 1.0
+
+    return TranscriptionResponse(
+        session_id=session_id,
+        transcript=transcript,
+        duration_sec=measurements["durationSec"],
+        audio_features=audio_features.summarize(measurements)
+    )
+
+
+async def _admit(session_id: str, user_id: str = None, priority: int = admission.IN_PROGRESS):
+    """Waits for a model-call token; over the limit this becomes a 429 with Retry-After."""
+    controller = admission.controller
+    try:
+        await controller.admit(controller.client_key(session_id, user_id), priority)
+    except admission.AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+async def _transcribe(session_id: str, transcription) -> TranscriptionResponse:
+    try:
+        response = _transcription_response(session_id, await transcription)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=f"AI Service Unavailable: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transcription processing error: {e}")
+    # Start on the next question while the client round-trips the transcript
+    await question_prefetcher.speculate(session_id, response.transcript)
+    return response
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(req: TranscriptionInput):
     """
@@ -20,116 +71,373 @@ async def transcribe_audio(req: TranscriptionInput):
     if not req.audio_data_uri:
         raise HTTPException(status_code=400, detail="Audio data URI is missing.")
     
+    await _admit(req.session_id)
+    return await _transcribe(req.session_id, stt_service.transcribe_and_analyze_audio(req.audio_data_uri))
+
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024   # boundaries and part headers around the audio file
+
+
+def _check_declared_length(request: Request, limit: int, required: bool = False):
+    """Refuses a body whose Content-Length is over `limit` before any of it is read."""
+    declared = request.headers.get("content-length")
+    if declared is None or not declared.isdigit():
+        if required:
+            raise HTTPException(status_code=411, detail="Multipart uploads need a Content-Length header.")
+        return
+    if int(declared) > limit:
+        raise HTTPException(status_code=413, detail="Audio upload is too large.")
+
+
+async def _read_audio_body(request: Request) -> bytes:
+    """Reads a raw audio body chunk by chunk, refusing anything over the upload limit."""
+    limit = stt_service.MAX_AUDIO_UPLOAD_BYTES
+    _check_declared_length(request, limit)
+
+    # BytesIO grows in place and getvalue() hands its buffer over without a copy, so the
+    # upload is held once (a list of chunks joined at the end is held twice at the peak).
+    body = io.BytesIO()
+    async for chunk in request.stream():
+        if body.tell() + len(chunk) > limit:
+            raise HTTPException(status_code=413, detail="Audio upload is too large.")
+        body.write(chunk)
+    return body.getvalue()
+
+
+@router.post("/transcribe/upload", response_model=TranscriptionResponse)
+async def transcribe_upload(request: Request, session_id: str):
+    """
+    Binary upload path for /transcribe. Accepts either the raw recording as the
+    request body (Content-Type: audio/webm, audio/wav, ...) or a multipart form
+    with an `audio` file field. No Base64 round trip is involved.
+    """
+    # Admit before reading the body so a rejected upload is never buffered
+    await _admit(session_id)
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        # The form parser spools the whole file before we see it, so the bound is the declared length
+        # (the server does not read past Content-Length).
+        _check_declared_length(request, stt_service.MAX_AUDIO_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES, required=True)
+        form = await request.form()
+        upload = form.get("audio")
+        if not isinstance(upload, StarletteUploadFile):
+            raise HTTPException(status_code=400, detail="Multipart upload needs an 'audio' file field.")
+        if upload.size is not None and upload.size > stt_service.MAX_AUDIO_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Audio upload is too large.")
+        mime_type = upload.content_type or "audio/webm"
+        audio_bytes = await upload.read()
+        await form.close()
+    else:
+        mime_type = content_type.split(";")[0].strip() or "audio/webm"
+        audio_bytes = await _read_audio_body(request)
+
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Audio upload is empty.")
+
+    return await _transcribe(session_id, stt_service.transcribe_audio_bytes(audio_bytes, mime_type))
+    
+
+async def _forward_partials(websocket: WebSocket, transcription: stt_stream.StreamingTranscription):
+    while True:
+        transcript = await transcription.partials.get()
+        await websocket.send_json({"event": "partial", "transcript": transcript})
+        await question_prefetcher.speculate(transcription.session_id, transcript)
+
+
+@router.websocket("/transcribe/stream")
+async def transcribe_stream(websocket: WebSocket, session_id: str, mime_type: str = "audio/webm"):
+    """
+    Incremental transcription while the candidate is speaking.
+    The client sends each self-contained audio segment as a binary message and
+    the text message "end" after the last one. The server replies with
+    {"event": "partial"} messages as in-order segments finish, then one
+    {"event": "final"} message with the TranscriptionResponse fields.
+    """
+    await websocket.accept()
+    try:
+        await _admit(session_id)
+    except HTTPException as e:
+        await websocket.send_json({"event": "error", "detail": e.detail, "retry_after": int(e.headers["Retry-After"])})
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    transcription = stt_stream.start(session_id, mime_type)
+    forwarder = asyncio.create_task(_forward_partials(websocket, transcription))
     try:
-        analysis_data = stt_service.transcribe_and_analyze_audio(req.audio_data_uri)
-        
-        audio_features = {
-            "speechRateWpm": analysis_data.get("speechRateWpm", 0.0),
-            "fillerRate": analysis_data.get("fillerRate", 0.0),
-        }
-        
-        transcript_length = len(analysis_data.get("transcript", "").split())
-        duration_sec = (transcript_length / 180) * 60 if transcript_length > 0 else 1.0
-
-        return TranscriptionResponse(
-            session_id=req.session_id,
-            transcript=analysis_data.get("transcript", "Transcription failed."),
-            duration_sec=duration_sec,
-            audio_features=audio_features
-        )
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                transcription.add_segment(message["bytes"])
+            elif message.get("text") == "end":
+                break
 
+        analysis_data = await transcription.finish()
+        forwarder.cancel()
+        response = _transcription_response(session_id, analysis_data)
+        await websocket.send_json({"event": "final", **response.model_dump()})
+        await question_prefetcher.speculate(session_id, response.transcript)
+    except WebSocketDisconnect:
+        return
     except ConnectionError as e:
-        raise HTTPException(status_code=503, detail=f"AI Service Unavailable: {e}")
+        await websocket.send_json({"event": "error", "detail": f"AI Service Unavailable: {e}"})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Transcription processing error: {e}")
+        await websocket.send_json({"event": "error", "detail": f"Transcription processing error: {e}"})
+    finally:
+        forwarder.cancel()
+        transcription.cancel()
+        stt_stream.release(transcription)
+    await websocket.close()
     
 
+async def _forward_confidence(websocket: WebSocket, analysis: confidence.ConfidenceSession):
+    while True:
+        update = await analysis.updates.get()
+        await websocket.send_json({"event": "metrics", **update})
+
+
+@router.websocket("/confidence/stream")
+async def confidence_stream(websocket: WebSocket, session_id: str):
+    """
+    Head-stability analysis of the candidate's webcam feed.
+    The client sends JPEG frames as binary messages (any rate; surplus frames are
+    skipped) and the text message "end" when the interview is over. The server
+    sends rolling {"event": "metrics"} messages about once a second, then one
+    {"event": "final"} summary, which is also attached to the evaluation report.
+    """
+    await websocket.accept()
+    try:
+        analysis = confidence.start(session_id)
+    except RuntimeError as e:
+        await websocket.send_json({"event": "error", "detail": str(e)})
+        await websocket.close()
+        return
+
+    forwarder = asyncio.create_task(_forward_confidence(websocket, analysis))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                analysis.offer(message["bytes"])
+            elif message.get("text") == "end":
+                break
+
+        summary = await analysis.finish()
+        forwarder.cancel()
+        await websocket.send_json({"event": "final", **summary})
+    except WebSocketDisconnect:
+        return
+    finally:
+        forwarder.cancel()
+        analysis.cancel()
+        confidence.release(analysis)
+    await websocket.close()
+
+
 # --- Endpoint 2: Generate Question (/interview/generate_question) ---
-@router.post("/generate_question", response_model=InterviewResponse)
-async def generate_question(req: InterviewRequest):
-    session_id = req.session_id if req.session_id else str(uuid.uuid4())
-    
-    db_manager = get_db_manager()
-    history = db_manager.get_history(session_id)
-    ai_question = None 
-    
+def _plan_turn(req: InterviewRequest, history: list[dict]):
+    """
+    Works out what this call should do with the stored history.
+    Returns (context_history, answered_pair) when a new question is needed,
+    or None when the open question should simply be returned again.
+    """
     # CASE A: FIRST CALL (Start Session)
     if not history and req.user_answer is None:
-        db_manager.start_session(session_id, req.role, user_id=req.user_id)
-        
-        # Pass ALL parameters including new difficulty and JD
-        ai_question = llm.generate_contextual_question(
-            role=req.role, 
-            history=[],
-            difficulty=req.difficulty, 
-            job_description=req.job_description or "" 
-        ) 
-        
-        # Save the first question with empty answer (placeholder)
-        db_manager.append_qa_pair(session_id, question=ai_question, answer="")
-        
+        return [], None
+
     # CASE B: SUBSEQUENT CALL (User Answered)
-    elif req.user_answer is not None:
-        # 1. Update the previous question with the user's answer
+    if req.user_answer is not None:
+        # Answer the open question (kept in memory until the write)
+        answered = None
         if history:
-            last_question = history[-1].get('Q', 'Initial Greeting') 
-            db_manager.append_qa_pair(session_id, last_question, req.user_answer)
-        
-        # 2. Fetch updated history to give context to AI
-        updated_history = db_manager.get_history(session_id)
-        
-        # 3. Generate Next Question with full context
-        ai_question = llm.generate_contextual_question(
-            role=req.role, 
-            history=updated_history,
-            difficulty=req.difficulty, 
-            job_description=req.job_description or "" 
-        )
-        
-        # 4. Save the new AI question (open loop)
-        db_manager.append_qa_pair(session_id, question=ai_question, answer="")
+            history = with_answer(history, req.user_answer)
+            answered = history[-1].to_dict()
+        return history, answered
 
     # CASE C: HISTORY EXISTS BUT NO ANSWER (Resume/Error)
-    elif history:
-        ai_question = history[-1].get('Q', 'Error: Please provide an answer.')
+    if history:
+        return None
 
+    raise HTTPException(status_code=400, detail="Invalid request state.")
+
+
+async def _save_question(db_manager, req: InterviewRequest, session_id: str, starting: bool, answered, ai_question: str):
+    if starting:
+        # Create the session with the first question as an open entry (single write)
+        await db_manager.start_session(session_id, req.role, user_id=req.user_id, first_question=ai_question,
+                                       difficulty=req.difficulty, job_description=req.job_description)
     else:
-        raise HTTPException(status_code=400, detail="Invalid request state.")
-        
-    is_complete = "stop" in ai_question.lower()
+        # Save the answer and the new AI question (open loop) in one batched write
+        await db_manager.record_turn(session_id, answered=answered, next_question=ai_question)
+
+
+def _is_complete(ai_question: str) -> bool:
+    return "stop" in ai_question.lower()
+
+
+def _recorded_reply(req: InterviewRequest, history: list):
+    """
+    For a retry of a turn that is already recorded: (the question asked after
+    it, its index). None for the open turn. An answered turn with a different
+    answer, or a turn not asked yet, is a 409.
+    """
+    if req.turn is None or req.user_answer is None or not history:
+        return None
+    if req.turn >= len(history):
+        raise HTTPException(status_code=409, detail=f"Turn {req.turn} has not been asked yet.")
+    if req.turn == len(history) - 1:
+        return None
+    if history[req.turn].get('A') != req.user_answer:
+        raise HTTPException(status_code=409, detail=f"Turn {req.turn} was already answered differently.")
+    return history[req.turn + 1].get('Q', ''), req.turn + 1
+
+
+async def _next_question(req: InterviewRequest, session_id: str, on_text: Optional[Callable[[str], None]] = None) -> InterviewResponse:
+    """
+    One turn of /generate_question: reads the history, generates (or reuses)
+    the next question and saves it. With `on_text`, the question is streamed
+    to it as it is generated.
+    """
+    db_manager = get_db_manager()
+    history = await db_manager.get_history(session_id)
+    recorded = _recorded_reply(req, history)
+    plan = _plan_turn(req, history) if recorded is None else None
+    if plan is not None:
+        # Interviews already in progress are served ahead of new ones
+        await _admit(session_id, req.user_id, admission.IN_PROGRESS if history else admission.NEW_SESSION)
+
+    question_prefetcher.remember(session_id, req.role, req.difficulty, req.job_description)
+
+    if plan is None:
+        ai_question, turn = recorded or (history[-1].get('Q', 'Error: Please provide an answer.'), len(history) - 1)
+        if on_text is not None:
+            on_text(ai_question)
+    else:
+        context_history, answered = plan
+        turn = len(context_history)
+        # A question prefetched from the (partial) transcript is used if the answer still matches
+        ai_question = await question_prefetcher.take(session_id, history, req.user_answer) if answered else None
+        if ai_question is not None:
+            if on_text is not None:
+                on_text(ai_question)
+        elif on_text is None:
+            # Pass ALL parameters including difficulty and JD
+            ai_question = await llm.generate_contextual_question(
+                role=req.role, 
+                history=context_history,
+                difficulty=req.difficulty, 
+                job_description=req.job_description or "",
+                session_id=session_id
+            )
+        else:
+            parts = []
+            async for text in llm.stream_contextual_question(
+                role=req.role,
+                history=context_history,
+                difficulty=req.difficulty,
+                job_description=req.job_description or "",
+                session_id=session_id
+            ):
+                parts.append(text)
+                on_text(text)
+            ai_question = "".join(parts).strip()
+        await _save_question(db_manager, req, session_id, not history, answered, ai_question)
 
     return InterviewResponse(
         session_id=session_id, 
         ai_question=ai_question, 
-        is_complete=is_complete
+        is_complete=_is_complete(ai_question),
+        turn=turn
+    )
+
+
+@router.post("/generate_question", response_model=InterviewResponse)
+async def generate_question(req: InterviewRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    Concurrent retries of a request share one model call; with an
+    Idempotency-Key or `turn`, so do retries just after it finished. See
+    src/idempotency.py.
+    """
+    session_id = req.session_id if req.session_id else str(uuid.uuid4())
+    key, replay = turn_key(session_id, idempotency_key, req.turn, req.user_answer)
+    return await turn_coalescer.run(session_id, key, lambda: _next_question(req, session_id), replay)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate_question/stream")
+async def stream_question(req: InterviewRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    Server-Sent Events version of /generate_question.
+    Emits `token` events as text arrives, then one `done` event carrying the
+    InterviewResponse once the question has been saved. A retry of a turn
+    already being generated gets the whole question as one `token` event.
+    """
+    session_id = req.session_id if req.session_id else str(uuid.uuid4())
+    key, replay = turn_key(session_id, idempotency_key, req.turn, req.user_answer)
+
+    texts = asyncio.Queue()   # streamed text, then None once the turn is done
+    result = asyncio.ensure_future(
+        turn_coalescer.run(session_id, key, lambda: _next_question(req, session_id, texts.put_nowait), replay)
+    )
+    result.add_done_callback(lambda _: texts.put_nowait(None))
+    first = await texts.get()
+    if first is None and result.exception() is not None:
+        raise result.exception()   # e.g. a 429 from admission, before any event was sent
+
+    async def events():
+        text, streamed = first, False
+        while text is not None:
+            streamed = True
+            yield _sse("token", {"text": text})
+            text = await texts.get()
+        response = result.result()
+        if not streamed:
+            yield _sse("token", {"text": response.ai_question})
+        yield _sse("done", response.model_dump())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 # --- Endpoint 3: Evaluate (/interview/evaluate) ---
 @router.post("/evaluate", response_model=EvaluationReport)
 async def evaluate_session(req: EvaluationRequest):
+    """
+    Runs the evaluation through the job queue and waits for it. If the client
+    disconnects, the job still finishes and the report is still saved.
+    """
     try:
-        db_manager = get_db_manager()
-        
-        # 1. Fetch the REAL history from the DB
-        history = db_manager.get_history(req.session_id)
-        
-        print(f"DEBUG: Evaluating Session {req.session_id} with {len(history)} turns.")
-
-        # 2. Generate the report using the merged LLM module
-        # Updated to use direct attributes from the updated EvaluationRequest model
-        evaluation_data = llm.get_final_evaluation_json(
-            role=req.role, 
-            history=history,
-            difficulty=req.difficulty, 
-            job_description=req.job_description or ""
-        )
-        
-        report = EvaluationReport(**evaluation_data) 
-        
-        db_manager.save_final_report(req.session_id, report.model_dump())
-
-        return report
+        job = await evaluation_queue.submit(req)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    except Exception as e:
-        print(f"Evaluation Error: {e}")
-        raise HTTPException(status_code=500, detail=f"AI Evaluation processing failed: {e}")
\ No newline at end of file
+    await job.done.wait()
+    if job.status != COMPLETED:
+        raise HTTPException(status_code=500, detail=f"AI Evaluation processing failed: {job.error}")
+    return job.report
+
+
+@router.post("/evaluate/jobs", response_model=EvaluationJobStatus, status_code=202)
+async def submit_evaluation(req: EvaluationRequest):
+    """Queues an evaluation and returns its job ID immediately."""
+    try:
+        job = await evaluation_queue.submit(req)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/evaluate/{job_id}", response_model=EvaluationJobStatus)
+async def get_evaluation(job_id: str):
+    job = evaluation_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found.")
+    return job.to_dict()
@@ -0,0 +1,191 @@
+"""
+Reuse of model output for near-identical answers.
+
+Candidates for the same role often answer the opening questions almost word
+for word, and the interviewer's reaction to those answers is just as alike.
+Each answer is embedded locally (no model, CPU only) as a hashed n-gram
+vector: word unigrams and bigrams plus character trigrams, signed feature
+hashing into SEMANTIC_CACHE_DIM dimensions, L2-normalised and stored as
+int8. Filler words are dropped first, so "um, I'd use an index" and "I'd use
+an index" embed the same.
+
+Vectors are grouped by scope, an exact hash of everything else the model saw
+(model, system instruction, the questions asked, which of them were
+answered). A lookup is therefore one int8 matrix-vector product over the
+answers given to the same questions, capped at SEMANTIC_CACHE_BUCKET_SIZE.
+Each answer keeps its own vector, and a stored result is reused only when
+every answer reaches SEMANTIC_CACHE_THRESHOLD cosine similarity with its
+counterpart: one changed answer in a long transcript barely moves the
+similarity of the transcript as a whole.
+
+- Follow-up questions: the first SEMANTIC_CACHE_MAX_TURNS answers of a
+  session; later follow-ups depend on more of the interview than the last
+  answer.
+- Evaluations: the whole transcript, for sessions with the same questions.
+
+Off by default: a reused follow-up or grade deliberately ignores small
+differences in wording.
+"""
+import os
+import re
+from functools import lru_cache
+from itertools import chain
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .audio_features import FILLER_PATTERN
+from .response_cache import prompt_key
+from . import metrics
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))   # cosine similarity
+SEMANTIC_CACHE_MAX_TURNS = int(os.getenv("SEMANTIC_CACHE_MAX_TURNS", "1"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "200000"))   # per cache
+SEMANTIC_CACHE_BUCKET_SIZE = int(os.getenv("SEMANTIC_CACHE_BUCKET_SIZE", "10000"))   # answers kept per scope
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "256"))
+
+LOOKUPS = metrics.counter("semantic_cache_total", "Near-duplicate answer lookups by cache and outcome (hit, miss).", ("cache", "outcome"))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+SCALE = 127   # int8 quantization of unit vectors
+
+
+@lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> Tuple[int, ...]:
+    """Hashes of a word and its character trigrams; interview vocabulary repeats, so this is mostly a lookup."""
+    padded = f"<{word}>"
+    return (hash(word),) + tuple(hash(padded[i:i + 3]) for i in range(len(padded) - 2))
+
+
+def embed(text: str, dim: int = SEMANTIC_CACHE_DIM) -> Optional[np.ndarray]:
+    """Unit-length hashed n-gram vector of `text` as int8, or None when it has no words."""
+    words = TOKEN_PATTERN.findall(FILLER_PATTERN.sub(" ", text.lower()))
+    if not words:
+        return None
+    # hash() is salted per process, which is fine for an index that lives in one process
+    hashes = np.fromiter(
+        chain(chain.from_iterable(map(_word_hashes, words)), map(hash, zip(words, words[1:]))), dtype=np.int64
+    )
+    signs = np.where(hashes < 0, -1.0, 1.0)   # signed hashing: collisions cancel out instead of adding up
+    vector = np.bincount(hashes % dim, weights=signs, minlength=dim)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return np.round(vector / norm * SCALE).astype(np.int8)
+
+
+def embed_all(texts: Sequence[str], dim: int = SEMANTIC_CACHE_DIM) -> Optional[np.ndarray]:
+    """The vectors of `texts` end to end, or None when any of them has no words."""
+    vectors = [embed(text, dim) for text in texts]
+    if not vectors or any(vector is None for vector in vectors):
+        return None
+    return np.concatenate(vectors)
+
+
+def turns_key(model: str, system_instruction: str, history: List[Dict[str, str]]) -> Tuple[str, Tuple[str, ...]]:
+    """(scope, answers) for a history: the questions must match exactly, each answer only closely."""
+    answered = [str(index) for index, turn in enumerate(history) if turn.get('A')]
+    scope = prompt_key(model, system_instruction, *(turn.get('Q', '') for turn in history), *answered)
+    return scope, tuple(turn['A'] for turn in history if turn.get('A'))
+
+
+class _Bucket:
+    """Vectors and results for one scope; a ring buffer once it reaches its capacity."""
+    __slots__ = ("vectors", "values", "size", "next")
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((16, dim), dtype=np.int8)
+        self.values: List[Any] = []
+        self.size = 0
+        self.next = 0
+
+    def add(self, vector: np.ndarray, value: Any, capacity: int) -> int:
+        """Stores the pair; returns how many entries were added (0 when one was overwritten)."""
+        if self.size < capacity:
+            if self.size == len(self.vectors):
+                grown = np.empty((min(len(self.vectors) * 2, capacity), self.vectors.shape[1]), dtype=np.int8)
+                grown[:self.size] = self.vectors[:self.size]
+                self.vectors = grown
+            self.vectors[self.size] = vector
+            self.values.append(value)
+            self.size += 1
+            return 1
+        self.vectors[self.next] = vector
+        self.values[self.next] = value
+        self.next = (self.next + 1) % capacity
+        return 0
+
+
+class SemanticCache:
+    def __init__(self, name: str, threshold: float = SEMANTIC_CACHE_THRESHOLD, dim: int = SEMANTIC_CACHE_DIM,
+                 bucket_size: int = SEMANTIC_CACHE_BUCKET_SIZE, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.threshold = threshold
+        self.dim = dim
+        self.bucket_size = bucket_size
+        self.max_entries = max_entries
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def lookup(self, scope: str, texts: Sequence[str]) -> Optional[Any]:
+        """
+        Result stored for the most similar texts under `scope`, if each of them is
+        similar enough to its counterpart.
+        """
+        vector = embed_all(texts, self.dim)
+        bucket = self._buckets.get(scope)
+        best = None
+        if vector is not None and bucket is not None:
+            self._buckets.move_to_end(scope)
+            # One score per stored entry and text; an entry is as similar as its least similar text
+            stored = bucket.vectors[:bucket.size].reshape(bucket.size, len(texts), self.dim)
+            scores = np.einsum("ikj,kj->ik", stored, vector.reshape(len(texts), self.dim),
+                               dtype=np.int32, casting="unsafe").min(axis=1)
+            index = int(np.argmax(scores))
+            if scores[index] >= self.threshold * SCALE * SCALE:
+                best = bucket.values[index]
+        if best is None:
+            self.misses += 1
+            LOOKUPS.inc(1, self.name, "miss")
+        else:
+            self.hits += 1
+            LOOKUPS.inc(1, self.name, "hit")
+        return best
+
+    def add(self, scope: str, texts: Sequence[str], value: Any):
+        vector = embed_all(texts, self.dim)
+        if vector is None:
+            return
+        bucket = self._buckets.get(scope)
+        if bucket is None:
+            bucket = self._buckets[scope] = _Bucket(len(vector))   # the scope fixes how many texts there are
+        self._buckets.move_to_end(scope)
+        self.entries += bucket.add(vector, value, self.bucket_size)
+        while self.entries > self.max_entries and len(self._buckets) > 1:
+            _, evicted = self._buckets.popitem(last=False)
+            self.entries -= evicted.size
+
+    def nbytes(self) -> int:
+        """Memory held by the vectors, not counting the stored results."""
+        return sum(bucket.vectors.nbytes for bucket in self._buckets.values())
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self.entries,
+            "scopes": len(self._buckets),
+            "vector_bytes": self.nbytes(),
+        }
+
+
+followup_cache = SemanticCache("followup")
+evaluation_cache = SemanticCache("evaluation")
+metrics.gauge("semantic_cache_entries", "Answers stored for near-duplicate reuse.",
+              lambda: followup_cache.entries + evaluation_cache.entries)
+metrics.gauge("semantic_cache_bytes", "Memory held by the near-duplicate answer index.",
+              lambda: followup_cache.nbytes() + evaluation_cache.nbytes())
@@ -0,0 +1,365 @@
+"""
+Session ownership across `uvicorn --workers N`.
+
+The kernel hands connections to workers at random, so without affinity every
+worker would need its own copy of a session's history and the per-worker
+caches would disagree. Instead each session has exactly one owner, picked by
+consistent hashing of its session_id over the live workers. A request that
+lands on another worker forwards its session reads and writes to the owner
+over a Unix socket, so there is a single cached copy and no stale reads.
+
+Membership is a set of slot files in SESSION_SHARD_DIR: a worker owns
+slot-<i> for as long as it holds an exclusive flock on slot-<i>.lock, and
+the kernel drops the lock when the process exits. A restarted worker takes
+the first free slot, which puts the ring back the way it was. When a worker
+becomes owner of a session that it does not have cached, it first asks the
+worker that owned it before (the ring without itself) to flush pending
+writes and drop its copy, then loads the session from the backend.
+"""
+import os
+import json
+import time
+import bisect
+import asyncio
+import hashlib
+import itertools
+import tempfile
+from typing import Any, Dict, List, Optional
+from . import metrics
+from .metrics import span
+from .session_store import Turn
+
+try:
+    import fcntl
+except ImportError:   # Windows: no flock, so workers cannot agree on ownership
+    fcntl = None
+
+SESSION_SHARDING = os.getenv("SESSION_SHARDING", "0") == "1"
+SESSION_SHARD_DIR = os.getenv("SESSION_SHARD_DIR", os.path.join(tempfile.gettempdir(), "ai-mock-interview-shards"))
+SESSION_SHARD_VNODES = int(os.getenv("SESSION_SHARD_VNODES", "64"))
+SESSION_SHARD_REFRESH_SEC = float(os.getenv("SESSION_SHARD_REFRESH_SEC", "1"))
+SESSION_SHARD_HANDOFF_SEC = float(os.getenv("SESSION_SHARD_HANDOFF_SEC", "5"))   # wait for a restarting owner
+MAX_SLOTS = 256
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+ROUTED = metrics.counter(
+    "session_shard_requests_total",
+    "Session reads/writes by where they ran: on the owning worker (local), sent to it (forwarded), "
+    "or served here because the owner could not be reached (fallback).",
+    ("route",)
+)
+
+
+class NotOwner(Exception):
+    """The worker asked to serve a session does not own it under its current view of the ring."""
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring; adding or removing a worker only moves the sessions it owns."""
+
+    def __init__(self, members: List[int], vnodes: int = SESSION_SHARD_VNODES):
+        points = sorted((_hash(f"slot-{m}#{v}"), m) for m in members for v in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._members = [m for _, m in points]
+
+    def owner(self, key: str, exclude: Optional[int] = None) -> Optional[int]:
+        if not self._members:
+            return None
+        start = bisect.bisect(self._hashes, _hash(key))
+        for i in range(len(self._members)):
+            member = self._members[(start + i) % len(self._members)]
+            if member != exclude:
+                return member
+        return None
+
+
+# --- 1. Membership (slot locks) ---
+
+class ShardMembership:
+    def __init__(self, directory: str = SESSION_SHARD_DIR, vnodes: int = SESSION_SHARD_VNODES):
+        self.directory = directory
+        self.vnodes = vnodes
+        self.slot: Optional[int] = None
+        self.live: List[int] = []
+        self.ring = HashRing([], vnodes)
+        self._lock_fd: Optional[int] = None
+
+    def _path(self, slot: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"slot-{slot}.{suffix}")
+
+    def socket_path(self, slot: int) -> str:
+        return self._path(slot, "sock")
+
+    def join(self) -> int:
+        """Takes the first free slot and holds its lock until leave() (or process exit)."""
+        os.makedirs(self.directory, exist_ok=True)
+        for slot in range(MAX_SLOTS):
+            fd = os.open(self._path(slot, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self.slot, self._lock_fd = slot, fd
+            self.refresh()
+            return slot
+        raise RuntimeError(f"No free session shard slot in {self.directory}.")
+
+    def _is_held(self, slot: int) -> bool:
+        try:
+            fd = os.open(self._path(slot, "lock"), os.O_RDWR)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            return False   # nobody holds it: that worker is gone
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+
+    def refresh(self) -> List[int]:
+        """Re-reads which slots are held and rebuilds the ring if that changed."""
+        live = []
+        for name in os.listdir(self.directory):
+            if name.startswith("slot-") and name.endswith(".lock"):
+                slot = int(name[5:-5])
+                if slot == self.slot or self._is_held(slot):
+                    live.append(slot)
+        live.sort()
+        if live != self.live:
+            self.live = live
+            self.ring = HashRing(live, self.vnodes)
+        return live
+
+    def owner(self, session_id: str, exclude: Optional[int] = None) -> Optional[int]:
+        return self.ring.owner(session_id, exclude)
+
+    def leave(self):
+        if self._lock_fd is not None:
+            try:
+                os.unlink(self.socket_path(self.slot))
+            except FileNotFoundError:
+                pass
+            os.close(self._lock_fd)   # releases the flock
+            self._lock_fd = None
+
+
+# --- 2. Peer Connections ---
+
+class _Peer:
+    """One multiplexed connection to another worker's shard socket."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._connecting = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._connecting:
+            if self.writer is None or self.writer.is_closing():
+                reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_BYTES)
+                asyncio.create_task(self._read_replies(reader, self.writer))
+
+    async def _read_replies(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = self._futures.get(reply["id"])
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (OSError, ValueError):
+            pass
+        finally:
+            writer.close()
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Shard peer {self.path} closed the connection."))
+
+    async def call(self, op: str, args: Dict[str, Any]):
+        await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        try:
+            self.writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode() + b"\n")
+            reply = await future
+        finally:
+            self._futures.pop(request_id, None)
+        if "error" in reply:
+            if reply.get("not_owner"):
+                raise NotOwner(reply["error"])
+            raise RuntimeError(f"Session shard {op} failed: {reply['error']}")
+        return reply["result"]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# --- 3. Sharded Session Manager ---
+
+class ShardedSessionManager:
+    """
+    SessionManager front end for multi-worker deployments: runs each call on
+    the worker that owns the session (see module docstring). `local` is this
+    worker's SessionManager; its cache only ever holds sessions it owns.
+    """
+
+    def __init__(self, local, membership: Optional[ShardMembership] = None):
+        self.local = local
+        self.membership = membership or ShardMembership()
+        self._peers: Dict[int, _Peer] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        slot = self.membership.join()
+        path = self.membership.socket_path(slot)
+        if os.path.exists(path):
+            os.unlink(path)   # left behind by a worker that crashed in this slot
+        self._server = await asyncio.start_unix_server(self._serve, path=path, limit=MAX_MESSAGE_BYTES)
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+        await self._announce()
+        print(f"Session shard: worker {os.getpid()} owns slot {slot} of {len(self.membership.live)}")
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(SESSION_SHARD_REFRESH_SEC)
+            self.membership.refresh()
+
+    async def _announce(self):
+        """Tells the other workers to re-read the ring, so none keeps acting on a view without this change."""
+        for slot in self.membership.live:
+            if slot != self.membership.slot:
+                try:
+                    await self._peer(slot).call("refresh", {})
+                except (OSError, ConnectionError, RuntimeError):
+                    pass
+
+    def _peer(self, slot: int) -> _Peer:
+        peer = self._peers.get(slot)
+        if peer is None:
+            peer = self._peers[slot] = _Peer(self.membership.socket_path(slot))
+        return peer
+
+    # --- Routing ---
+
+    async def _run_local(self, op: str, session_id: str, args: Dict[str, Any]):
+        if op != "start_session" and self.local.cache.get(session_id) is None:
+            previous = self.membership.owner(session_id, exclude=self.membership.slot)
+            if previous is not None:
+                try:
+                    await self._peer(previous).call("release", {"session_id": session_id})
+                except (OSError, ConnectionError, RuntimeError):
+                    pass   # gone: it flushed on shutdown (or crashed, and its queued writes are lost anyway)
+        return await getattr(self.local, op)(session_id, **args)
+
+    async def _route(self, op: str, session_id: str, **args):
+        deadline = time.monotonic() + SESSION_SHARD_HANDOFF_SEC
+        while True:
+            owner = self.membership.owner(session_id)
+            if owner is None or owner == self.membership.slot:
+                ROUTED.inc(1, "local")
+                return await self._run_local(op, session_id, args)
+            try:
+                with span("shard_rpc"):
+                    result = await self._peer(owner).call(op, {"session_id": session_id, **args})
+                ROUTED.inc(1, "forwarded")
+                return result
+            except (OSError, ConnectionError, NotOwner):
+                # The owner is restarting or the views of the ring differ; re-read it and retry.
+                if time.monotonic() > deadline:
+                    print(f"WARNING: Session shard {owner} unreachable; serving {session_id} locally.")
+                    ROUTED.inc(1, "fallback")
+                    return await getattr(self.local, op)(session_id, **args)
+                await asyncio.sleep(0.05)
+                self.membership.refresh()
+
+    # --- Server side ---
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while line := await reader.readline():
+                asyncio.create_task(self._answer(json.loads(line), writer))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _answer(self, request: Dict[str, Any], writer: asyncio.StreamWriter):
+        op, args = request["op"], dict(request["args"])
+        session_id = args.pop("session_id", None)
+        try:
+            if op == "refresh":
+                self.membership.refresh()
+                reply = {"result": None}
+            elif op == "release":
+                await self.local.evict(session_id)
+                self.membership.refresh()   # whoever asked has joined the ring
+                reply = {"result": None}
+            else:
+                if self.membership.owner(session_id) != self.membership.slot:
+                    self.membership.refresh()
+                    if self.membership.owner(session_id) != self.membership.slot:
+                        raise NotOwner(f"slot {self.membership.slot} does not own {session_id}")
+                reply = {"result": await self._run_local(op, session_id, args)}
+        except NotOwner as e:
+            reply = {"error": str(e), "not_owner": True}
+        except Exception as e:
+            reply = {"error": str(e)}
+        if not writer.is_closing():
+            writer.write(json.dumps({"id": request["id"], **reply}, default=Turn.to_dict).encode() + b"\n")
+
+    # --- SessionManager interface ---
+
+    async def start_session(self, session_id: str, role: str, user_id: str = "guest", first_question: Optional[str] = None,
+                            difficulty: Optional[str] = None, job_description: Optional[str] = None):
+        await self._route("start_session", session_id, role=role, user_id=user_id, first_question=first_question,
+                          difficulty=difficulty, job_description=job_description)
+
+    async def get_history(self, session_id: str) -> List[Turn]:
+        history = await self._route("get_history", session_id)
+        # Forwarded histories arrive as {'Q', 'A'} dicts
+        return [turn if isinstance(turn, Turn) else Turn(index, turn['Q'], turn['A']) for index, turn in enumerate(history)]
+
+    async def record_turn(self, session_id: str, answered: Optional[Dict[str, str]] = None, next_question: Optional[str] = None):
+        await self._route("record_turn", session_id, answered=answered, next_question=next_question)
+
+    async def append_qa_pair(self, session_id: str, question: str, answer: str):
+        await self.record_turn(session_id, answered={'Q': question, 'A': answer})
+
+    async def save_final_report(self, session_id: str, report: Dict[str, Any]):
+        await self._route("save_final_report", session_id, report=report)
+
+    @property
+    def backend(self):
+        return self.local.backend
+
+    async def flush(self):
+        await self.local.flush()
+
+    async def close(self):
+        """Stops taking forwarded calls, lands pending writes, then gives up the slot."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+        await self.local.close()
+        self.membership.leave()
+        await self._announce()
+        for peer in self._peers.values():
+            peer.close()
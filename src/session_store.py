@@ -0,0 +1,433 @@
+import os
+import copy
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_CACHE_TTL_SEC = float(os.getenv("SESSION_CACHE_TTL_SEC", "1800"))
+SESSION_TURN_SEGMENT = int(os.getenv("SESSION_TURN_SEGMENT", "20"))   # turns per Firestore segment document
+FIRESTORE_BATCH_LIMIT = 500   # writes per Firestore batch commit
+
+
+# --- 1. History ---
+
+class Turn:
+    """
+    One interview question and its answer ('' while the question is open).
+    Reads like the {'Q': ..., 'A': ...} dicts history used to hold, so prompt
+    builders take either. Not changed once in a history: answering replaces
+    the open turn.
+    """
+    __slots__ = ("index", "question", "answer")
+
+    def __init__(self, index: int, question: str, answer: str = ""):
+        self.index = index
+        self.question = question
+        self.answer = answer
+
+    def get(self, key: str, default=None):
+        if key == 'Q':
+            return self.question
+        if key == 'A':
+            return self.answer
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in ('Q', 'A'):
+            raise KeyError(key)
+        return self.get(key)
+
+    def __eq__(self, other):
+        if isinstance(other, Turn):
+            return (self.index, self.question, self.answer) == (other.index, other.question, other.answer)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Turn({self.index}, {self.question!r}, {self.answer!r})"
+
+    def copy(self) -> "Turn":
+        return Turn(self.index, self.question, self.answer)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'Q': self.question, 'A': self.answer}
+
+
+def compact_history(entries: List[Dict[str, str]]) -> List[Turn]:
+    """
+    Turns from a stored `history` array (sessions written before per-turn
+    records). Those held each question twice: once open, then again with its
+    answer; the pair becomes one turn.
+    """
+    turns: List[Turn] = []
+    for entry in entries:
+        question, answer = entry.get('Q', ''), entry.get('A') or ''
+        if turns and not turns[-1].answer and turns[-1].question == question:
+            turns[-1].answer = answer
+        else:
+            turns.append(Turn(len(turns), question, answer))
+    return turns
+
+
+def with_answer(history: List[Turn], answer: str) -> List[Turn]:
+    """The history as it reads once `answer` is recorded: the open question at the end gets it."""
+    last = history[-1]
+    if last.get('A'):
+        return history + [Turn(len(history), last.get('Q', 'Initial Greeting'), answer)]
+    return history[:-1] + [Turn(len(history) - 1, last.get('Q', 'Initial Greeting'), answer)]
+
+
+def _overlay(turns: List[Turn], records: List[Turn]) -> List[Turn]:
+    """`turns` with per-turn records applied by index (records win)."""
+    for record in records:
+        if record.index < len(turns):
+            turns[record.index] = record
+        else:
+            turns.append(record)
+    return turns
+
+
+# --- 2. Backend Interface ---
+
+class SessionBackend:
+    """
+    Storage interface for interview sessions. Every method is one round trip.
+    The session's `history` is a list of Turn and is stored as one record per
+    turn, so a turn costs a write of that turn only.
+    """
+
+    async def create(self, session_id: str, session: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def load_turns(self, session_id: str, start: int = 0) -> List[Turn]:
+        """
+        Turns from index `start` on, in order, reading only the records from
+        `start`. The app itself always loads whole histories (start=0, through
+        `load`): SessionManager caches whole sessions and the question prompt
+        summarises every earlier turn (see context_window).
+        """
+        raise NotImplementedError
+
+    async def save_turns(self, session_id: str, turns: List[Turn]) -> None:
+        """Writes the given turns by index: an answer to an open question, or a new question."""
+        raise NotImplementedError
+
+    async def save_report(self, session_id: str, report: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def iter_sessions(self, status: str = 'completed', after: Optional[str] = None,
+                      page_size: int = 100) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Streams (session_id, session) with the given status in session_id order, starting after `after`."""
+        raise NotImplementedError
+
+    async def save_reports(self, reports: Dict[str, Dict[str, Any]]) -> None:
+        """Replaces the final report of many sessions in bulk (re-grading); status and completed_at are kept."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class FirestoreBackend(SessionBackend):
+    """
+    Stores sessions as documents using the async Firestore client. Turns live
+    in a `turns` subcollection, SESSION_TURN_SEGMENT per document (field
+    t00042 = {'q', 'a'}), so session length is not bound by the 1 MiB
+    document limit and an answer is a merge into one field.
+    """
+
+    def __init__(self, db, collection: str = 'interview_sessions'):
+        from firebase_admin import firestore  # only deployments on Firestore pay for the import
+        self.db = db
+        self.collection = collection
+        self.firestore = firestore
+
+    def _ref(self, session_id: str):
+        return self.db.collection(self.collection).document(session_id)
+
+    def _segment(self, session_id: str, index: int):
+        return self._ref(session_id).collection('turns').document(f"{index // SESSION_TURN_SEGMENT:05d}")
+
+    def _write_turns(self, batch, session_id: str, turns: List[Turn]):
+        segments: Dict[int, Dict[str, Any]] = {}
+        for turn in turns:
+            fields = segments.setdefault(turn.index // SESSION_TURN_SEGMENT, {})
+            fields[f"t{turn.index:05d}"] = {'q': turn.question, 'a': turn.answer}
+        for segment, fields in segments.items():
+            batch.set(self._segment(session_id, segment * SESSION_TURN_SEGMENT), fields, merge=True)
+
+    async def create(self, session_id, session):
+        batch = self.db.batch()
+        fields = {key: value for key, value in session.items() if key != 'history'}
+        batch.set(self._ref(session_id), {**fields, 'created_at': self.firestore.SERVER_TIMESTAMP})
+        self._write_turns(batch, session_id, session.get('history') or [])
+        await batch.commit()
+
+    async def load(self, session_id):
+        doc, turns = await asyncio.gather(self._ref(session_id).get(), self.load_turns(session_id))
+        if not doc.exists:
+            return None
+        session = doc.to_dict()
+        session['history'] = _overlay(compact_history(session.pop('history', None) or []), turns)
+        return session
+
+    async def load_turns(self, session_id, start=0):
+        query = self._ref(session_id).collection('turns').order_by('__name__')
+        if start:
+            query = query.start_at({'__name__': self._segment(session_id, start).id})
+        turns = []
+        async for doc in query.stream():
+            for key, value in sorted(doc.to_dict().items()):
+                index = int(key[1:])
+                if index >= start:
+                    turns.append(Turn(index, value.get('q', ''), value.get('a', '')))
+        return turns
+
+    async def save_turns(self, session_id, turns):
+        batch = self.db.batch()
+        self._write_turns(batch, session_id, turns)
+        await batch.commit()
+
+    async def save_report(self, session_id, report):
+        await self._ref(session_id).update({
+            'status': 'completed',
+            'final_report': report,
+            'completed_at': self.firestore.SERVER_TIMESTAMP
+        })
+
+    async def iter_sessions(self, status='completed', after=None, page_size=100):
+        query = (self.db.collection(self.collection)
+                 .where(filter=self.firestore.FieldFilter('status', '==', status))
+                 .order_by('__name__')
+                 .limit(page_size))
+        while True:
+            page = query.start_after({'__name__': after}) if after else query
+            # Read the whole page first: the caller may take minutes over it, longer than a stream stays open.
+            docs = [doc async for doc in page.stream()]
+            turns = await asyncio.gather(*(self.load_turns(doc.id) for doc in docs))
+            for doc, records in zip(docs, turns):
+                session = doc.to_dict()
+                session['history'] = _overlay(compact_history(session.pop('history', None) or []), records)
+                yield doc.id, session
+            if len(docs) < page_size:
+                return
+            after = docs[-1].id
+
+    async def save_reports(self, reports):
+        items = list(reports.items())
+        for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for session_id, report in items[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.update(self._ref(session_id), {
+                    'final_report': report,
+                    'regraded_at': self.firestore.SERVER_TIMESTAMP
+                })
+            await batch.commit()
+
+    async def close(self):
+        self.db.close()
+
+
+class MemoryBackend(SessionBackend):
+    """Process-local backend for tests and benchmarks; no Firebase required."""
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    async def create(self, session_id, session):
+        self.sessions[session_id] = {**copy.deepcopy(session), 'created_at': time.time()}
+
+    async def load(self, session_id):
+        session = self.sessions.get(session_id)
+        return copy.deepcopy(session) if session is not None else None
+
+    async def load_turns(self, session_id, start=0):
+        session = self.sessions.get(session_id)
+        return [turn.copy() for turn in session['history'][start:]] if session is not None else []
+
+    async def save_turns(self, session_id, turns):
+        _overlay(self.sessions[session_id]['history'], [turn.copy() for turn in turns])
+
+    async def save_report(self, session_id, report):
+        self.sessions[session_id].update({
+            'status': 'completed',
+            'final_report': copy.deepcopy(report),
+            'completed_at': time.time()
+        })
+
+    async def iter_sessions(self, status='completed', after=None, page_size=100):
+        for session_id in sorted(self.sessions):
+            session = self.sessions[session_id]
+            if (after is None or session_id > after) and session.get('status') == status:
+                yield session_id, copy.deepcopy(session)
+
+    async def save_reports(self, reports):
+        for session_id, report in reports.items():
+            self.sessions[session_id].update({'final_report': copy.deepcopy(report), 'regraded_at': time.time()})
+
+
+class SQLiteBackend(SessionBackend):
+    """Single-file backend for local runs; calls are moved off the event loop. Turns are rows of their own."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS interview_sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS interview_turns (session_id TEXT NOT NULL, turn INTEGER NOT NULL, "
+                "question TEXT NOT NULL, answer TEXT NOT NULL, PRIMARY KEY (session_id, turn))"
+            )
+            self.conn.commit()
+
+    def _read(self, session_id):
+        row = self.conn.execute(
+            "SELECT data FROM interview_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, session_id, session):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO interview_sessions (session_id, data) VALUES (?, ?)",
+            (session_id, json.dumps(session))
+        )
+        self.conn.commit()
+
+    def _read_turns(self, session_id, start=0):
+        rows = self.conn.execute(
+            "SELECT turn, question, answer FROM interview_turns WHERE session_id = ? AND turn >= ? ORDER BY turn",
+            (session_id, start)
+        ).fetchall()
+        return [Turn(*row) for row in rows]
+
+    def _write_turns(self, session_id, turns):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO interview_turns (session_id, turn, question, answer) VALUES (?, ?, ?, ?)",
+            [(session_id, turn.index, turn.question, turn.answer) for turn in turns]
+        )
+
+    def _with_history(self, session_id, session):
+        session['history'] = _overlay(compact_history(session.pop('history', None) or []), self._read_turns(session_id))
+        return session
+
+    def _create(self, session_id, session):
+        with self.lock:
+            fields = {key: value for key, value in session.items() if key != 'history'}
+            self._write_turns(session_id, session.get('history') or [])
+            self._write(session_id, {**fields, 'created_at': time.time()})
+
+    def _load(self, session_id):
+        with self.lock:
+            session = self._read(session_id)
+            return self._with_history(session_id, session) if session is not None else None
+
+    def _load_turns(self, session_id, start):
+        with self.lock:
+            return self._read_turns(session_id, start)
+
+    def _save_turns(self, session_id, turns):
+        with self.lock:
+            self._write_turns(session_id, turns)
+            self.conn.commit()
+
+    def _save_report(self, session_id, report):
+        with self.lock:
+            session = self._read(session_id)
+            if session is None:
+                raise KeyError(f"Session {session_id} does not exist.")
+            session.update({'status': 'completed', 'final_report': report, 'completed_at': time.time()})
+            self._write(session_id, session)
+
+    def _page(self, status, after, page_size):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT session_id, data FROM interview_sessions "
+                "WHERE json_extract(data, '$.status') = ? AND session_id > ? ORDER BY session_id LIMIT ?",
+                (status, after or "", page_size)
+            ).fetchall()
+            return [(session_id, self._with_history(session_id, json.loads(data))) for session_id, data in rows]
+
+    def _save_reports(self, reports):
+        with self.lock:
+            for session_id, report in reports.items():
+                session = self._read(session_id)
+                if session is not None:
+                    session.update({'final_report': report, 'regraded_at': time.time()})
+                    self.conn.execute(
+                        "UPDATE interview_sessions SET data = ? WHERE session_id = ?", (json.dumps(session), session_id)
+                    )
+            self.conn.commit()   # one transaction for the whole batch
+
+    async def create(self, session_id, session):
+        await asyncio.to_thread(self._create, session_id, session)
+
+    async def load(self, session_id):
+        return await asyncio.to_thread(self._load, session_id)
+
+    async def load_turns(self, session_id, start=0):
+        return await asyncio.to_thread(self._load_turns, session_id, start)
+
+    async def save_turns(self, session_id, turns):
+        await asyncio.to_thread(self._save_turns, session_id, turns)
+
+    async def save_report(self, session_id, report):
+        await asyncio.to_thread(self._save_report, session_id, report)
+
+    async def iter_sessions(self, status='completed', after=None, page_size=100):
+        while True:
+            rows = await asyncio.to_thread(self._page, status, after, page_size)
+            for session_id, session in rows:
+                after = session_id
+                yield session_id, session
+            if len(rows) < page_size:
+                return
+
+    async def save_reports(self, reports):
+        await asyncio.to_thread(self._save_reports, reports)
+
+    async def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# --- 3. Hot Session Cache ---
+
+class SessionCache:
+    """LRU of recently used sessions with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = SESSION_CACHE_SIZE, ttl_sec: float = SESSION_CACHE_TTL_SEC):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        stored_at, session = entry
+        if time.monotonic() - stored_at > self.ttl_sec:
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return session
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        self._entries[session_id] = (time.monotonic(), session)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,132 @@
+import os
+import asyncio
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+from .database import get_db_manager
+from .session_store import with_answer
+from . import llm, metrics, admission
+
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "1") == "1"
+SPECULATION_MATCH_RATIO = float(os.getenv("SPECULATION_MATCH_RATIO", "0.85"))
+SPECULATION_MIN_WORDS = int(os.getenv("SPECULATION_MIN_WORDS", "8"))
+SPECULATION_MAX_SESSIONS = 4096
+
+SPECULATIONS = metrics.counter(
+    "question_speculation_total",
+    "Speculative next-question generations by outcome (hit, miss, superseded, failed).",
+    ("outcome",)
+)
+
+
+def answer_similarity(a: str, b: str) -> float:
+    """Word-level similarity (0-1) between a speculated answer and the final one."""
+    a_words, b_words = a.lower().split(), b.lower().split()
+    if not a_words or not b_words:
+        return 0.0
+    return SequenceMatcher(None, a_words, b_words, autojunk=False).ratio()
+
+
+async def _speculative_question(**request) -> str:
+    admission.background()   # its model call takes quota behind every real request
+    return await llm.generate_contextual_question(**request)
+
+
+class Speculation:
+    """One in-flight guess at the next question, generated from a (partial) answer."""
+
+    def __init__(self, answer: str, history_len: int, task: asyncio.Task):
+        self.answer = answer
+        self.history_len = history_len
+        self.task = task
+
+
+class QuestionPrefetcher:
+    """
+    Starts generating the next question while the candidate is still answering.
+    Each partial transcript either keeps the current guess (if it still matches)
+    or replaces it; when the real answer arrives, a guess made from a close
+    enough answer against the same history is committed instead of a new call.
+    """
+
+    def __init__(self, match_ratio: float = SPECULATION_MATCH_RATIO, min_words: int = SPECULATION_MIN_WORDS):
+        self.match_ratio = match_ratio
+        self.min_words = min_words
+        self._requests: Dict[str, dict] = {}
+        self._current: Dict[str, Speculation] = {}
+
+    def remember(self, session_id: str, role: str, difficulty: Optional[str], job_description: Optional[str]):
+        """Stores the interview settings from the last question request; speculation reuses them."""
+        previous = self._requests.pop(session_id, None)
+        self._requests[session_id] = {
+            "role": role,
+            "difficulty": difficulty,
+            "job_description": job_description or "",
+            "turn": previous["turn"] if previous else 0,
+        }
+        while len(self._requests) > SPECULATION_MAX_SESSIONS:
+            self.discard(next(iter(self._requests)))
+
+    def _cancel(self, session_id: str, outcome: str):
+        current = self._current.pop(session_id, None)
+        if current is not None:
+            current.task.cancel()
+            SPECULATIONS.inc(1, outcome)
+
+    def discard(self, session_id: str):
+        self._requests.pop(session_id, None)
+        self._cancel(session_id, "superseded")
+
+    async def speculate(self, session_id: str, answer: str):
+        """Called with each partial (or final) transcript of the candidate's current answer."""
+        settings = self._requests.get(session_id)
+        if not SPECULATION_ENABLED or settings is None or len(answer.split()) < self.min_words:
+            return
+        if not admission.controller.has_spare_capacity():
+            return  # speculative calls only use quota nobody is waiting for
+
+        current = self._current.get(session_id)
+        if current is not None and answer_similarity(current.answer, answer) >= self.match_ratio:
+            return
+
+        turn = settings["turn"]
+        history = await get_db_manager().get_history(session_id)
+        latest = self._requests.get(session_id)
+        if not history or latest is None or latest["turn"] != turn:
+            return  # the answer was submitted while the history loaded
+        context_history = with_answer(history, answer)
+
+        self._cancel(session_id, "superseded")
+        task = asyncio.create_task(_speculative_question(
+            role=settings["role"],
+            history=context_history,
+            difficulty=settings["difficulty"],
+            job_description=settings["job_description"],
+            session_id=session_id
+        ))
+        self._current[session_id] = Speculation(answer, len(history), task)
+
+    async def take(self, session_id: str, history: List[dict], answer: str) -> Optional[str]:
+        """
+        Returns the speculated question if it was generated for this history and an
+        answer close to `answer`; otherwise cancels it and returns None.
+        """
+        settings = self._requests.get(session_id)
+        if settings is not None:
+            settings["turn"] += 1
+        current = self._current.pop(session_id, None)
+        if current is None:
+            return None
+        if current.history_len != len(history) or answer_similarity(current.answer, answer) < self.match_ratio:
+            current.task.cancel()
+            SPECULATIONS.inc(1, "miss")
+            return None
+
+        question = await current.task
+        if not question or question in (llm.FALLBACK_QUESTION, llm.UNAVAILABLE_QUESTION):
+            SPECULATIONS.inc(1, "failed")
+            return None
+        SPECULATIONS.inc(1, "hit")
+        return question
+
+
+question_prefetcher = QuestionPrefetcher()
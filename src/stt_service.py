@@ -1,16 +1,14 @@
 import os
 import base64
 import json
-from google import genai
-from google.genai.errors import APIError
+import asyncio
 from typing import Dict, Any
+from .llm_runtime import generate_content, STT_TIMEOUT_SEC
+from .clients import registry
+from . import audio_features
+from .metrics import span
 
-# Client initialization
-try:
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-except Exception as e:
-    print(f"Gemini Client Initialization Error: {e}")
-    client = None
+MAX_AUDIO_UPLOAD_BYTES = int(float(os.getenv("MAX_AUDIO_UPLOAD_MB", "25")) * 1024 * 1024)
 
 
 def parse_data_uri(data_uri: str) -> tuple[str, bytes]:
@@ -24,50 +22,71 @@ def parse_data_uri(data_uri: str) -> tuple[str, bytes]:
         # Fallback if URI format is slightly off, assuming raw base64 might be passed or default audio
         return "audio/wav", base64.b64decode(data_uri.split(',')[-1])
 
-def transcribe_and_analyze_audio(data_uri: str) -> Dict[str, Any]:
+async def transcribe_and_analyze_audio(data_uri: str) -> Dict[str, Any]:
+    """
+    Transcribes a Base64 data URI recording (legacy JSON upload path).
+    """
+    if registry.gemini() is None:
+        raise ConnectionError("Gemini client is not initialized. Check API key.")
+        
+    with span("base64_decode"):
+        mime_type, audio_bytes = parse_data_uri(data_uri)
+    return await transcribe_audio_bytes(audio_bytes, mime_type)
+
+async def transcribe_audio_bytes(audio_bytes: bytes, mime_type: str) -> Dict[str, Any]:
     """
     Transcribes audio using Gemini (Direct Bytes) and analyzes speech features.
     """
+    client = registry.gemini()
     if client is None:
         raise ConnectionError("Gemini client is not initialized. Check API key.")
-        
-    # 1. Parse Bytes directly (No file saving needed)
-    mime_type, audio_bytes = parse_data_uri(data_uri)
 
+    # Only the transcript comes from the model; pacing and fillers are measured locally.
     output_schema = {
         "type": "object",
         "properties": {
-            "transcript": {"type": "string"},
-            "speechRateWpm": {"type": "number"},
-            "fillerRate": {"type": "number"}
+            "transcript": {"type": "string"}
         },
-        "required": ["transcript", "speechRateWpm", "fillerRate"]
+        "required": ["transcript"]
     }
 
     prompt_instruction = (
-        "Transcribe the spoken audio provided. Then, analyze the speaker's fluency "
-        "and pacing, and estimate the words per minute (WPM) and filler word rate. "
+        "Transcribe the spoken audio provided verbatim, keeping filler words such as 'um' and 'uh'. "
         "Return the result ONLY as a JSON object adhering to the provided schema."
     )
 
+    from google import genai
+    from google.genai.errors import APIError
+
     try:
-        # 2. Use from_bytes to send data directly from memory
+        # Use from_bytes to send data directly from memory
         # This bypasses the 'from_file' error and is faster
         audio_part = genai.types.Part.from_bytes(data=audio_bytes, mime_type=mime_type)
 
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[audio_part, prompt_instruction],
-            config=genai.types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=output_schema
-            )
+        # Decode and measure the signal on a worker thread while the model transcribes
+        response, signal = await asyncio.gather(
+            generate_content(
+                client,
+                model='gemini-2.5-flash',
+                contents=[audio_part, prompt_instruction],
+                config=genai.types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=output_schema
+                ),
+                timeout=STT_TIMEOUT_SEC
+            ),
+            asyncio.to_thread(audio_features.measure_audio, audio_bytes, mime_type)
         )
         
-        return json.loads(response.text)
+        with span("json_parse"):
+            transcript = json.loads(response.text).get("transcript", "")
+        measurements = {**(signal or {}), **audio_features.count_words_and_fillers(transcript)}
+        return {"transcript": transcript, "measurements": measurements}
 
     except APIError as e:
         raise ConnectionError(f"Gemini API Error during STT: {e}")
+    except TimeoutError as e:
+        raise ConnectionError(f"Gemini STT timed out: {e}")
     except Exception as e:
         # This catches if 'from_bytes' also has issues or other logic fails
         raise Exception(f"STT Service Error: {e}")
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import asyncio
+from typing import Dict, Any, List, Optional
+from . import stt_service, audio_features
+
+STT_SEGMENT_CONCURRENCY = int(os.getenv("STT_SEGMENT_CONCURRENCY", "4"))
+
+# One live streaming transcription per interview session
+_active: Dict[str, "StreamingTranscription"] = {}
+
+
+def merge_segment_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Stitches per-segment STT results in order and sums their measurements."""
+    transcripts = [r.get("transcript", "").strip() for r in results]
+    return {
+        "transcript": " ".join(t for t in transcripts if t),
+        "measurements": audio_features.combine([r.get("measurements", {}) for r in results]),
+    }
+
+
+class StreamingTranscription:
+    """
+    Transcribes the segments of one answer while the candidate is still speaking.
+    Each segment must be a self-contained recording (its own container header).
+    Segments run in parallel up to STT_SEGMENT_CONCURRENCY; results are stitched in arrival order.
+    """
+
+    def __init__(self, session_id: str, mime_type: str, max_parallel: int = STT_SEGMENT_CONCURRENCY):
+        self.session_id = session_id
+        self.mime_type = mime_type
+        self.received_bytes = 0
+        self.partials: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_parallel)
+        self._tasks: List[asyncio.Task] = []
+        self._results: List[Optional[Dict[str, Any]]] = []
+        self._stitched = 0
+
+    def add_segment(self, audio_bytes: bytes):
+        self.received_bytes += len(audio_bytes)
+        if self.received_bytes > stt_service.MAX_AUDIO_UPLOAD_BYTES:
+            raise ValueError("Audio stream exceeds the upload limit.")
+        index = len(self._tasks)
+        self._results.append(None)
+        self._tasks.append(asyncio.create_task(self._transcribe(index, audio_bytes)))
+
+    async def _transcribe(self, index: int, audio_bytes: bytes):
+        async with self._slots:
+            self._results[index] = await stt_service.transcribe_audio_bytes(audio_bytes, self.mime_type)
+        self._publish_in_order()
+
+    def _publish_in_order(self):
+        # Only publish once every earlier segment is done, so partials never skip words.
+        advanced = False
+        while self._stitched < len(self._results) and self._results[self._stitched] is not None:
+            self._stitched += 1
+            advanced = True
+        if advanced:
+            self.partials.put_nowait(merge_segment_results(self._results[:self._stitched])["transcript"])
+
+    async def finish(self) -> Dict[str, Any]:
+        """Waits for outstanding segments and returns the stitched transcript and features."""
+        if not self._tasks:
+            raise ValueError("No audio segments were received.")
+        await asyncio.gather(*self._tasks)
+        return merge_segment_results(self._results)
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+def start(session_id: str, mime_type: str) -> StreamingTranscription:
+    """Opens a streaming transcription for a session, replacing any abandoned one."""
+    previous = _active.pop(session_id, None)
+    if previous is not None:
+        previous.cancel()
+    transcription = StreamingTranscription(session_id, mime_type)
+    _active[session_id] = transcription
+    return transcription
+
+
+def release(transcription: StreamingTranscription):
+    if _active.get(transcription.session_id) is transcription:
+        del _active[transcription.session_id]